@@ -0,0 +1,96 @@
+"""
+Compares inference throughput of several workers with default thread pools against CPU-partitioned workers.
+
+Each worker owns an ObjectDetection session, as in ImageProcessor.  In default mode every session sizes its thread pool
+to all cores; in partitioned mode each worker is pinned to its own CPUs and its session runs one thread per CPU of its slice.
+Each mode runs in its own process so affinity and OpenCV thread settings do not leak between them.
+
+    python benchmarks/benchmark_cpu_partition.py --workers 4 --images 40
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "app"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from cpu_partition import CpuPartitioner, pin_current_thread
+from object_detection import ObjectDetection
+from onnx_models import build_detection_model
+
+
+def run_mode(mode: str, model_path: str, workers: int, images: int) -> dict:
+    partitioner = None
+    if mode == "partitioned":
+        partitioner = CpuPartitioner(partitions=workers)
+        cv2.setNumThreads(partitioner.threads_per_partition)
+
+    image = np.random.default_rng(0).integers(0, 256, (1024, 1024, 3), dtype=np.uint8)
+    ready = threading.Barrier(workers + 1)
+    remaining = iter(range(images))
+    remaining_lock = threading.Lock()
+
+    def worker():
+        intra_op_threads = 0
+        if partitioner is not None:
+            partition = partitioner.acquire()
+            pin_current_thread(partitioner.partitions[partition])
+            intra_op_threads = len(partitioner.partitions[partition])
+        detector = ObjectDetection(model_path, intra_op_threads=intra_op_threads)
+        detector.predict_image(image)
+        ready.wait()
+        while True:
+            with remaining_lock:
+                if next(remaining, None) is None:
+                    return
+            detector.predict_image(image)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {"mode": mode, "workers": workers, "images": images, "seconds": round(elapsed, 3), "images_per_second": round(images / elapsed, 2),
+            "partitions": partitioner.partitions if partitioner is not None else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--mode", choices=["default", "partitioned"], help="Run a single mode in this process")
+    parser.add_argument("--model", help="ONNX model to run.  Defaults to a generated benchmark model")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.model, args.workers, args.images)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = args.model or str(build_detection_model(Path(temp_dir, "benchmark_detector.onnx")))
+        results = []
+        for mode in ("default", "partitioned"):
+            output = subprocess.run([sys.executable, __file__, "--mode", mode, "--model", model_path,
+                                     "--workers", str(args.workers), "--images", str(args.images)],
+                                    check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    for result in results:
+        print(f"{result['mode']:>12}: {result['images_per_second']:8.2f} images/s ({result['images']} images, {result['workers']} workers, {result['seconds']}s)")
+    print(f"     speedup: {results[1]['images_per_second'] / results[0]['images_per_second']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares two run_benchmarks.py results files and flags cases whose latency regressed.
+
+    python benchmarks/compare_results.py benchmarks/results/before.json benchmarks/results/after.json --threshold 10
+
+Exits with status 1 if any case's p50 grew by more than the threshold percentage, so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+STATISTICS = ["p50_ms", "p99_ms", "throughput_per_second", "peak_rss_mb"]
+
+
+def load_results(path: Path) -> Tuple[dict, Dict[tuple, dict]]:
+    """
+    Returns a results file's environment and its measured cases keyed by (case, format, size)
+    """
+    report = json.loads(Path(path).read_text())
+    results = {(result["case"], result["format"], result["size"]): result for result in report["results"] if "skipped" not in result}
+    return report["environment"], results
+
+
+def percent_change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(before: Dict[tuple, dict], after: Dict[tuple, dict], threshold: float) -> Tuple[List[str], List[tuple]]:
+    """
+    Returns a line per case measured in both files and the keys of the cases whose p50 grew by more than threshold percent
+    """
+    lines = []
+    regressions = []
+    for key in sorted(before.keys() & after.keys(), key=lambda key: (key[0], key[1] or "", key[2] or 0)):
+        case, image_format, size = key
+        changes = {statistic: percent_change(before[key][statistic], after[key][statistic]) for statistic in STATISTICS}
+        regressed = changes["p50_ms"] > threshold
+        if regressed:
+            regressions.append(key)
+        lines.append(f"{case:>17} {image_format or '':>7} {size or '':>6}: "
+                     f"p50 {before[key]['p50_ms']:10.3f} -> {after[key]['p50_ms']:10.3f} ms ({changes['p50_ms']:+6.1f}%)  "
+                     f"p99 {changes['p99_ms']:+6.1f}%  throughput {changes['throughput_per_second']:+6.1f}%  "
+                     f"peak RSS {changes['peak_rss_mb']:+6.1f}%" + ("  REGRESSED" if regressed else ""))
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Largest acceptable p50 increase in percent")
+    args = parser.parse_args()
+
+    before_environment, before = load_results(args.before)
+    after_environment, after = load_results(args.after)
+    print(f"Comparing {before_environment.get('commit')} with {after_environment.get('commit')}")
+    for key in ("cpus", "onnxruntime", "opencv"):
+        if before_environment.get(key) != after_environment.get(key):
+            print(f"Warning: {key} differs ({before_environment.get(key)} vs {after_environment.get(key)}), so results may not be comparable")
+
+    lines, regressions = compare(before, after, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Builds small ONNX models with the input and output layout of the ship detection model, for benchmarking without the real model
+"""
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+
+def build_detection_model(path: Path, input_size: int = 416, channels: int = 32, layers: int = 4) -> Path:
+    """
+    Writes a stack of 3x3 convolutions taking a (1, 3, input_size, input_size) float image and returning
+    detected_boxes, detected_classes and detected_scores with a single detection.
+
+    Returns:
+        Path: Path to the written model.
+    """
+    rng = np.random.default_rng(0)
+    nodes = []
+    initializers = []
+
+    previous, previous_channels = "image_tensor", 3
+    for i in range(layers):
+        weight = numpy_helper.from_array(rng.standard_normal((channels, previous_channels, 3, 3)).astype(np.float32) * 0.1, f"conv{i}_weight")
+        initializers.append(weight)
+        nodes.append(helper.make_node("Conv", [previous, weight.name], [f"conv{i}"], pads=[1, 1, 1, 1]))
+        nodes.append(helper.make_node("Relu", [f"conv{i}"], [f"relu{i}"]))
+        previous, previous_channels = f"relu{i}", channels
+
+    nodes.append(helper.make_node("ReduceMean", [previous], ["spatial_mean"], axes=[2, 3], keepdims=0))
+    nodes.append(helper.make_node("ReduceMean", ["spatial_mean"], ["pooled"], axes=[1], keepdims=1))
+    nodes.append(helper.make_node("Sigmoid", ["pooled"], ["detected_scores"]))
+    initializers.append(numpy_helper.from_array(np.array([[[0.25, 0.25, 0.5, 0.5]]], dtype=np.float32), "detected_boxes_value"))
+    nodes.append(helper.make_node("Identity", ["detected_boxes_value"], ["detected_boxes"]))
+    initializers.append(numpy_helper.from_array(np.zeros((1, 1), dtype=np.int64), "detected_classes_value"))
+    nodes.append(helper.make_node("Identity", ["detected_classes_value"], ["detected_classes"]))
+
+    graph = helper.make_graph(
+        nodes, "benchmark_detector",
+        [helper.make_tensor_value_info("image_tensor", TensorProto.FLOAT, [1, 3, input_size, input_size])],
+        [helper.make_tensor_value_info("detected_boxes", TensorProto.FLOAT, [1, 1, 4]),
+         helper.make_tensor_value_info("detected_classes", TensorProto.INT64, [1, 1]),
+         helper.make_tensor_value_info("detected_scores", TensorProto.FLOAT, [1, 1])],
+        initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    onnx.save(model, str(path))
+    return path
@@ -0,0 +1,319 @@
+"""
+Benchmarks the detection hot paths on synthetic scenes and saves the results as JSON, to compare between commits.
+
+Cases:
+    decode            image_decoder.decode_image of a JPEG or GeoTIFF scene at full resolution
+    predict_image     ObjectDetection.predict_image on a decoded scene
+    tiling            ImageProcessor.run_ship_detection_large_image over a decoded scene
+    parse_predictions ImageProcessor.parse_predictions of a 100-detection model output
+    write_hitboxes    ImageProcessor.write_hitboxes of 50 detections on a decoded scene
+    pipeline          A queued scene through ImageProcessor.monitor_queue, from queue to outbox
+
+Each case runs in its own process, so its peak RSS is its own.  Scenes and the ONNX model are generated with fixed seeds.
+Cases built on ImageProcessor need spacefx and are reported as skipped without it.
+
+    python benchmarks/run_benchmarks.py                       # 1k and 4k scenes
+    python benchmarks/run_benchmarks.py --full                # 1k to 20k scenes
+    python benchmarks/run_benchmarks.py --cases decode tiling --sizes 2048 --output baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+APP_FOLDER = BENCHMARKS_FOLDER.parent
+sys.path.insert(0, str(APP_FOLDER / "src" / "app"))
+sys.path.insert(0, str(BENCHMARKS_FOLDER))
+
+from onnx_models import build_detection_model
+from scenes import write_scene
+
+CASES = ["decode", "predict_image", "tiling", "parse_predictions", "write_hitboxes", "pipeline"]
+
+# What each case's throughput counts
+THROUGHPUT_UNITS = {"decode": "images", "predict_image": "images", "tiling": "tiles", "parse_predictions": "model outputs",
+                    "write_hitboxes": "detections", "pipeline": "images"}
+FORMATS = ["jpeg", "geotiff"]
+DEFAULT_SIZES = [1024, 4096]
+FULL_SIZES = [1024, 2048, 4096, 10240, 20480]
+
+# Cases whose cost does not depend on the scene, run once instead of per format and size
+SCENE_INDEPENDENT_CASES = ["parse_predictions"]
+
+# Cases that decode the scene with cv2.imread, run on JPEG only since GeoTIFFs decode to the same pixels
+JPEG_ONLY_CASES = ["predict_image", "tiling", "write_hitboxes"]
+
+MODEL_INPUT_SIZE = 416
+LABELS = ["ship", "boat", "vessel"]
+
+
+def write_app_config(work_folder: Path, model_path: Path) -> Path:
+    """
+    Writes an inbox with the benchmark model and an app-config.json using it, with every optional feature off
+    """
+    inbox_folder = Path(work_folder, "inbox")
+    inbox_folder.mkdir(parents=True, exist_ok=True)
+    (inbox_folder / "labels.txt").write_text("\n".join(LABELS) + "\n")
+    if not (inbox_folder / "model.onnx").exists():
+        os.link(model_path, inbox_folder / "model.onnx")
+
+    config = {
+        "LATITUDE": 47.6062, "LONGITUDE": -122.3321,
+        "MODEL_FILENAME": "model.onnx", "MODEL_LABEL_FILENAME": "labels.txt",
+        "INBOX_FOLDER": str(inbox_folder), "OUTBOX_FOLDER": str(Path(work_folder, "outbox")), "OUTBOX_FOLDER_CHIPS": "chips",
+        "DETECTION_THRESHOLD": 0.5, "IMG_CHIPPING_SCALE": 2, "IMG_CHIPPING_PADDING": 10, "NUM_OF_WORKERS": 1,
+        "WORK_JOURNAL_ENABLED": False, "RESULT_CACHE_ENABLED": False, "CHANGE_DETECTION_ENABLED": False,
+        "AUTOSCALE_ENABLED": False, "CPU_PARTITIONING_ENABLED": False, "MEMORY_GOVERNOR_ENABLED": False,
+        "MODEL_WARMUP_ENABLED": True, "CONFIG_RELOAD_INTERVAL": 0, "TELEMETRY_INTERVAL": 0,
+    }
+    config_path = inbox_folder / "app-config.json"
+    config_path.write_text(json.dumps(config, indent=2))
+    return config_path
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(func: Callable[[], object], iterations: int, warmup: int = 1) -> List[float]:
+    """
+    Runs func warmup times untimed, then returns the seconds each of iterations runs took
+    """
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def load_image_processor(config_path: Path):
+    """
+    Imports ImageProcessor and returns its class with a ConfigStore for the benchmark config, or None without spacefx
+    """
+    try:
+        from image_processor import ImageProcessor
+    except ImportError:
+        return None, None
+    from app_config import AppConfig
+    from config_store import ConfigStore
+    return ImageProcessor, ConfigStore(AppConfig(file_path=str(config_path)))
+
+
+def bare_image_processor(image_processor_class, config_store):
+    """
+    Returns an ImageProcessor with no workers, journal or stores, to call its per-image methods directly
+    """
+    processor = image_processor_class.__new__(image_processor_class)
+    processor.config_store = config_store
+    processor._image_config = threading.local()
+    processor.result_cache = None
+    processor.tile_store = None
+    processor.detection_index = None
+    processor.vessel_tracker = None
+    processor.memory_governor = None
+    processor.autoscaler = None
+    return processor
+
+
+def model_output(detections: int, seed: int = 0) -> dict:
+    """
+    Returns a model output in the ship detection model's layout with the given number of detections
+    """
+    rng = np.random.default_rng(seed)
+    top_left = rng.uniform(0.0, 0.9, (1, detections, 2)).astype(np.float32)
+    return {'detected_boxes': np.concatenate([top_left, top_left + 0.05], axis=2),
+            'detected_classes': rng.integers(0, len(LABELS), (1, detections)),
+            'detected_scores': rng.uniform(0.0, 1.0, (1, detections)).astype(np.float32)}
+
+
+def run_case(case: str, image_format: Optional[str], size: Optional[int], scene_path: Optional[Path], config_path: Path, iterations: int) -> dict:
+    """
+    Runs one case in this process
+
+    Returns:
+        dict: The case's result, with "skipped" set instead of timings if it could not run here.
+    """
+    from object_detection import ObjectDetection
+
+    result = {"case": case, "format": image_format, "size": size, "iterations": iterations, "unit": THROUGHPUT_UNITS[case]}
+    model_path = Path(config_path.parent, "model.onnx")
+    work_units = 1
+
+    if case == "decode":
+        from image_decoder import decode_image
+
+        megapixels = size * size / 1e6
+        durations = measure(lambda: decode_image(str(scene_path)), iterations)
+        result["megapixels_per_second"] = round(megapixels * len(durations) / sum(durations), 2)
+
+    elif case == "predict_image":
+        detector = ObjectDetection(model_path)
+        image = cv2.imread(str(scene_path))
+        durations = measure(lambda: detector.predict_image(image), iterations)
+
+    else:
+        image_processor_class, config_store = load_image_processor(config_path)
+        if image_processor_class is None:
+            result["skipped"] = "spacefx is not installed"
+            return result
+
+        if case == "pipeline":
+            durations = run_pipeline(image_processor_class, config_store, scene_path, iterations)
+        else:
+            processor = bare_image_processor(image_processor_class, config_store)
+            if case == "parse_predictions":
+                predictions = model_output(100)
+                durations = measure(lambda: processor.parse_predictions(LABELS, predictions), iterations)
+            elif case == "tiling":
+                detector = ObjectDetection(model_path)
+                image = cv2.imread(str(scene_path))
+                chip_size = MODEL_INPUT_SIZE * config_store.snapshot.IMG_CHIPPING_SCALE
+                work_units = len(range(0, size, chip_size)) ** 2
+                durations = measure(lambda: processor.run_ship_detection_large_image(detector, image, chip_size, chip_size), iterations)
+                result["tiles"] = work_units
+            elif case == "write_hitboxes":
+                from ship_detection import ShipDetection
+                image = cv2.imread(str(scene_path))
+                rng = np.random.default_rng(0)
+                detections = [ShipDetection(probability=0.9, x_coordinate=int(x), y_coordinate=int(y), width=40, height=16)
+                              for x, y in rng.integers(0, size - 64, (50, 2))]
+                work_units = len(detections)
+                durations = measure(lambda: [processor.write_hitboxes(image, detection, i) for i, detection in enumerate(detections, start=1)], iterations)
+            else:
+                raise ValueError(f"Unknown benchmark case '{case}'")
+
+    result["throughput_per_second"] = round(work_units * len(durations) / sum(durations), 3)
+    result["mean_ms"] = round(float(np.mean(durations)) * 1000, 3)
+    result["p50_ms"] = round(float(np.percentile(durations, 50)) * 1000, 3)
+    result["p99_ms"] = round(float(np.percentile(durations, 99)) * 1000, 3)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_pipeline(image_processor_class, config_store, scene_path: Path, iterations: int) -> List[float]:
+    """
+    Starts an ImageProcessor with one worker and times each scene from being queued to its products being written
+    """
+    from instrumentation import STAGE_TIMINGS
+
+    processor = image_processor_class(config_store)
+    processor.wait_until_ready()
+
+    def processed_images() -> int:
+        histogram = STAGE_TIMINGS.snapshot().get("image")
+        return histogram.count if histogram is not None else 0
+
+    def process_one():
+        expected = processed_images() + 1
+        image_processor_class.add_image_to_queue(str(scene_path))
+        while processed_images() < expected:
+            time.sleep(0.005)
+
+    return measure(process_one, iterations)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_FOLDER, check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """
+    Describes the machine and library versions the results were measured with
+    """
+    import onnxruntime
+    return {"commit": git_commit(), "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "opencv": cv2.__version__, "onnxruntime": onnxruntime.__version__}
+
+
+def planned_runs(cases: List[str], formats: List[str], sizes: List[int]) -> List[tuple]:
+    """
+    Returns the (case, format, size) combinations to run
+    """
+    runs = []
+    for case in cases:
+        if case in SCENE_INDEPENDENT_CASES:
+            runs.append((case, None, None))
+            continue
+        for image_format in (["jpeg"] if case in JPEG_ONLY_CASES else formats):
+            runs.extend((case, image_format, size) for size in sizes)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Scene widths and heights in pixels")
+    parser.add_argument("--full", action="store_true", help=f"Run every scene size from {FULL_SIZES[0]} to {FULL_SIZES[-1]}")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--scenes", help="Folder to keep generated scenes in between runs.  Defaults to a temporary folder")
+    parser.add_argument("--output", help="JSON file to write.  Defaults to benchmarks/results/<timestamp>-<commit>.json")
+    # Runs a single case in this process; used by the parent run
+    parser.add_argument("--run-case", nargs=4, metavar=("CASE", "FORMAT", "SIZE", "CONFIG"), help=argparse.SUPPRESS)
+    parser.add_argument("--scene", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        case, image_format, size, config_path = args.run_case
+        print(json.dumps(run_case(case, None if image_format == "-" else image_format, None if size == "-" else int(size),
+                                  Path(args.scene) if args.scene else None, Path(config_path), args.iterations)))
+        return
+
+    sizes = FULL_SIZES if args.full else args.sizes
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scenes_folder = Path(args.scenes or Path(temp_dir, "scenes"))
+        model_path = build_detection_model(Path(temp_dir, "benchmark_detector.onnx"), input_size=MODEL_INPUT_SIZE)
+        config_path = write_app_config(Path(temp_dir), model_path)
+
+        results = []
+        for case, image_format, size in planned_runs(args.cases, args.formats, sizes):
+            command = [sys.executable, __file__, "--iterations", str(args.iterations),
+                       "--run-case", case, image_format or "-", str(size) if size else "-", str(config_path)]
+            if size:
+                command += ["--scene", str(write_scene(scenes_folder, image_format, size))]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+
+            label = f"{case:>17} {image_format or '':>7} {size or '':>6}"
+            if "skipped" in result:
+                print(f"{label}: skipped, {result['skipped']}")
+            else:
+                print(f"{label}: {result['throughput_per_second']:10.3f} {result['unit']}/s  p50 {result['p50_ms']:10.3f} ms  "
+                      f"p99 {result['p99_ms']:10.3f} ms  peak RSS {result['peak_rss_mb']:8.1f} MB")
+
+    report = {"environment": environment(), "results": results}
+    output_path = Path(args.output) if args.output else \
+        Path(BENCHMARKS_FOLDER, "results", f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{report['environment']['commit'] or 'unknown'}.json")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Runs main.py end to end against an in-process spacefx stand-in and reports images per minute and sensor-to-output latency.
+
+In tasked mode (the default) the app tasks the sensor --images times through its TaskingScheduler and every accepted request
+is answered with a scene.  In push mode scenes are sent without being tasked for, as when the sensor service broadcasts data.
+Either way deliveries are released at --rate images per minute in bursts of --burst, or all at once with a rate of 0.
+
+Needs the PlanetaryComputer protos generated into .protos, as for the devcontainer; spacefx itself is not used.
+
+    python benchmarks/run_loadtest.py --images 20 --workers 2
+    python benchmarks/run_loadtest.py --mode push --images 60 --rate 30 --burst 10 --scene-size 4096 --output loadtest.json
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+APP_FOLDER = BENCHMARKS_FOLDER.parent
+sys.path.insert(0, str(APP_FOLDER / "src" / "app"))
+sys.path.insert(0, str(BENCHMARKS_FOLDER))
+sys.path.append(str(APP_FOLDER / ".protos" / "datagenerator" / "planetary_computer"))
+
+from onnx_models import build_detection_model
+from run_benchmarks import MODEL_INPUT_SIZE, environment, write_app_config
+from scenes import write_scene
+from spacefx_standin import DeliverySchedule, SpacefxStandIn
+
+
+def encode_earth_image_response(file_names):
+    """
+    Serializes the EarthImageResponse the PlanetaryComputer sensor sends for the given files
+    """
+    from PlanetaryComputer_pb2 import EarthImageResponse
+
+    response = EarthImageResponse()
+    for file_name in file_names:
+        image_file = response.imageFiles.add()
+        image_file.fileName = file_name
+        image_file.asset = "image"
+    return response.SerializeToString()
+
+
+def summarize(standin: SpacefxStandIn, started: float) -> dict:
+    """
+    Returns throughput and latency of the deliveries, and the pipeline's stage timings
+    """
+    from instrumentation import STAGE_TIMINGS
+
+    completed = [delivery for delivery in standin.deliveries if delivery.completed_at is not None]
+    latencies = [delivery.latency for delivery in completed]
+    summary = {"deliveries": len(standin.deliveries), "completed": len(completed)}
+    if completed:
+        first_sensor_data = min(delivery.sensor_data_at for delivery in standin.deliveries if delivery.sensor_data_at is not None)
+        elapsed = max(delivery.completed_at for delivery in completed) - first_sensor_data
+        summary.update({
+            "startup_to_first_sensor_data_seconds": round(first_sensor_data - started, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "images_per_minute": round(len(completed) * 60 / elapsed, 2) if elapsed > 0 else None,
+            "latency_p50_seconds": round(float(np.percentile(latencies, 50)), 3),
+            "latency_p90_seconds": round(float(np.percentile(latencies, 90)), 3),
+            "latency_p99_seconds": round(float(np.percentile(latencies, 99)), 3),
+            "latency_max_seconds": round(max(latencies), 3),
+        })
+    summary["stages"] = {stage: {"count": histogram.count,
+                                 "p50_ms": round(histogram.percentile(50) * 1000, 1),
+                                 "p99_ms": round(histogram.percentile(99) * 1000, 1)}
+                         for stage, histogram in sorted(STAGE_TIMINGS.snapshot().items())}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["tasked", "push"], default="tasked")
+    parser.add_argument("--images", type=int, default=20, help="Number of scenes to deliver")
+    parser.add_argument("--rate", type=float, default=0.0, help="Scenes released per minute.  0 releases them as soon as they are due")
+    parser.add_argument("--burst", type=int, default=1, help="Scenes released together")
+    parser.add_argument("--transfer-delay", type=float, default=0.0, help="Seconds between the SensorData and the scene arriving in the inbox")
+    parser.add_argument("--tasking-latency", type=float, default=0.0, help="Seconds each tasking call takes")
+    parser.add_argument("--scene-size", type=int, default=2048, help="Width and height of the delivered GeoTIFF in pixels")
+    parser.add_argument("--workers", type=int, default=2, help="NUM_OF_WORKERS")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="TASKING_MAX_IN_FLIGHT")
+    parser.add_argument("--model", help="ONNX model to run.  Defaults to a generated benchmark model")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for every scene to be processed")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    try:
+        import PlanetaryComputer_pb2  # noqa: F401
+    except ImportError:
+        sys.exit("PlanetaryComputer_pb2 was not found in .protos/datagenerator/planetary_computer.  Generate the protos as the devcontainer does first")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_folder = Path(temp_dir)
+        model_path = Path(args.model) if args.model else build_detection_model(work_folder / "benchmark_detector.onnx", input_size=MODEL_INPUT_SIZE)
+        config_path = write_app_config(work_folder, model_path)
+        config = json.loads(config_path.read_text())
+        config.update({"NUM_OF_WORKERS": args.workers, "TASKING_MAX_IN_FLIGHT": args.max_in_flight,
+                       "TASKING_PASSES": args.images if args.mode == "tasked" else 1})
+        config_path.write_text(json.dumps(config, indent=2))
+
+        standin = SpacefxStandIn(xfer_root=work_folder,
+                                 scene_path=write_scene(work_folder / "scenes", "geotiff", args.scene_size),
+                                 encode_payload=encode_earth_image_response,
+                                 schedule=DeliverySchedule(rate_per_minute=args.rate, burst_size=args.burst),
+                                 transfer_delay=args.transfer_delay,
+                                 tasking_latency=args.tasking_latency,
+                                 deliver_tasked=args.mode == "tasked")
+        standin.install()
+        if args.mode == "push":
+            standin.push(args.images)
+        standin.expect(args.images, timeout=args.timeout)
+        standin.watch_outbox()
+
+        # main.py loads the process-wide config with its default path; load it from the load test's inbox first
+        from config_store import ConfigStore
+        ConfigStore.shared(str(config_path))
+
+        started = time.monotonic()
+        import main as app_main
+        app_main.main()
+
+        summary = summarize(standin, started)
+
+    report = {"environment": environment(), "settings": vars(args), "results": summary}
+    print(json.dumps(report["results"], indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if summary["completed"] < args.images:
+        sys.exit(f"Only {summary['completed']} of {args.images} scenes were processed within {args.timeout}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Generates reproducible synthetic scenes: dark water with bright ship-sized rectangles
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Rows generated and written at a time, so 20k px GeoTIFFs never need the whole raster in memory
+BLOCK_ROWS = 1024
+
+# One ship per this many pixels, roughly a busy harbor approach at NAIP resolution
+PIXELS_PER_SHIP = 512 * 512
+
+
+def _scene_block(rng: np.random.Generator, width: int, rows: int) -> np.ndarray:
+    """
+    Returns a (rows, width, 3) RGB block of water with ships
+    """
+    block = np.empty((rows, width, 3), dtype=np.uint8)
+    block[..., 0] = rng.integers(10, 40, (rows, width), dtype=np.uint8)
+    block[..., 1] = rng.integers(30, 60, (rows, width), dtype=np.uint8)
+    block[..., 2] = rng.integers(50, 90, (rows, width), dtype=np.uint8)
+
+    for _ in range(max(1, rows * width // PIXELS_PER_SHIP)):
+        ship_width, ship_height = int(rng.integers(8, 40)), int(rng.integers(4, 12))
+        x, y = int(rng.integers(0, max(1, width - ship_width))), int(rng.integers(0, max(1, rows - ship_height)))
+        block[y:y + ship_height, x:x + ship_width] = 230
+    return block
+
+
+def write_geotiff(path: Path, size: int, seed: int = 0) -> Path:
+    """
+    Writes a size x size 3-band, tiled, deflate-compressed GeoTIFF in UTM zone 10N with 0.6 m pixels, like NAIP imagery
+    """
+    import rasterio
+    from rasterio.transform import from_origin
+    from rasterio.windows import Window
+
+    rng = np.random.default_rng(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with rasterio.open(path, 'w', driver='GTiff', width=size, height=size, count=3, dtype='uint8', crs='EPSG:26910',
+                       transform=from_origin(540000.0, 5236000.0, 0.6, 0.6), tiled=True, compress='deflate') as dataset:
+        for row in range(0, size, BLOCK_ROWS):
+            rows = min(BLOCK_ROWS, size - row)
+            dataset.write(_scene_block(rng, size, rows).transpose(2, 0, 1), window=Window(0, row, size, rows))
+    return path
+
+
+def write_jpeg(path: Path, size: int, seed: int = 0) -> Path:
+    """
+    Writes a size x size JPEG of the same kind of scene
+    """
+    rng = np.random.default_rng(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scene = np.concatenate([_scene_block(rng, size, min(BLOCK_ROWS, size - row)) for row in range(0, size, BLOCK_ROWS)])
+    cv2.imwrite(str(path), cv2.cvtColor(scene, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return path
+
+
+def write_scene(folder: Path, image_format: str, size: int, seed: int = 0) -> Path:
+    """
+    Writes a scene once per format, size and seed, reusing it on later calls
+    """
+    suffix = {'geotiff': '.tif', 'jpeg': '.jpg'}[image_format]
+    path = Path(folder, f"scene_{size}_{seed}{suffix}")
+    if path.is_file():
+        return path
+    writer = write_geotiff if image_format == 'geotiff' else write_jpeg
+    return writer(path, size, seed)
@@ -0,0 +1,326 @@
+"""
+In-process stand-in for the spacefx runtime, so main.py can run end to end without the runtime or the PlanetaryComputer data generator.
+
+Tasking requests are accepted and answered the way the PlanetaryComputer sensor answers them: a SensorData message with an
+EarthImageResponse is sent to the subscribed callback, then the scene is dropped into the inbox followed by its .linkResponse.
+Deliveries are released at a configurable rate and in bursts, and every delivery is timed from its SensorData to the
+augmented image appearing in the outbox.
+
+Only the parts of spacefx that main.py and image_processor.py use are provided.  Messages are plain objects with the
+protobuf field names main.py reads; the EarthImageResponse payload is encoded by the caller with the real generated protos.
+"""
+import itertools
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import types
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+class StatusCodes:
+    """
+    The spacefx status codes main.py checks
+    """
+    SUCCESSFUL = 1
+    PENDING = 2
+    REJECTED = 3
+
+
+@dataclass
+class ResponseHeader:
+    trackingId: str = ""
+    status: int = StatusCodes.SUCCESSFUL
+
+
+@dataclass
+class TaskingResponse:
+    responseHeader: ResponseHeader = field(default_factory=ResponseHeader)
+
+
+@dataclass
+class TaskingPreCheckResponse:
+    responseHeader: ResponseHeader = field(default_factory=ResponseHeader)
+
+
+@dataclass
+class SensorInfo:
+    sensorID: str = ""
+
+
+@dataclass
+class SensorsAvailableResponse:
+    responseHeader: ResponseHeader = field(default_factory=ResponseHeader)
+    sensors: List[SensorInfo] = field(default_factory=list)
+
+
+@dataclass
+class AnyPayload:
+    value: bytes = b""
+
+
+@dataclass
+class SensorData:
+    responseHeader: ResponseHeader = field(default_factory=ResponseHeader)
+    sensorID: str = ""
+    data: AnyPayload = field(default_factory=AnyPayload)
+
+
+@dataclass
+class Delivery:
+    """
+    One scene sent to the app, and when each step of its delivery happened
+    """
+
+    tracking_id: str
+    file_name: str
+    released_at: Optional[float] = None
+    sensor_data_at: Optional[float] = None
+    file_delivered_at: Optional[float] = None
+    completed_at: Optional[float] = None
+
+    @property
+    def latency(self) -> Optional[float]:
+        """
+        Seconds from the SensorData being sent to the augmented image being written, or None if it has not been
+        """
+        if self.sensor_data_at is None or self.completed_at is None:
+            return None
+        return self.completed_at - self.sensor_data_at
+
+
+class DeliverySchedule:
+    """
+    Releases deliveries in bursts of burst_size, with bursts spaced so the average rate is rate_per_minute.  A rate of 0 releases everything at once
+    """
+
+    def __init__(self, rate_per_minute: float = 0.0, burst_size: int = 1):
+        self.rate_per_minute = rate_per_minute
+        self.burst_size = max(1, burst_size)
+        self._lock = threading.Lock()
+        self._released = 0
+        self._started: Optional[float] = None
+
+    def next_release(self) -> float:
+        """
+        Returns the time.monotonic() at which the next delivery may be released
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            burst = self._released // self.burst_size
+            self._released += 1
+            if self.rate_per_minute <= 0:
+                return now
+            return max(now, self._started + burst * self.burst_size * 60.0 / self.rate_per_minute)
+
+
+class SpacefxStandIn:
+    """
+    Plays the spacefx runtime and the PlanetaryComputer sensor for a single app in this process
+    """
+
+    def __init__(self,
+                 xfer_root: Path,
+                 scene_path: Path,
+                 encode_payload: Callable[[List[str]], bytes],
+                 schedule: Optional[DeliverySchedule] = None,
+                 transfer_delay: float = 0.0,
+                 tasking_latency: float = 0.0,
+                 deliver_tasked: bool = True,
+                 sensor_id: str = "PlanetaryComputer",
+                 poll_interval: float = 0.05):
+        """
+        Args:
+            xfer_root (Path): Folder holding the app's inbox and outbox.
+            scene_path (Path): Scene delivered for every tasking request, linked into the inbox under a new name each time.
+            encode_payload (Callable): Returns the serialized EarthImageResponse for the given image file names.
+            schedule (DeliverySchedule, optional): When deliveries are released. Defaults to all at once.
+            transfer_delay (float, optional): Seconds between the SensorData and the scene arriving in the inbox. Defaults to 0.
+            tasking_latency (float, optional): Seconds each tasking and pre-check call blocks for. Defaults to 0.
+            deliver_tasked (bool, optional): Whether accepted tasking requests are answered with a delivery. Defaults to True.
+            sensor_id (str, optional): Sensor reported as available and sending the data. Defaults to "PlanetaryComputer".
+            poll_interval (float, optional): Seconds between checks of the outbox for finished images. Defaults to 0.05.
+        """
+        self.xfer_root = Path(xfer_root)
+        self.inbox = self.xfer_root / "inbox"
+        self.outbox = self.xfer_root / "outbox"
+        self.inbox.mkdir(parents=True, exist_ok=True)
+        self.outbox.mkdir(parents=True, exist_ok=True)
+        self.scene_path = Path(scene_path)
+        self.encode_payload = encode_payload
+        self.schedule = schedule or DeliverySchedule()
+        self.transfer_delay = transfer_delay
+        self.tasking_latency = tasking_latency
+        self.deliver_tasked = deliver_tasked
+        self.sensor_id = sensor_id
+        self.poll_interval = poll_interval
+
+        self.deliveries: List[Delivery] = []
+        self.telemetry: Dict[str, int] = {}
+        self._callbacks: List[Callable] = []
+        self._lock = threading.Lock()
+        self._file_numbers = itertools.count(1)
+        self._expected = 0
+        self._finished = threading.Event()
+        self._timeout: Optional[float] = None
+        self._deferred_pushes = 0
+
+    # spacefx.client
+
+    def build(self):
+        return self
+
+    def get_app_id(self) -> str:
+        return "shipdetector-onnx-loadtest"
+
+    def keep_app_open(self):
+        """
+        Blocks until every expected delivery has been processed, or the timeout set by expect() expires
+        """
+        self._finished.wait(self._timeout)
+
+    # spacefx.sensor
+
+    def get_available_sensors(self, response_timeout_seconds: int = 30) -> SensorsAvailableResponse:
+        return SensorsAvailableResponse(sensors=[SensorInfo(sensorID=self.sensor_id)])
+
+    def sensor_tasking_pre_check(self, sensor_id: str, request_data=None, metadata=None, response_timeout_seconds: int = 30) -> TaskingPreCheckResponse:
+        time.sleep(self.tasking_latency)
+        return TaskingPreCheckResponse(ResponseHeader(trackingId=str(uuid.uuid4())))
+
+    def sensor_tasking(self, sensor_id: str, request_data=None, metadata=None, response_timeout_seconds: int = 30) -> TaskingResponse:
+        """
+        Accepts the request and schedules its delivery
+        """
+        time.sleep(self.tasking_latency)
+        if sensor_id != self.sensor_id:
+            return TaskingResponse(ResponseHeader(status=StatusCodes.REJECTED))
+        tracking_id = self._schedule_delivery().tracking_id if self.deliver_tasked else str(uuid.uuid4())
+        return TaskingResponse(ResponseHeader(trackingId=tracking_id, status=StatusCodes.SUCCESSFUL))
+
+    def subscribe_to_sensor_data(self, callback_function: Callable):
+        self._callbacks.append(callback_function)
+        deferred_pushes, self._deferred_pushes = self._deferred_pushes, 0
+        self.push(deferred_pushes)
+
+    # spacefx.link
+
+    def get_xfer_directories(self) -> Dict[str, str]:
+        return {"inbox": str(self.inbox), "outbox": str(self.outbox), "root": str(self.xfer_root)}
+
+    # spacefx.logging
+
+    def send_telemetry(self, metric_name: str, metric_value: int, *args, **kwargs):
+        with self._lock:
+            self.telemetry[metric_name] = metric_value
+
+    # Load generation
+
+    def expect(self, deliveries: int, timeout: Optional[float] = None):
+        """
+        Sets how many deliveries keep_app_open waits for, and for how long at most
+        """
+        self._expected = deliveries
+        self._timeout = timeout
+
+    def push(self, count: int):
+        """
+        Schedules deliveries nobody tasked for, as the sensor service does when it broadcasts data to subscribers.
+        Pushed before the app subscribes, they are held until it does
+        """
+        if not self._callbacks:
+            self._deferred_pushes += count
+            return
+        for _ in range(count):
+            self._schedule_delivery()
+
+    def _schedule_delivery(self) -> Delivery:
+        number = next(self._file_numbers)
+        delivery = Delivery(tracking_id=str(uuid.uuid4()), file_name=f"loadtest_{number:05d}{self.scene_path.suffix}")
+        with self._lock:
+            self.deliveries.append(delivery)
+        delay = max(0.0, self.schedule.next_release() - time.monotonic())
+        threading.Timer(delay, self._deliver, args=(delivery,)).start()
+        return delivery
+
+    def _deliver(self, delivery: Delivery):
+        """
+        Sends the SensorData, then transfers the scene and its .linkResponse after the transfer delay
+        """
+        delivery.released_at = time.monotonic()
+        sensor_data = SensorData(responseHeader=ResponseHeader(trackingId=delivery.tracking_id), sensorID=self.sensor_id,
+                                 data=AnyPayload(self.encode_payload([delivery.file_name])))
+        delivery.sensor_data_at = time.monotonic()
+        for callback in self._callbacks:
+            callback(sensor_data)
+
+        time.sleep(self.transfer_delay)
+        destination = self.inbox / delivery.file_name
+        try:
+            os.link(self.scene_path, destination)
+        except OSError:
+            shutil.copyfile(self.scene_path, destination)
+        Path(f"{destination}.linkResponse").touch()
+        delivery.file_delivered_at = time.monotonic()
+
+    def output_path(self, delivery: Delivery) -> Path:
+        """
+        The last product the app writes for a delivery
+        """
+        return self.outbox / delivery.tracking_id / f"{Path(delivery.file_name).stem}_augmented.jpg"
+
+    def watch_outbox(self):
+        """
+        Starts a thread that timestamps each delivery when its augmented image is written
+        """
+        def poll():
+            while not self._finished.is_set():
+                with self._lock:
+                    pending = [delivery for delivery in self.deliveries if delivery.completed_at is None]
+                    completed = len(self.deliveries) - len(pending)
+                for delivery in pending:
+                    if delivery.sensor_data_at is not None and self.output_path(delivery).is_file():
+                        delivery.completed_at = time.monotonic()
+                        completed += 1
+                if self._expected and completed >= self._expected:
+                    self._finished.set()
+                time.sleep(self.poll_interval)
+
+        threading.Thread(target=poll, daemon=True).start()
+
+    def install(self):
+        """
+        Registers this stand-in as the spacefx package, so later imports of spacefx and its protos resolve to it
+        """
+        modules = {
+            "spacefx": types.ModuleType("spacefx"),
+            "spacefx.protos": types.ModuleType("spacefx.protos"),
+            "spacefx.protos.common": types.ModuleType("spacefx.protos.common"),
+            "spacefx.protos.common.Common_pb2": types.ModuleType("spacefx.protos.common.Common_pb2"),
+            "spacefx.protos.sensor": types.ModuleType("spacefx.protos.sensor"),
+            "spacefx.protos.sensor.Sensor_pb2": types.ModuleType("spacefx.protos.sensor.Sensor_pb2"),
+        }
+        spacefx = modules["spacefx"]
+        spacefx.client = types.SimpleNamespace(build=self.build, get_app_id=self.get_app_id, keep_app_open=self.keep_app_open)
+        spacefx.sensor = types.SimpleNamespace(get_available_sensors=self.get_available_sensors,
+                                               sensor_tasking_pre_check=self.sensor_tasking_pre_check,
+                                               sensor_tasking=self.sensor_tasking,
+                                               subscribe_to_sensor_data=self.subscribe_to_sensor_data)
+        spacefx.link = types.SimpleNamespace(get_xfer_directories=self.get_xfer_directories)
+        spacefx.logging = types.SimpleNamespace(send_telemetry=self.send_telemetry)
+        spacefx.logger = lambda level=logging.INFO: logging.getLogger("shipdetector-onnx")
+        spacefx.protos = modules["spacefx.protos"]
+        modules["spacefx.protos"].common = modules["spacefx.protos.common"]
+        modules["spacefx.protos"].sensor = modules["spacefx.protos.sensor"]
+        modules["spacefx.protos.common"].Common_pb2 = modules["spacefx.protos.common.Common_pb2"]
+        modules["spacefx.protos.sensor"].Sensor_pb2 = modules["spacefx.protos.sensor.Sensor_pb2"]
+        modules["spacefx.protos.common.Common_pb2"].StatusCodes = StatusCodes
+        modules["spacefx.protos.sensor.Sensor_pb2"].SensorData = SensorData
+        sys.modules.update(modules)
@@ -0,0 +1,145 @@
+"""
+Areas of interest, e.g. ports, shipping lanes and coastline buffers, that limit the chips of a scene that are inferred
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import rasterio.features
+import rasterio.warp
+from affine import Affine
+
+from georeference import WGS84, GeoReference
+
+POLYGON_TYPES = ('Polygon', 'MultiPolygon')
+
+# Priority of polygons whose GeoJSON Feature has no "priority" property
+DEFAULT_PRIORITY = 1.0
+
+
+def parse_features(value, priority: float = DEFAULT_PRIORITY) -> List[Tuple[dict, float]]:
+    """
+    Returns the polygons of a GeoJSON FeatureCollection, Feature or geometry, or of a list of them, each with the "priority"
+    property of its Feature.  A list of [longitude, latitude] points is read as the outer ring of one polygon.  Tuples are
+    read as lists, as in frozen config snapshots
+
+    Raises:
+        ValueError: If the value holds anything but polygons.
+    """
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(point, (list, tuple)) and len(point) == 2 and not isinstance(point[0], (list, tuple)) for point in value):
+            return [({'type': 'Polygon', 'coordinates': [[[float(x), float(y)] for x, y in value]]}, priority)]
+        return [feature for item in value for feature in parse_features(item, priority)]
+    if not isinstance(value, dict):
+        raise ValueError(f"Not a GeoJSON object: {value!r}")
+    if value.get('type') == 'FeatureCollection':
+        return parse_features(value.get('features', []), priority)
+    if value.get('type') == 'Feature':
+        properties = value.get('properties') or {}
+        return parse_features(value.get('geometry'), float(properties.get('priority', priority)))
+    if value.get('type') in POLYGON_TYPES:
+        return [(value, priority)]
+    raise ValueError(f"Areas of interest must be polygons, not {value.get('type')}")
+
+
+def parse_geometries(value) -> List[dict]:
+    """
+    Returns the polygons of a GeoJSON FeatureCollection, Feature or geometry, or of a list of them, see parse_features
+    """
+    return [geometry for geometry, _ in parse_features(value)]
+
+
+class AreaOfInterest:
+    """
+    Polygons in WGS84 longitude and latitude, each with a priority, intersected with the chip grid of each scene
+    """
+
+    def __init__(self, geometries: List[dict], priorities: Optional[List[float]] = None):
+        """
+        Args:
+            geometries (List[dict]): GeoJSON Polygon and MultiPolygon geometries in WGS84.
+            priorities (List[float], optional): Priority of each geometry, above 0. Defaults to DEFAULT_PRIORITY for every geometry.
+        """
+        self.geometries = geometries
+        self.priorities = priorities if priorities is not None else [DEFAULT_PRIORITY] * len(geometries)
+        self.fingerprint = hashlib.sha256(json.dumps(geometries, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    def tile_priorities(self, georeference: GeoReference, image_width: int, image_height: int, chip_width: int, chip_height: int) -> np.ndarray:
+        """
+        Returns the highest priority of the polygons each chip of an image touches, 0 where it touches none, as a (rows, columns)
+        array of its chip grid.  The polygons are rasterized straight onto the chip grid, one cell per chip, so the cost does not
+        grow with the image's resolution
+        """
+        rows, columns = -(-image_height // chip_height), -(-image_width // chip_width)
+        # Later shapes overwrite earlier ones, so the highest priorities are burned in last
+        shapes = sorted(((rasterio.warp.transform_geom(WGS84, georeference.crs, geometry), priority)
+                         for geometry, priority in zip(self.geometries, self.priorities)), key=lambda shape: shape[1])
+        return rasterio.features.rasterize(shapes, out_shape=(rows, columns), fill=0, all_touched=True,
+                                           transform=georeference.transform * Affine.scale(chip_width, chip_height), dtype='float32')
+
+    def tile_mask(self, georeference: GeoReference, image_width: int, image_height: int, chip_width: int, chip_height: int) -> np.ndarray:
+        """
+        Returns which chips of an image the polygons touch, as a (rows, columns) boolean array of its chip grid
+        """
+        return self.tile_priorities(georeference, image_width, image_height, chip_width, chip_height) > 0
+
+
+class AoiSource:
+    """
+    The current area of interest, from the polygons in the config and a GeoJSON file in the inbox.  The file is read again
+    when it changes, so an area of interest can be uplinked without a restart
+    """
+
+    def __init__(self, on_error: Optional[Callable[[str, Exception], None]] = None):
+        """
+        Args:
+            on_error (Callable, optional): Called with the source and the error when polygons cannot be read; the last good area of interest is kept.
+        """
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple] = None
+        self._area: Optional[AreaOfInterest] = None
+
+    def get(self, polygons: list, path: str) -> Optional[AreaOfInterest]:
+        """
+        Returns the area of interest of the config polygons and the GeoJSON file together, or None if there are no polygons
+
+        Args:
+            polygons (list): Polygons from the config, in any form parse_geometries reads.
+            path (str): GeoJSON file of polygons, which need not exist.
+        """
+        try:
+            modified = os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            modified = None
+        key = (json.dumps(polygons, sort_keys=True), path, modified)
+
+        with self._lock:
+            if key == self._key:
+                return self._area
+            # Bad polygons are reported once, not for every image until they are fixed
+            self._key = key
+
+            try:
+                features = parse_features(polygons or [])
+            except ValueError as error:
+                self._report("config", error)
+                return self._area
+
+            if modified is not None:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        features += parse_features(json.load(f))
+                except (OSError, ValueError) as error:
+                    self._report(path, error)
+                    return self._area
+
+            self._area = AreaOfInterest([geometry for geometry, _ in features], [priority for _, priority in features]) if features else None
+            return self._area
+
+    def _report(self, source: str, error: Exception):
+        if self.on_error is not None:
+            self.on_error(source, error)
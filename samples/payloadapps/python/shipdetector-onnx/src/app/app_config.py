@@ -3,11 +3,52 @@ Strong type the app config
 """
 import os
 import glob
-from dataclasses import dataclass, field
+from dataclasses import MISSING, FrozenInstanceError, dataclass, field, fields
 import json
 from typing import List
 import time
 
+def parse_bool(key: str, value) -> bool:
+    """
+    Reads a boolean setting from JSON true/false, 0/1 or the strings "true"/"false", "yes"/"no", "on"/"off" and "1"/"0"
+
+    Raises:
+        ValueError: For any other value, rather than treating it as truthy.
+    """
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        if value.strip().lower() in ('true', 'yes', 'on', '1'):
+            return True
+        if value.strip().lower() in ('false', 'no', 'off', '0'):
+            return False
+    raise ValueError(f"{key} must be true or false, not {value!r}")
+
+
+class _ReadOnlyDict(dict):
+    """
+    A dict, e.g. a GeoJSON object in AOI_POLYGONS, that cannot be changed once its AppConfig is frozen
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("cannot modify a setting of a frozen AppConfig")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+def _freeze_value(value):
+    """
+    Returns the value with its lists, at any depth, turned into tuples and its dicts made read-only
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    if isinstance(value, dict):
+        return _ReadOnlyDict((key, _freeze_value(item)) for key, item in value.items())
+    return value
+
+
 @dataclass
 class AppConfig:
     """
@@ -74,15 +115,376 @@ class AppConfig:
     Detection labels
     """
 
+    IMAGE_DECODE_SCALE: float = 1.0
+    """
+    Fraction of the full resolution images are decoded and processed at, for quicklooks and coarse passes.  Below 1, GeoTIFFs
+    are read from their internal overviews where they have them instead of decoding every full-resolution pixel
+    """
+
+    MODEL_TARGET_GSD: float = 0.0
+    """
+    Ground sample distance in meters per pixel the model was trained at.  When set, GeoTIFFs are chipped so each chip covers the
+    ground of the model's input at this GSD instead of by IMG_CHIPPING_SCALE.  0 always uses IMG_CHIPPING_SCALE
+    """
+
+    AOI_POLYGONS: List = field(default_factory=list)
+    """
+    Areas of interest, e.g. ports, shipping lanes and coastline buffers, as GeoJSON polygons or lists of [longitude, latitude] points.
+    With any areas of interest, only the chips of a GeoTIFF that touch them are inferred
+    """
+
+    AOI_FILENAME: str = "aoi.geojson"
+    """
+    GeoJSON file of areas of interest in INBOX_FOLDER, used together with AOI_POLYGONS and read again whenever it changes
+    """
+
+    IMAGE_TIME_BUDGET_SECONDS: float = 0.0
+    """
+    Seconds each image may take to process before its detections are written.  The chips likeliest to hold ships (water, earlier
+    detections, higher priority areas of interest) are inferred first, and an image that runs out of time is written with the
+    detections so far and a coverage report.  0 processes every chip
+    """
+
+    IMAGE_TIME_BUDGET_REQUEUE: bool = True
+    """
+    Re-queue images that ran out of their time budget, to infer their remaining chips when no new image is waiting
+    """
+
+    STATE_FOLDER: str = ""
+    """
+    Folder for state that must survive a pod restart.  Defaults to a 'state' folder next to OUTBOX_FOLDER
+    """
+
+    WORK_JOURNAL_ENABLED: bool = True
+    """
+    Journal queued images and completed tiles so a restart only costs the remaining tiles
+    """
+
+    WORK_JOURNAL_FSYNC_BATCH_SIZE: int = 32
+    """
+    Number of completed tiles written to the work journal between fsyncs
+    """
+
+    WORK_JOURNAL_FSYNC_INTERVAL: float = 1.0
+    """
+    Maximum number of seconds a completed tile waits to be fsync'd to the work journal
+    """
+
+    WORK_JOURNAL_COMPACT_MB: int = 1
+    """
+    Size of the work journal, in MiB, past which it is rewritten with only the pending work when an image finishes
+    """
+
+    RESULT_CACHE_ENABLED: bool = True
+    """
+    Reuse the detections of a scene that was already processed with the same model, threshold and chipping
+    """
+
+    RESULT_CACHE_MAX_ENTRIES: int = 10000
+    """
+    Maximum number of scenes kept in the result cache before the least recently used are evicted
+    """
+
+    RESULT_CACHE_MAX_MB: int = 64
+    """
+    Maximum size of the result cache on disk, in MiB
+    """
+
+    CHANGE_DETECTION_ENABLED: bool = False
+    """
+    Only re-infer the chips of a GeoTIFF that changed since the last capture of the same location
+    """
+
+    CHANGE_DETECTION_THRESHOLD: float = 4.0
+    """
+    Absolute difference (0-255) of any one cell of a chip's fingerprints above which the chip counts as changed
+    """
+
+    CHANGE_DETECTION_SAVE_INTERVAL: float = 60.0
+    """
+    Minimum seconds between writes of the change detection tile store to STATE_FOLDER.  Chips recorded since the last write
+    are re-inferred on their next capture after a restart
+    """
+
+    DETECTION_INDEX_ENABLED: bool = False
+    """
+    Record the longitude, latitude and capture time of every detection in a GeoTIFF in an SQLite spatial index in STATE_FOLDER,
+    so ships near a point in recent passes can be looked up without reprocessing imagery
+    """
+
+    DETECTION_INDEX_RETENTION_DAYS: float = 30.0
+    """
+    Passes captured longer ago than this are removed from the detection index at startup.  0 keeps every pass
+    """
+
+    VESSEL_TRACKING_ENABLED: bool = False
+    """
+    Associate the detections of each GeoTIFF with vessel tracks kept in STATE_FOLDER across captures, and only write chips of
+    new and moved vessels.  Each image gets a _tracks.json listing its new, moved and lost vessels
+    """
+
+    TRACK_GATE_METERS: float = 300.0
+    """
+    Furthest a detection can be from a vessel's last position to continue its track
+    """
+
+    TRACK_MAX_SPEED: float = 0.0
+    """
+    Meters per second the track gate widens by for the time since the vessel was last seen
+    """
+
+    TRACK_MAX_GATE_METERS: float = 5000.0
+    """
+    Widest the track gate grows to with TRACK_MAX_SPEED, however long a vessel has gone unseen
+    """
+
+    TRACK_MOVED_METERS: float = 50.0
+    """
+    Distance beyond which a tracked vessel counts as moved, and its chip is written again
+    """
+
+    TRACK_MAX_MISSES: int = 3
+    """
+    Captures in a row a vessel can be missing from before its track is lost
+    """
+
+    TASKING_TARGETS: List[List[float]] = field(default_factory=list)
+    """
+    [latitude, longitude] pairs to task in order.  Defaults to the single LATITUDE/LONGITUDE target
+    """
+
+    TASKING_PASSES: int = 1
+    """
+    Number of times to task the list of targets.  0 keeps tasking them continuously
+    """
+
+    TASKING_MAX_IN_FLIGHT: int = 2
+    """
+    Maximum number of tasking requests waiting on sensor data at once
+    """
+
+    TASKING_MAX_QUEUE_DEPTH: int = 10
+    """
+    Number of images waiting to be processed at which new tasking requests are held back
+    """
+
+    TASKING_TIMEOUT: float = 600.0
+    """
+    Seconds after which a tasking request that never delivered sensor data stops counting as in flight
+    """
+
+    CONFIG_RELOAD_INTERVAL: float = 5.0
+    """
+    Seconds between checks of app-config.json for changes, which are applied to the following images without a restart.  0 disables reloading
+    """
+
+    TELEMETRY_INTERVAL: float = 60.0
+    """
+    Seconds between publishes of the per-stage latency telemetry.  0 disables publishing
+    """
+
+    METRICS_PORT: int = 0
+    """
+    Port of the HTTP /metrics endpoint serving the pipeline's metrics in the Prometheus text format.  0 disables the endpoint
+    """
+
+    MODEL_WARMUP_ENABLED: bool = True
+    """
+    Runs a blank frame through each worker's model at startup so the first image does not pay for onnxruntime's lazy initialization
+    """
+
+    CPU_PARTITIONING_ENABLED: bool = False
+    """
+    Gives each image processing worker its own CPUs, sizing its inference and OpenCV thread pools to match instead of one thread per core
+    """
+
+    MEMORY_GOVERNOR_ENABLED: bool = True
+    """
+    Holds images back until their decoded size fits the memory budget instead of decoding them all at once
+    """
+
+    MEMORY_BUDGET_MB: int = 0
+    """
+    Megabytes of decoded images processed at once.  0 derives the budget from the container's memory limit
+    """
+
+    MEMORY_BUDGET_FRACTION: float = 0.5
+    """
+    Fraction of the container memory left after startup used as the budget when MEMORY_BUDGET_MB is 0
+    """
+
+    AUTOSCALE_ENABLED: bool = False
+    """
+    Adds and retires image processing workers to match the queue, starting from NUM_OF_WORKERS
+    """
+
+    AUTOSCALE_MIN_WORKERS: int = 1
+    """
+    Fewest image processing workers kept running while autoscaling
+    """
+
+    AUTOSCALE_MAX_WORKERS: int = 0
+    """
+    Most image processing workers run while autoscaling.  0 uses the container's CPU quota
+    """
+
+    AUTOSCALE_INTERVAL: float = 5.0
+    """
+    Seconds between autoscaling decisions
+    """
+
+    AUTOSCALE_TARGET_WAIT: float = 10.0
+    """
+    Seconds an image may wait in the queue before another worker is added
+    """
+
+    AUTOSCALE_MEMORY_HEADROOM: float = 0.85
+    """
+    Fraction of the container's memory limit the workers may grow into
+    """
+
+    AUTOSCALE_SCALE_DOWN_COOLDOWN: float = 60.0
+    """
+    Seconds the queue must stay empty with a worker idle before a worker is retired
+    """
+
+    LOG_BATCH_SIZE: int = 50
+    """
+    Log records sent to the logging service together in one batch.  0 sends every record on its own
+    """
+
+    LOG_FLUSH_INTERVAL: float = 2.0
+    """
+    Longest a log record waits for its batch, in seconds.  Warnings and errors are sent straight away
+    """
+
+    LOG_MAX_RECORDS_PER_MINUTE: int = 120
+    """
+    Log records allowed from each logging call per minute; the rest are dropped and counted.  0 disables the limit
+    """
+
+    LOG_SAMPLED_DETECTIONS: int = 5
+    """
+    Highest-probability detections listed in each image's summary log line
+    """
+
+    SLO_LATENCY_SECONDS: float = 0.0
+    """
+    End-to-end latency SLO in seconds, from the SensorData being received to an image's products being written.  A warning is logged
+    when SLO_PERCENTILE of the images in the last SLO_WINDOW_SECONDS take longer.  0 disables the alert; latencies are still tracked
+    """
+
+    SLO_PERCENTILE: float = 95.0
+    """
+    Percentile of the end-to-end latencies compared to SLO_LATENCY_SECONDS
+    """
+
+    SLO_WINDOW_SECONDS: float = 900.0
+    """
+    Seconds of processed images covered by the rolling latency and throughput statistics
+    """
+
+    PROFILING_IMAGES: int = 0
+    """
+    Profiles the next this many images, writing the profiles to a 'profiles' folder in OUTBOX_FOLDER.  Raising it on a running app starts another run
+    """
+
     TYPE_MAPPING = {
         'IMG_CHIPPING_PADDING': float,
         'LATITUDE': float,
         'LONGITUDE': float,
         'DETECTION_THRESHOLD': float,
         'IMG_CHIPPING_SCALE': int,
+        'IMAGE_DECODE_SCALE': float,
+        'MODEL_TARGET_GSD': float,
+        'IMAGE_TIME_BUDGET_SECONDS': float,
         'NUM_OF_WORKERS': int,
+        'WORK_JOURNAL_FSYNC_BATCH_SIZE': int,
+        'WORK_JOURNAL_FSYNC_INTERVAL': float,
+        'WORK_JOURNAL_COMPACT_MB': int,
+        'RESULT_CACHE_MAX_ENTRIES': int,
+        'RESULT_CACHE_MAX_MB': int,
+        'CHANGE_DETECTION_THRESHOLD': float,
+        'CHANGE_DETECTION_SAVE_INTERVAL': float,
+        'DETECTION_INDEX_RETENTION_DAYS': float,
+        'TRACK_GATE_METERS': float,
+        'TRACK_MAX_SPEED': float,
+        'TRACK_MAX_GATE_METERS': float,
+        'TRACK_MOVED_METERS': float,
+        'TRACK_MAX_MISSES': int,
+        'TASKING_PASSES': int,
+        'TASKING_MAX_IN_FLIGHT': int,
+        'TASKING_MAX_QUEUE_DEPTH': int,
+        'TASKING_TIMEOUT': float,
+        'MEMORY_BUDGET_MB': int,
+        'MEMORY_BUDGET_FRACTION': float,
+        'AUTOSCALE_MIN_WORKERS': int,
+        'AUTOSCALE_MAX_WORKERS': int,
+        'AUTOSCALE_INTERVAL': float,
+        'AUTOSCALE_TARGET_WAIT': float,
+        'AUTOSCALE_MEMORY_HEADROOM': float,
+        'AUTOSCALE_SCALE_DOWN_COOLDOWN': float,
+        'CONFIG_RELOAD_INTERVAL': float,
+        'TELEMETRY_INTERVAL': float,
+        'METRICS_PORT': int,
+        'PROFILING_IMAGES': int,
+        'LOG_BATCH_SIZE': int,
+        'LOG_FLUSH_INTERVAL': float,
+        'LOG_MAX_RECORDS_PER_MINUTE': int,
+        'LOG_SAMPLED_DETECTIONS': int,
+        'SLO_LATENCY_SECONDS': float,
+        'SLO_PERCENTILE': float,
+        'SLO_WINDOW_SECONDS': float,
+    }
+
+    # Inclusive (minimum, maximum) of numeric settings, None for no bound.  A file with a value outside its range is rejected
+    VALUE_RANGES = {
+        'LATITUDE': (-90, 90),
+        'LONGITUDE': (-180, 180),
+        'DETECTION_THRESHOLD': (0, 1),
+        'IMG_CHIPPING_SCALE': (1, None),
+        'NUM_OF_WORKERS': (1, None),
+        'IMAGE_DECODE_SCALE': (None, 1),
+        'MODEL_TARGET_GSD': (0, None),
+        'IMAGE_TIME_BUDGET_SECONDS': (0, None),
+        'WORK_JOURNAL_FSYNC_BATCH_SIZE': (1, None),
+        'WORK_JOURNAL_FSYNC_INTERVAL': (0, None),
+        'WORK_JOURNAL_COMPACT_MB': (0, None),
+        'RESULT_CACHE_MAX_ENTRIES': (1, None),
+        'RESULT_CACHE_MAX_MB': (1, None),
+        'CHANGE_DETECTION_THRESHOLD': (0, 255),
+        'CHANGE_DETECTION_SAVE_INTERVAL': (0, None),
+        'DETECTION_INDEX_RETENTION_DAYS': (0, None),
+        'TRACK_MAX_SPEED': (0, None),
+        'TRACK_MOVED_METERS': (0, None),
+        'TRACK_MAX_MISSES': (1, None),
+        'TASKING_PASSES': (0, None),
+        'TASKING_MAX_IN_FLIGHT': (1, None),
+        'TASKING_MAX_QUEUE_DEPTH': (1, None),
+        'CONFIG_RELOAD_INTERVAL': (0, None),
+        'TELEMETRY_INTERVAL': (0, None),
+        'METRICS_PORT': (0, 65535),
+        'MEMORY_BUDGET_MB': (0, None),
+        'MEMORY_BUDGET_FRACTION': (None, 1),
+        'AUTOSCALE_MIN_WORKERS': (1, None),
+        'AUTOSCALE_MAX_WORKERS': (0, None),
+        'AUTOSCALE_TARGET_WAIT': (0, None),
+        'AUTOSCALE_MEMORY_HEADROOM': (None, 1),
+        'AUTOSCALE_SCALE_DOWN_COOLDOWN': (0, None),
+        'LOG_BATCH_SIZE': (0, None),
+        'LOG_MAX_RECORDS_PER_MINUTE': (0, None),
+        'LOG_SAMPLED_DETECTIONS': (0, None),
+        'SLO_LATENCY_SECONDS': (0, None),
+        'SLO_PERCENTILE': (None, 100),
+        'PROFILING_IMAGES': (0, None),
     }
 
+    # Numeric settings that must be above 0, in addition to their range
+    POSITIVE_KEYS = [
+        'IMAGE_DECODE_SCALE', 'TRACK_GATE_METERS', 'TRACK_MAX_GATE_METERS', 'TASKING_TIMEOUT', 'MEMORY_BUDGET_FRACTION', 'AUTOSCALE_INTERVAL',
+        'AUTOSCALE_MEMORY_HEADROOM', 'LOG_FLUSH_INTERVAL', 'SLO_PERCENTILE', 'SLO_WINDOW_SECONDS',
+    ]
+
     def __init__(self, file_path='/var/spacedev/xfer/app-python-shipdetector-onnx/inbox/app-config.json'):
         """
         Initializes the AppConfig object by loading the configuration from a JSON file.
@@ -122,13 +524,47 @@ class AppConfig:
         check_file_exists(file_path)
         with open(file_path, 'r') as f:
             data = json.load(f)
+
+        missing_keys = [config_field.name for config_field in fields(self)
+                        if config_field.default is MISSING and config_field.default_factory is MISSING and config_field.name not in data]
+        if missing_keys:
+            raise KeyError(f"{file_path} is missing required keys: {', '.join(missing_keys)}")
+
+        # A mistyped key would otherwise be ignored without a word, leaving the setting it meant at its default
+        known_keys = {config_field.name for config_field in fields(self)}
+        unknown_keys = sorted(key for key in data if key not in known_keys)
+        if unknown_keys:
+            raise ValueError(f"{file_path} has unknown keys: {', '.join(unknown_keys)}")
+
+        # A dataclass's own __init__ would set these, but this one does not; list defaults need a fresh list per instance
+        for config_field in fields(self):
+            if config_field.default_factory is not MISSING:
+                setattr(self, config_field.name, config_field.default_factory())
+
+        bool_keys = {config_field.name for config_field in fields(self) if config_field.type is bool}
         for key, value in data.items():
             expected_type = self.TYPE_MAPPING.get(key)
-            if expected_type:
+            if key in bool_keys:
+                setattr(self, key, parse_bool(key, value))
+            elif expected_type:
                 setattr(self, key, expected_type(value))
             else:
                 setattr(self, key, value)
 
+        # Written so NaN fails the checks too
+        for key, (minimum, maximum) in self.VALUE_RANGES.items():
+            value = getattr(self, key, None)
+            if value is None:
+                continue
+            if minimum is not None and not value >= minimum:
+                raise ValueError(f"{file_path}: {key} must be at least {minimum}, not {value}")
+            if maximum is not None and not value <= maximum:
+                raise ValueError(f"{file_path}: {key} must be at most {maximum}, not {value}")
+        for key in self.POSITIVE_KEYS:
+            value = getattr(self, key, None)
+            if value is not None and not value > 0:
+                raise ValueError(f"{file_path}: {key} must be above 0, not {value}")
+
         check_file_exists(os.path.join(self.INBOX_FOLDER, self.MODEL_LABEL_FILENAME))
         check_file_exists(os.path.join(self.INBOX_FOLDER, self.MODEL_FILENAME))
 
@@ -136,4 +572,21 @@ class AppConfig:
             self.DETECTION_LABELS = [l.strip() for l in f.readlines()]
 
         ensure_dir_exists(os.path.join(self.OUTBOX_FOLDER, self.OUTBOX_FOLDER_CHIPS))
-        ensure_dir_exists(self.OUTBOX_FOLDER)
\ No newline at end of file
+        ensure_dir_exists(self.OUTBOX_FOLDER)
+
+        if not self.STATE_FOLDER:
+            self.STATE_FOLDER = os.path.join(os.path.dirname(os.path.normpath(self.OUTBOX_FOLDER)), "state")
+
+    def __setattr__(self, key, value):
+        if getattr(self, '_frozen', False):
+            raise FrozenInstanceError(f"cannot assign to field '{key}' of a frozen AppConfig")
+        super().__setattr__(key, value)
+
+    def freeze(self):
+        """
+        Makes the config read-only, with lists turned into tuples and dicts made read-only at any depth, so it can be shared
+        between threads as a snapshot
+        """
+        for key, value in list(vars(self).items()):
+            super().__setattr__(key, _freeze_value(value))
+        super().__setattr__('_frozen', True)
@@ -0,0 +1,94 @@
+"""
+asyncio core of the payload app
+"""
+import asyncio
+import concurrent.futures
+import functools
+import os
+from typing import Any, Awaitable, Callable, Optional, Set
+
+
+class AppCore:
+    """
+    Owns the app's event loop.  Blocking spacefx calls are pushed onto a bounded executor,
+    file transfers are awaited on the loop without holding a thread, and CPU-bound work
+    stays with the ImageProcessor worker pool.
+    """
+
+    def __init__(self, max_blocking_calls: int = 32, file_poll_interval: float = 1.0):
+        """
+        Args:
+            max_blocking_calls (int, optional): Maximum number of blocking spacefx calls (tasking, sensor queries) allowed in flight at once. Defaults to 32.
+            file_poll_interval (float, optional): Seconds between checks while waiting for a file to arrive. Defaults to 1.0.
+        """
+        self.max_blocking_calls = max_blocking_calls
+        self.file_poll_interval = file_poll_interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_blocking_calls, thread_name_prefix="spacefx-call")
+        self._tasks: Set[asyncio.Task] = set()
+
+    def run(self, main_coroutine: Awaitable) -> Any:
+        """
+        Runs the event loop until main_coroutine completes and returns its result.
+        """
+        return asyncio.run(self._run(main_coroutine))
+
+    async def _run(self, main_coroutine: Awaitable) -> Any:
+        self.loop = asyncio.get_running_loop()
+        try:
+            return await main_coroutine
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs a blocking call (e.g. spacefx.sensor.sensor_tasking) on the executor and awaits its result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def spawn(self, coroutine: Awaitable) -> asyncio.Task:
+        """
+        Schedules a coroutine on the running loop.  A reference is held until the task completes so it is not garbage collected mid-flight.
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def submit_threadsafe(self, coroutine: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedules a coroutine from a thread outside the loop, such as a spacefx callback thread.
+
+        Raises:
+            RuntimeError: If the event loop is not running.
+        """
+        if self.loop is None or self.loop.is_closed():
+            raise RuntimeError("The AppCore event loop is not running")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    @property
+    def tasks_in_flight(self) -> int:
+        """
+        Number of spawned tasks that have not completed yet.
+        """
+        return len(self._tasks)
+
+    async def wait_for_file(self, path: str, timeout: float) -> bool:
+        """
+        Waits for a file to appear without blocking the event loop.
+
+        Args:
+            path (str): Path to the file.
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            bool: True if the file exists, False if the timeout expired first.
+        """
+        loop = asyncio.get_running_loop()
+        file_available_timeout = loop.time() + timeout
+        while not os.path.isfile(path):
+            if loop.time() >= file_available_timeout:
+                return False
+            await asyncio.sleep(self.file_poll_interval)
+        return True
@@ -0,0 +1,78 @@
+"""
+Sizes the chips a scene is tiled into, from the ground sample distance of the image and the one the model was trained at
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import PIL.Image
+
+# Bounds of the chip size relative to the model's input, so a mislabeled pixel size cannot tile a scene into slivers or one huge chip
+MIN_CHIPPING_SCALE = 0.25
+MAX_CHIPPING_SCALE = 16.0
+
+
+@dataclass
+class ChipSizing:
+    """
+    The chip size an image is tiled with, how chips are resampled to the model's input, and how many chips that makes
+    """
+
+    chip_height: int
+    chip_width: int
+
+    scale: float
+    """
+    Chip size relative to the model's input
+    """
+
+    tiles: int
+    """
+    Number of chips the image is tiled into, 1 if it fits in a single chip
+    """
+
+    ground_sample_distance: Optional[float] = None
+    """
+    Meters per pixel of the image as decoded, if its chips were sized from it
+    """
+
+    resample: Optional[int] = None
+    """
+    PIL resampling filter for resizing chips to the model's input, or None for the model's default
+    """
+
+
+def plan_chips(image_width: int, image_height: int, input_shape: Sequence[int], chipping_scale: float,
+               ground_sample_distance: Optional[float] = None, target_gsd: float = 0.0) -> ChipSizing:
+    """
+    Chooses the chip size for an image.  With a target GSD and the image's GSD, each chip covers the ground the model's input
+    covers at the target GSD, so ships keep the pixel footprint the model was trained on whatever the imagery's resolution:
+    finer imagery gets larger chips that are area-averaged down, coarser imagery smaller chips that are interpolated up.
+    Otherwise chips are chipping_scale times the model's input.
+
+    Args:
+        image_width (int): Width of the image as decoded.
+        image_height (int): Height of the image as decoded.
+        input_shape (Sequence[int]): Model input (height, width).
+        chipping_scale (float): Chip size relative to the model's input when the GSD is not known.
+        ground_sample_distance (float, optional): Meters per pixel of the image as decoded. Defaults to None.
+        target_gsd (float, optional): Meters per pixel the model expects.  0 always uses chipping_scale. Defaults to 0.
+
+    Returns:
+        ChipSizing: The chip size and resulting number of chips.
+    """
+    resample = None
+    gsd_adaptive = target_gsd > 0 and ground_sample_distance is not None and ground_sample_distance > 0
+    if gsd_adaptive:
+        scale = min(MAX_CHIPPING_SCALE, max(MIN_CHIPPING_SCALE, target_gsd / ground_sample_distance))
+        resample = PIL.Image.Resampling.BOX if scale > 1 else PIL.Image.Resampling.BICUBIC
+    else:
+        scale = chipping_scale
+
+    chip_height = max(1, round(input_shape[0] * scale))
+    chip_width = max(1, round(input_shape[1] * scale))
+    if image_width > chip_width or image_height > chip_height:
+        tiles = math.ceil(image_height / chip_height) * math.ceil(image_width / chip_width)
+    else:
+        tiles = 1
+    return ChipSizing(chip_height, chip_width, scale, tiles, ground_sample_distance if gsd_adaptive else None, resample)
@@ -0,0 +1,132 @@
+"""
+Process-wide, hot-reloadable app config
+"""
+import os
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from app_config import AppConfig
+
+DEFAULT_CONFIG_PATH = '/var/spacedev/xfer/app-python-shipdetector-onnx/inbox/app-config.json'
+
+# Keys read once when components are built or the app starts; changing them on a running app only takes effect after a restart
+RESTART_REQUIRED_KEYS = [
+    'MODEL_FILENAME', 'MODEL_LABEL_FILENAME', 'INBOX_FOLDER', 'OUTBOX_FOLDER', 'STATE_FOLDER', 'NUM_OF_WORKERS', 'MODEL_WARMUP_ENABLED',
+    'WORK_JOURNAL_ENABLED', 'WORK_JOURNAL_FSYNC_BATCH_SIZE', 'WORK_JOURNAL_FSYNC_INTERVAL', 'WORK_JOURNAL_COMPACT_MB',
+    'RESULT_CACHE_ENABLED', 'RESULT_CACHE_MAX_ENTRIES', 'RESULT_CACHE_MAX_MB',
+    'CHANGE_DETECTION_ENABLED', 'CHANGE_DETECTION_THRESHOLD', 'CHANGE_DETECTION_SAVE_INTERVAL',
+    'DETECTION_INDEX_ENABLED', 'DETECTION_INDEX_RETENTION_DAYS',
+    'VESSEL_TRACKING_ENABLED', 'TRACK_GATE_METERS', 'TRACK_MAX_SPEED', 'TRACK_MAX_GATE_METERS', 'TRACK_MOVED_METERS', 'TRACK_MAX_MISSES',
+    'CPU_PARTITIONING_ENABLED', 'MEMORY_GOVERNOR_ENABLED', 'MEMORY_BUDGET_MB', 'MEMORY_BUDGET_FRACTION',
+    'AUTOSCALE_ENABLED', 'AUTOSCALE_MIN_WORKERS', 'AUTOSCALE_MAX_WORKERS', 'AUTOSCALE_TARGET_WAIT', 'AUTOSCALE_MEMORY_HEADROOM',
+    'AUTOSCALE_SCALE_DOWN_COOLDOWN',
+    'LATITUDE', 'LONGITUDE', 'TASKING_TARGETS', 'TASKING_PASSES', 'TASKING_MAX_IN_FLIGHT', 'TASKING_MAX_QUEUE_DEPTH', 'TASKING_TIMEOUT',
+    'LOG_BATCH_SIZE', 'LOG_FLUSH_INTERVAL', 'LOG_MAX_RECORDS_PER_MINUTE', 'SLO_WINDOW_SECONDS',
+    'CONFIG_RELOAD_INTERVAL', 'TELEMETRY_INTERVAL', 'METRICS_PORT',
+]
+
+
+class ConfigStore:
+    """
+    Holds the current AppConfig as a read-only snapshot and replaces it when app-config.json changes.
+
+    Readers take a snapshot and keep it for a unit of work (e.g. one image), so a reload never changes settings halfway through.
+    A config file that fails to load or validate is ignored and the previous snapshot stays current.
+    """
+
+    _shared: Optional['ConfigStore'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, config: AppConfig, file_path: Optional[str] = None):
+        """
+        Args:
+            config (AppConfig): The initial config.  It is frozen and becomes the first snapshot.
+            file_path (str, optional): app-config.json to reload from.  Defaults to none, which disables reloading.
+        """
+        config.freeze()
+        self.file_path = file_path
+        self._snapshot = config
+        self._file_state = self._stat()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def shared(cls, file_path: str = DEFAULT_CONFIG_PATH) -> 'ConfigStore':
+        """
+        Returns the process-wide store, loading the config on first use
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(AppConfig(file_path=file_path), file_path=file_path)
+            return cls._shared
+
+    @property
+    def snapshot(self) -> AppConfig:
+        """
+        The current read-only config
+        """
+        return self._snapshot
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        if self.file_path is None:
+            return None
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> List[str]:
+        """
+        Loads and validates app-config.json if it changed since the last load, and publishes it as the new snapshot.
+
+        Returns:
+            List[str]: Keys whose values changed; empty if the file did not change.
+
+        Raises:
+            Exception: Any error loading or validating the file.  The current snapshot is kept.
+        """
+        file_state = self._stat()
+        if file_state is None or file_state == self._file_state:
+            return []
+        # Remembered before loading so a broken file is reported once, not on every poll
+        self._file_state = file_state
+
+        config = AppConfig(file_path=self.file_path)
+        config.freeze()
+        previous, self._snapshot = self._snapshot, config
+        return [key for key in vars(config) if not key.startswith('_') and getattr(previous, key, None) != getattr(config, key)]
+
+    def watch(self, interval: float,
+              on_change: Optional[Callable[[AppConfig, List[str]], None]] = None,
+              on_error: Optional[Callable[[Exception], None]] = None):
+        """
+        Starts a background thread that reloads the config every interval seconds.
+
+        Args:
+            interval (float): Seconds between checks of the file.
+            on_change (Callable, optional): Called with the new snapshot and the changed keys after a reload.
+            on_error (Callable, optional): Called with the error when a changed file fails to load.
+        """
+        if self._watcher is not None or self.file_path is None:
+            return
+
+        def poll():
+            while not self._stop.wait(interval):
+                try:
+                    changed_keys = self.reload()
+                except Exception as error:
+                    if on_error is not None:
+                        on_error(error)
+                    continue
+                if changed_keys and on_change is not None:
+                    on_change(self._snapshot, changed_keys)
+
+        self._watcher = threading.Thread(target=poll, daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """
+        Stops the watcher thread
+        """
+        self._stop.set()
@@ -0,0 +1,94 @@
+"""
+Splits the container's CPUs between image processing workers
+"""
+import math
+import os
+import threading
+from typing import List, Optional
+
+from resource_limits import available_cpus, cgroup_cpu_limit
+
+
+def schedulable_cpus() -> List[int]:
+    """
+    IDs of the CPUs the process may be scheduled on
+    """
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(available_cpus()))
+
+
+def partition_cpus(cpus: List[int], partitions: int) -> List[List[int]]:
+    """
+    Splits the CPUs into the given number of contiguous, near-equal partitions.
+    With fewer CPUs than partitions, each partition gets a single CPU and CPUs are shared round-robin.
+    """
+    partitions = max(1, partitions)
+    if len(cpus) <= partitions:
+        return [[cpus[i % len(cpus)]] for i in range(partitions)]
+
+    size, remainder = divmod(len(cpus), partitions)
+    result = []
+    start = 0
+    for i in range(partitions):
+        end = start + size + (1 if i < remainder else 0)
+        result.append(cpus[start:end])
+        start = end
+    return result
+
+
+def pin_current_thread(cpus: List[int]):
+    """
+    Restricts the calling thread, and the threads it starts afterwards, to the given CPUs.  Ignored where unsupported
+    """
+    try:
+        # On Linux pid 0 targets the calling thread, not the whole process
+        os.sched_setaffinity(0, cpus)
+    except (AttributeError, OSError):
+        pass
+
+
+class CpuPartitioner:
+    """
+    Hands each image processing worker its own slice of the CPUs, so every worker's inference session runs
+    one intra-op thread per CPU of its slice instead of a thread per core of the machine.
+    """
+
+    def __init__(self, partitions: int, cpus: Optional[List[int]] = None, cpu_limit: Optional[float] = None):
+        """
+        Args:
+            partitions (int): Number of slices, normally the most workers that can run at once.
+            cpus (List[int], optional): CPUs to split.  Defaults to the CPUs the process may be scheduled on.
+            cpu_limit (float, optional): CPUs allotted by the container's quota; only that many CPUs are used.  Defaults to the cgroup quota.
+        """
+        cpus = schedulable_cpus() if cpus is None else sorted(cpus)
+        cpu_limit = cgroup_cpu_limit() if cpu_limit is None else cpu_limit
+        cpus = cpus[:max(1, math.floor(cpu_limit))]
+
+        self.partitions = partition_cpus(cpus, partitions)
+        self._lock = threading.Lock()
+        self._in_use = [0] * len(self.partitions)
+
+    @property
+    def threads_per_partition(self) -> int:
+        """
+        Size of the smallest slice, used for process-wide thread pools such as OpenCV's
+        """
+        return min(len(partition) for partition in self.partitions)
+
+    def acquire(self) -> int:
+        """
+        Returns the index of the least used slice and marks it in use
+        """
+        with self._lock:
+            index = self._in_use.index(min(self._in_use))
+            self._in_use[index] += 1
+            return index
+
+    def release(self, index: int):
+        """
+        Marks a slice returned by acquire as free
+        """
+        with self._lock:
+            self._in_use[index] = max(0, self._in_use[index] - 1)
@@ -0,0 +1,239 @@
+"""
+Persistent spatial index of the detections of every pass, queryable by location and capture time without reprocessing imagery
+"""
+import datetime
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import rasterio
+
+from georeference import GeoReference
+from ship_detection import ShipDetection
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = 111.32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS passes (
+    id INTEGER PRIMARY KEY,
+    pass_key TEXT NOT NULL UNIQUE,
+    tracking_id TEXT NOT NULL,
+    captured_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passes_captured_at ON passes (captured_at);
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    pass_id INTEGER NOT NULL REFERENCES passes (id),
+    image TEXT NOT NULL,
+    longitude REAL NOT NULL,
+    latitude REAL NOT NULL,
+    probability REAL NOT NULL,
+    x_coordinate INTEGER NOT NULL,
+    y_coordinate INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS detections_pass_id ON detections (pass_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS detection_bounds USING rtree (id, min_longitude, max_longitude, min_latitude, max_latitude);
+"""
+
+
+def capture_time(path: str) -> Optional[float]:
+    """
+    Reads an image's capture time from its TIFFTAG_DATETIME tag, which GDAL writes as "YYYY:MM:DD HH:MM:SS" in UTC
+
+    Returns:
+        float: Seconds since the epoch, or None if the image has no readable capture time.
+    """
+    try:
+        with rasterio.open(path) as dataset:
+            value = dataset.tags().get('TIFFTAG_DATETIME')
+    except rasterio.errors.RasterioIOError:
+        return None
+    if not value:
+        return None
+    try:
+        captured = datetime.datetime.strptime(value.strip(), "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    return captured.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def distance_km(longitude_1: float, latitude_1: float, longitude_2: float, latitude_2: float) -> float:
+    """
+    Great-circle distance between two WGS84 points in kilometers
+    """
+    phi_1, phi_2 = math.radians(latitude_1), math.radians(latitude_2)
+    delta_phi = phi_2 - phi_1
+    delta_lambda = math.radians(longitude_2 - longitude_1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi_1) * math.cos(phi_2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+@dataclass
+class IndexedDetection:
+    """
+    A detection returned by a query, with where and when it was seen
+    """
+
+    longitude: float
+    latitude: float
+    probability: float
+    captured_at: float
+    tracking_id: str
+    image: str
+    distance_km: float = 0.0
+
+
+class DetectionIndex:
+    """
+    SQLite store of every detection's location, with an R*Tree over the detections' longitude/latitude bounds.  Detections are
+    grouped into passes, one per tracking ID (or per image for images queued directly), so queries can ask for the last N passes.
+
+    Indexing an image again replaces its detections, so a re-delivered scene is not counted twice.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): SQLite database file, created if it does not exist.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def add(self, image: str, detections: List[ShipDetection], georeference: GeoReference, tracking_id: str = "",
+            captured_at: Optional[float] = None) -> int:
+        """
+        Indexes an image's detections by the longitude and latitude of their pixel boxes
+
+        Args:
+            image (str): Name of the image the detections were found in.
+            detections (List[ShipDetection]): Detections in the image's pixel coordinates.
+            georeference (GeoReference): The image's georeferencing.
+            tracking_id (str, optional): TrackingId of the SensorData that delivered the image. Defaults to "".
+            captured_at (float, optional): Capture time in seconds since the epoch. Defaults to now.
+
+        Returns:
+            int: Number of detections indexed.
+        """
+        captured_at = captured_at if captured_at is not None else time.time()
+        pass_key = tracking_id or image
+
+        rows = []
+        if detections:
+            # Every box corner and centre in one transform call; boxes in projected CRSs are not axis-aligned in longitude/latitude
+            xs = np.array([[d.x_coordinate, d.x_coordinate + d.width, d.x_coordinate, d.x_coordinate + d.width, d.x_coordinate + d.width / 2] for d in detections], dtype=float)
+            ys = np.array([[d.y_coordinate, d.y_coordinate, d.y_coordinate + d.height, d.y_coordinate + d.height, d.y_coordinate + d.height / 2] for d in detections], dtype=float)
+            longitudes, latitudes = georeference.pixel_to_lonlat(xs.ravel(), ys.ravel())
+            longitudes, latitudes = longitudes.reshape(xs.shape), latitudes.reshape(ys.shape)
+            for i, detection in enumerate(detections):
+                rows.append((detection, float(longitudes[i, 4]), float(latitudes[i, 4]),
+                             float(longitudes[i, :4].min()), float(longitudes[i, :4].max()),
+                             float(latitudes[i, :4].min()), float(latitudes[i, :4].max())))
+
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO passes (pass_key, tracking_id, captured_at) VALUES (?, ?, ?) "
+                                     "ON CONFLICT (pass_key) DO UPDATE SET captured_at = excluded.captured_at",
+                                     (pass_key, tracking_id, captured_at))
+            pass_id = self._connection.execute("SELECT id FROM passes WHERE pass_key = ?", (pass_key,)).fetchone()[0]
+            self._delete_image(pass_id, image)
+
+            for detection, longitude, latitude, min_longitude, max_longitude, min_latitude, max_latitude in rows:
+                cursor = self._connection.execute(
+                    "INSERT INTO detections (pass_id, image, longitude, latitude, probability, x_coordinate, y_coordinate, width, height) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (pass_id, image, longitude, latitude, float(detection.probability),
+                     int(detection.x_coordinate), int(detection.y_coordinate), int(detection.width), int(detection.height)))
+                self._connection.execute("INSERT INTO detection_bounds VALUES (?, ?, ?, ?, ?)",
+                                         (cursor.lastrowid, min_longitude, max_longitude, min_latitude, max_latitude))
+        return len(rows)
+
+    def near(self, longitude: float, latitude: float, radius_km: float, last_passes: Optional[int] = None,
+             since: Optional[float] = None) -> List[IndexedDetection]:
+        """
+        Returns the detections within radius_km of a point, nearest first
+
+        Args:
+            longitude (float): Longitude of the point.
+            latitude (float): Latitude of the point.
+            radius_km (float): Search radius in kilometers.
+            last_passes (int, optional): Only search the most recently captured passes. Defaults to every pass.
+            since (float, optional): Only search passes captured at or after this time, in seconds since the epoch.
+        """
+        # The R*Tree narrows the search to a longitude/latitude box around the circle; the exact distance is checked after
+        delta_latitude = radius_km / KM_PER_DEGREE_LATITUDE
+        cos_latitude = math.cos(math.radians(min(89.9, abs(latitude) + delta_latitude)))
+        delta_longitude = min(180.0, radius_km / (KM_PER_DEGREE_LATITUDE * cos_latitude))
+
+        results = []
+        for detection in self.within(longitude - delta_longitude, longitude + delta_longitude, latitude - delta_latitude, latitude + delta_latitude,
+                                     last_passes=last_passes, since=since):
+            detection.distance_km = distance_km(longitude, latitude, detection.longitude, detection.latitude)
+            if detection.distance_km <= radius_km:
+                results.append(detection)
+        return sorted(results, key=lambda detection: detection.distance_km)
+
+    def within(self, min_longitude: float, max_longitude: float, min_latitude: float, max_latitude: float, last_passes: Optional[int] = None,
+               since: Optional[float] = None) -> List[IndexedDetection]:
+        """
+        Returns the detections whose boxes overlap a longitude/latitude box, e.g. a scene's footprint
+
+        Args:
+            min_longitude (float): West edge of the box.
+            max_longitude (float): East edge of the box.
+            min_latitude (float): South edge of the box.
+            max_latitude (float): North edge of the box.
+            last_passes (int, optional): Only search the most recently captured passes. Defaults to every pass.
+            since (float, optional): Only search passes captured at or after this time, in seconds since the epoch.
+        """
+        query = ("SELECT d.longitude, d.latitude, d.probability, p.captured_at, p.tracking_id, d.image "
+                 "FROM detection_bounds b JOIN detections d ON d.id = b.id JOIN passes p ON p.id = d.pass_id "
+                 "WHERE b.max_longitude >= ? AND b.min_longitude <= ? AND b.max_latitude >= ? AND b.min_latitude <= ?")
+        parameters = [min_longitude, max_longitude, min_latitude, max_latitude]
+        if since is not None:
+            query += " AND p.captured_at >= ?"
+            parameters.append(since)
+        if last_passes is not None:
+            query += " AND p.id IN (SELECT id FROM passes ORDER BY captured_at DESC LIMIT ?)"
+            parameters.append(last_passes)
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [IndexedDetection(*row) for row in rows]
+
+    def prune(self, before: float) -> int:
+        """
+        Removes the passes captured before a time, in seconds since the epoch
+
+        Returns:
+            int: Number of passes removed.
+        """
+        with self._lock, self._connection:
+            pass_ids = [row[0] for row in self._connection.execute("SELECT id FROM passes WHERE captured_at < ?", (before,))]
+            for pass_id in pass_ids:
+                self._delete_image(pass_id, None)
+                self._connection.execute("DELETE FROM passes WHERE id = ?", (pass_id,))
+        return len(pass_ids)
+
+    def close(self):
+        """
+        Closes the database
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _delete_image(self, pass_id: int, image: Optional[str]):
+        """
+        Deletes a pass's detections, or only those of one of its images.  Callers hold the lock inside a transaction
+        """
+        condition, parameters = ("pass_id = ?", (pass_id,)) if image is None else ("pass_id = ? AND image = ?", (pass_id, image))
+        self._connection.execute(f"DELETE FROM detection_bounds WHERE id IN (SELECT id FROM detections WHERE {condition})", parameters)
+        self._connection.execute(f"DELETE FROM detections WHERE {condition}", parameters)
@@ -0,0 +1,100 @@
+"""
+Maps pixels of a GeoTIFF to geographic coordinates
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+import rasterio
+import rasterio.warp
+from affine import Affine
+
+WGS84 = 'EPSG:4326'
+
+
+class GeoReference:
+    """
+    Pixel to world mapping of a georeferenced image, built from the GeoTIFF's affine transform and CRS
+    """
+
+    def __init__(self, transform, crs):
+        """
+        Args:
+            transform (affine.Affine): Transform from (column, row) pixel coordinates to CRS coordinates.
+            crs (rasterio.crs.CRS): Coordinate reference system of the image.
+        """
+        self.transform = transform
+        self.crs = crs
+
+    @classmethod
+    def from_file(cls, path: str) -> Optional['GeoReference']:
+        """
+        Reads the georeferencing of an image without decoding its pixels.
+
+        Returns:
+            GeoReference: The image's georeferencing, or None if the image is not georeferenced (e.g. a JPEG).
+        """
+        try:
+            with rasterio.open(path) as dataset:
+                if dataset.crs is None:
+                    return None
+                return cls(dataset.transform, dataset.crs)
+        except rasterio.errors.RasterioIOError:
+            return None
+
+    def scaled(self, scale_x: float, scale_y: float) -> 'GeoReference':
+        """
+        Returns the georeferencing of the image resampled to scale_x by scale_y of its resolution, e.g. decoded from an overview
+        """
+        return GeoReference(self.transform * Affine.scale(1 / scale_x, 1 / scale_y), self.crs)
+
+    @property
+    def pixel_size(self) -> Tuple[float, float]:
+        """
+        Width and height of a pixel in CRS units
+        """
+        return abs(self.transform.a), abs(self.transform.e)
+
+    @property
+    def ground_sample_distance(self) -> float:
+        """
+        Mean pixel size in meters.  Geographic CRSs are converted using the length of a degree at the image's latitude
+        """
+        pixel_width, pixel_height = self.pixel_size
+        if not self.crs.is_geographic:
+            return (pixel_width + pixel_height) / 2
+
+        _, latitude = self.transform * (0, 0)
+        meters_per_degree = 111320.0
+        return (pixel_width * meters_per_degree * np.cos(np.radians(latitude)) + pixel_height * meters_per_degree) / 2
+
+    def pixel_to_world(self, x, y):
+        """
+        Converts pixel (column, row) coordinates to CRS coordinates.  Accepts scalars or numpy arrays
+        """
+        return self.transform * (x, y)
+
+    def world_to_pixel(self, world_x, world_y):
+        """
+        Converts CRS coordinates to pixel (column, row) coordinates.  Accepts scalars or numpy arrays
+        """
+        return ~self.transform * (world_x, world_y)
+
+    def pixel_to_lonlat(self, x, y):
+        """
+        Converts pixel (column, row) coordinates to WGS84 longitude and latitude.  Accepts scalars or numpy arrays
+        """
+        world_x, world_y = self.pixel_to_world(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        longitudes, latitudes = rasterio.warp.transform(self.crs, WGS84, np.atleast_1d(world_x), np.atleast_1d(world_y))
+        if np.ndim(x) == 0:
+            return longitudes[0], latitudes[0]
+        return np.asarray(longitudes), np.asarray(latitudes)
+
+    def lonlat_to_pixel(self, longitude, latitude):
+        """
+        Converts WGS84 longitude and latitude to pixel (column, row) coordinates.  Accepts scalars or numpy arrays
+        """
+        world_x, world_y = rasterio.warp.transform(WGS84, self.crs, np.atleast_1d(longitude).astype(float), np.atleast_1d(latitude).astype(float))
+        x, y = self.world_to_pixel(np.asarray(world_x), np.asarray(world_y))
+        if np.ndim(longitude) == 0:
+            return x[0], y[0]
+        return x, y
@@ -0,0 +1,117 @@
+"""
+Decodes images to the 8-bit BGR frames the pipeline works on, reading GeoTIFFs band by band and at reduced resolution through rasterio
+"""
+import warnings
+from dataclasses import dataclass
+from typing import Sequence
+
+import cv2
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+
+# Bands of an RGB or NAIP (R, G, B, NIR) GeoTIFF in the pipeline's BGR order; NIR is never read
+BGR_BANDS = (3, 2, 1)
+
+
+@dataclass
+class DecodedImage:
+    """
+    An image's pixels and the resolution they were decoded at
+    """
+
+    pixels: np.ndarray
+    """
+    (height, width, 3) uint8 BGR pixels
+    """
+
+    full_width: int
+    """
+    Width of the image at full resolution
+    """
+
+    full_height: int
+    """
+    Height of the image at full resolution
+    """
+
+    @property
+    def scale_x(self) -> float:
+        """
+        Decoded pixels per full-resolution pixel across
+        """
+        return self.pixels.shape[1] / self.full_width
+
+    @property
+    def scale_y(self) -> float:
+        """
+        Decoded pixels per full-resolution pixel down
+        """
+        return self.pixels.shape[0] / self.full_height
+
+
+def decode_image(path: str, scale: float = 1.0, bands: Sequence[int] = BGR_BANDS) -> DecodedImage:
+    """
+    Decodes an image to 8-bit BGR.  GeoTIFFs are read through rasterio, only the given bands and, below full resolution, straight
+    from the file's internal overviews where it has them, so full-resolution pixels are never decoded only to be downsampled.
+    Other formats are decoded with OpenCV.
+
+    Args:
+        path (str): Path to the image.
+        scale (float, optional): Fraction of the full resolution to decode at, up to 1. Defaults to 1.
+        bands (Sequence[int], optional): 1-based band indexes read as blue, green and red. Defaults to BGR_BANDS.
+
+    Returns:
+        DecodedImage: The pixels and the resolution they were decoded at.
+    """
+    scale = min(1.0, scale)
+    try:
+        # Other formats are only opened to find out they are not GeoTIFFs, so their missing georeferencing is expected
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', rasterio.errors.NotGeoreferencedWarning)
+            dataset = rasterio.open(path)
+    except rasterio.errors.RasterioIOError:
+        dataset = None
+
+    if dataset is None or dataset.driver != 'GTiff':
+        if dataset is not None:
+            dataset.close()
+        return _decode_with_opencv(path, scale)
+
+    with dataset:
+        # Single-band imagery is read once and repeated as gray
+        indexes = list(bands) if dataset.count >= max(bands) else [1]
+        height, width = max(1, round(dataset.height * scale)), max(1, round(dataset.width * scale))
+        # GDAL serves reduced reads from the closest overview; average keeps ships visible where there is none
+        pixels = dataset.read(indexes, out_shape=(len(indexes), height, width),
+                              resampling=Resampling.average if scale < 1 else Resampling.nearest)
+        full_width, full_height = dataset.width, dataset.height
+
+    pixels = _to_uint8(pixels)
+    if len(indexes) == 1:
+        pixels = np.repeat(pixels, 3, axis=0)
+    return DecodedImage(np.ascontiguousarray(pixels.transpose(1, 2, 0)), full_width, full_height)
+
+
+def _decode_with_opencv(path: str, scale: float) -> DecodedImage:
+    """
+    Decodes a non-GeoTIFF image with cv2.imread, downsampling it if a reduced resolution was asked for
+    """
+    pixels = cv2.imread(str(path))
+    if pixels is None:
+        raise ValueError(f"Unable to decode image: {path}")
+    full_height, full_width = pixels.shape[:2]
+    if scale < 1:
+        pixels = cv2.resize(pixels, (max(1, round(full_width * scale)), max(1, round(full_height * scale))), interpolation=cv2.INTER_AREA)
+    return DecodedImage(pixels, full_width, full_height)
+
+
+def _to_uint8(pixels: np.ndarray) -> np.ndarray:
+    """
+    Converts pixels to 8 bits the way cv2.imread does: 16-bit values keep their high byte, others are clipped to 0-255
+    """
+    if pixels.dtype == np.uint8:
+        return pixels
+    if pixels.dtype == np.uint16:
+        return (pixels >> 8).astype(np.uint8)
+    return np.clip(pixels, 0, 255).astype(np.uint8)
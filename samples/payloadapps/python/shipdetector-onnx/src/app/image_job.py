@@ -0,0 +1,100 @@
+"""
+Work item passed from the sensor handler to the image processor
+"""
+import queue
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Images waiting for the image processor's workers.  Lives here so the queue can be read without importing the processing stack
+IMAGE_QUEUE: queue.Queue = queue.Queue()
+
+# Images re-queued with the chips they did not get to within their time budget.  Workers only take from it when IMAGE_QUEUE is empty
+DEFERRED_QUEUE: queue.Queue = queue.Queue()
+
+# Segments of an image's lifecycle, as (name, start timestamp, end timestamp) attributes of ImageJob
+LIFECYCLE_SEGMENTS = (("transfer", "sensor_data_at", "file_ready_at"),
+                      ("queue_wait", "queued_at", "dequeued_at"),
+                      ("inference", "dequeued_at", "inference_done_at"),
+                      ("products", "inference_done_at", "products_written_at"))
+
+
+@dataclass
+class ImageJob:
+    """
+    An image waiting to be processed and the tasking request it was delivered for
+    """
+
+    image_path: str
+    """
+    Path to the image in the inbox
+    """
+
+    tracking_id: str = ""
+    """
+    TrackingId of the SensorData that delivered the image.  Empty when the image was queued directly
+    """
+
+    queued_at: float = field(default_factory=time.monotonic, compare=False)
+    """
+    time.monotonic() when the image was queued
+    """
+
+    sensor_data_at: Optional[float] = field(default=None, compare=False)
+    """
+    time.monotonic() when the SensorData that delivered the image was received.  None when the image was queued directly
+    """
+
+    file_ready_at: Optional[float] = field(default=None, compare=False)
+    """
+    time.monotonic() when the image's transfer to the inbox completed
+    """
+
+    dequeued_at: Optional[float] = field(default=None, compare=False)
+    """
+    time.monotonic() when a worker took the image off the queue
+    """
+
+    inference_done_at: Optional[float] = field(default=None, compare=False)
+    """
+    time.monotonic() when the image's detections were ready
+    """
+
+    products_written_at: Optional[float] = field(default=None, compare=False)
+    """
+    time.monotonic() when the augmented image and chips were on disk
+    """
+
+    completed_tiles: Dict[str, List[dict]] = field(default_factory=dict, compare=False, repr=False)
+    """
+    Detections of the chips already processed, by tile key, when the image was re-queued after running out of its time budget
+    """
+
+    def output_folder(self, outbox_folder: str) -> Path:
+        """
+        Returns the folder the image's products are written to.  Products are grouped under the tracking ID so every asset of a tasking request lands together.
+        """
+        if self.tracking_id:
+            return Path(outbox_folder, self.tracking_id)
+        return Path(outbox_folder)
+
+    def end_to_end(self) -> Optional[float]:
+        """
+        Seconds from the SensorData, or from queueing if the image was queued directly, to the products being written.  None until they are written
+        """
+        if self.products_written_at is None:
+            return None
+        started = self.sensor_data_at if self.sensor_data_at is not None else self.queued_at
+        return self.products_written_at - started
+
+    def lifecycle(self) -> Dict[str, float]:
+        """
+        Returns the seconds spent in each lifecycle segment whose start and end were both recorded
+        """
+        segments = {}
+        for name, start, end in LIFECYCLE_SEGMENTS:
+            started, ended = getattr(self, start), getattr(self, end)
+            if started is not None and ended is not None:
+                segments[name] = ended - started
+        return segments
@@ -1,123 +1,729 @@
 """
 Processes the frame
 """
+import dataclasses
 import datetime
+import json
 import cv2
+import numpy as np
 import os
 import queue
+import shutil
 import threading
+import time
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from aoi import AoiSource
 from app_config import AppConfig
+from chip_sizing import plan_chips
+from config_store import ConfigStore
+from cpu_partition import CpuPartitioner, pin_current_thread
+from detection_index import DetectionIndex, capture_time
+from georeference import GeoReference
+from image_decoder import decode_image
+from image_job import DEFERRED_QUEUE, IMAGE_QUEUE, ImageJob
+from instrumentation import PIPELINE_COUNTERS, STAGE_TIMINGS
+from memory_governor import MemoryGovernor, default_budget, estimate_footprint
 from ship_detection import ShipDetection
 from object_detection import ObjectDetection
-
-IMAGE_QUEUE: queue.Queue = queue.Queue()
+from profiling import ProfilingControl, ProfilingRun
+from resource_limits import cgroup_cpu_limit, cgroup_memory_limit, process_rss
+from result_cache import ResultCache
+from slo_tracker import SloTracker
+from structured_logging import LogEvent, install_batching
+from tile_scheduler import TileCoverage, chip_grid, count_in_grid, ordered_tiles, tile_priorities
+from tile_store import TileStore
+from vessel_tracker import TrackEvent, VesselTracker, scene_footprint
+from work_journal import WorkJournal
+from worker_autoscaler import WorkerAutoscaler
 
 import logging
 import spacefx
 logger = spacefx.logger(level=logging.INFO)
 
+# Folder of the products of images whose time budget ran out and that were re-queued, under the image's product folder
+PARTIAL_FOLDER = "partial"
+
 class ImageProcessor:
     """
     Process the images sent by the monitor
     """
     image_gutter: int = 10
     ui_font = cv2.FONT_HERSHEY_SIMPLEX
+    work_journal: Optional[WorkJournal] = None
 
-    def __init__(self):
-
-        self.app_config = AppConfig()
+    def __init__(self, config_store:ConfigStore = None):
+        """
+        Args:
+            config_store (ConfigStore, optional): Source of config snapshots. Defaults to the process-wide store.
+        """
+        self.config_store = config_store if config_store is not None else ConfigStore.shared()
+        self._image_config = threading.local()
 
         print("Starting Image Processor...", end=" ")
 
+        # Hot-path records are rate limited per call site and sent to the logging service in batches
+        install_batching(logger, self.app_config.LOG_BATCH_SIZE, self.app_config.LOG_FLUSH_INTERVAL, self.app_config.LOG_MAX_RECORDS_PER_MINUTE)
+
+        if self.app_config.WORK_JOURNAL_ENABLED:
+            ImageProcessor.work_journal = WorkJournal(os.path.join(self.app_config.STATE_FOLDER, "work-journal.jsonl"),
+                                                      fsync_batch_size=self.app_config.WORK_JOURNAL_FSYNC_BATCH_SIZE,
+                                                      fsync_interval=self.app_config.WORK_JOURNAL_FSYNC_INTERVAL,
+                                                      compact_size=self.app_config.WORK_JOURNAL_COMPACT_MB * 1024 * 1024)
+
+            # Resume the images that were queued or in progress when the app last stopped
+            for image_job in ImageProcessor.work_journal.pending_jobs():
+                if not os.path.isfile(image_job.image_path):
+                    logger.warning(f"Dropping {image_job.image_path} from the work journal.  The file no longer exists")
+                    ImageProcessor.work_journal.record_failed(image_job.image_path, "file not found")
+                    continue
+                logger.info(f"Resuming {image_job.image_path} from the work journal")
+                IMAGE_QUEUE.put(image_job)
+
+        # Results reused from the cache or the tile store are only valid for the model they were found with
+        self.model_hash = None
+        if self.app_config.RESULT_CACHE_ENABLED or self.app_config.CHANGE_DETECTION_ENABLED:
+            self.model_hash = ResultCache.hash_file(os.path.join(self.app_config.INBOX_FOLDER, self.app_config.MODEL_FILENAME))
+
+        self.result_cache = None
+        if self.app_config.RESULT_CACHE_ENABLED:
+            self.result_cache = ResultCache(os.path.join(self.app_config.STATE_FOLDER, "result-cache"),
+                                            max_entries=self.app_config.RESULT_CACHE_MAX_ENTRIES,
+                                            max_bytes=self.app_config.RESULT_CACHE_MAX_MB * 1024 * 1024)
+
+        self.tile_store = None
+        if self.app_config.CHANGE_DETECTION_ENABLED:
+            self.tile_store = TileStore(os.path.join(self.app_config.STATE_FOLDER, "tile-store.json"),
+                                        difference_threshold=self.app_config.CHANGE_DETECTION_THRESHOLD,
+                                        save_interval=self.app_config.CHANGE_DETECTION_SAVE_INTERVAL)
+
+        self.detection_index = None
+        if self.app_config.DETECTION_INDEX_ENABLED:
+            self.detection_index = DetectionIndex(os.path.join(self.app_config.STATE_FOLDER, "detection-index.sqlite"))
+            if self.app_config.DETECTION_INDEX_RETENTION_DAYS > 0:
+                pruned = self.detection_index.prune(time.time() - self.app_config.DETECTION_INDEX_RETENTION_DAYS * 86400)
+                if pruned:
+                    logger.info(f"Removed {pruned} passes older than {self.app_config.DETECTION_INDEX_RETENTION_DAYS} days from the detection index")
+
+        self.vessel_tracker = None
+        if self.app_config.VESSEL_TRACKING_ENABLED:
+            self.vessel_tracker = VesselTracker(os.path.join(self.app_config.STATE_FOLDER, "vessel-tracks.json"),
+                                                gate_meters=self.app_config.TRACK_GATE_METERS,
+                                                max_speed=self.app_config.TRACK_MAX_SPEED,
+                                                moved_meters=self.app_config.TRACK_MOVED_METERS,
+                                                max_misses=self.app_config.TRACK_MAX_MISSES,
+                                                max_gate_meters=self.app_config.TRACK_MAX_GATE_METERS)
+
+        # Areas of interest come from the config and the inbox, and can change while the app runs
+        self.aoi_source = AoiSource(on_error=lambda source, error: logger.warning(f"Unable to read areas of interest from {source}: {error}"))
+
+        self.memory_governor = None
+        if self.app_config.MEMORY_GOVERNOR_ENABLED:
+            memory_budget = self.app_config.MEMORY_BUDGET_MB * 1024 * 1024 or default_budget(self.app_config.MEMORY_BUDGET_FRACTION)
+            if memory_budget:
+                logger.info(f"Image decodes are limited to a {memory_budget / (1024 * 1024):.0f} MB memory budget")
+                self.memory_governor = MemoryGovernor(memory_budget)
+
+        self._workers_lock = threading.Lock()
+        self._workers_warmed_up = threading.Condition(self._workers_lock)
+        self._warm_workers = 0
+        self._workers = 0
+        self._busy_workers = 0
+        self._workers_to_retire = 0
+
+        self.autoscaler = None
+        if self.app_config.AUTOSCALE_ENABLED:
+            self.autoscaler = WorkerAutoscaler(min_workers=self.app_config.AUTOSCALE_MIN_WORKERS,
+                                               max_workers=self.app_config.AUTOSCALE_MAX_WORKERS,
+                                               cpu_limit=cgroup_cpu_limit(),
+                                               memory_limit=cgroup_memory_limit(),
+                                               base_memory=process_rss(),
+                                               memory_headroom=self.app_config.AUTOSCALE_MEMORY_HEADROOM,
+                                               target_wait=self.app_config.AUTOSCALE_TARGET_WAIT,
+                                               scale_down_cooldown=self.app_config.AUTOSCALE_SCALE_DOWN_COOLDOWN)
+
+        self.cpu_partitioner = None
+        if self.app_config.CPU_PARTITIONING_ENABLED:
+            max_workers = self.autoscaler.worker_ceiling() if self.autoscaler is not None else self.app_config.NUM_OF_WORKERS
+            self.cpu_partitioner = CpuPartitioner(partitions=max(max_workers, self.app_config.NUM_OF_WORKERS))
+            cv2.setNumThreads(self.cpu_partitioner.threads_per_partition)
+            logger.info(f"Partitioned CPUs between workers: {self.cpu_partitioner.partitions}")
+
+        self.slo_tracker = SloTracker(window=self.app_config.SLO_WINDOW_SECONDS, on_breach=self.log_slo_breach, on_recovery=self.log_slo_recovery)
+
+        self.profiling = ProfilingControl(os.path.join(self.app_config.OUTBOX_FOLDER, "profiles"),
+                                          on_written=lambda folder: logger.info(f"Profiles written to {folder}"))
+
         for _ in range(0, self.app_config.NUM_OF_WORKERS):
-            image_processor = threading.Thread(target=self.monitor_queue)
-            image_processor.daemon = True
-            image_processor.start()
+            self.start_worker()
+
+        if self.autoscaler is not None:
+            autoscaler_thread = threading.Thread(target=self.autoscale_workers)
+            autoscaler_thread.daemon = True
+            autoscaler_thread.start()
 
         print("success")
 
-    @staticmethod
-    def add_image_to_queue(imagefile:str):
+    @property
+    def app_config(self) -> AppConfig:
         """
-        Add an image to the queue for processing
+        Config snapshot of the image being processed on this thread, or the latest snapshot outside of an image
         """
+        snapshot = getattr(self._image_config, 'snapshot', None)
+        return snapshot if snapshot is not None else self.config_store.snapshot
 
-        IMAGE_QUEUE.put(imagefile)
+    @property
+    def workers(self) -> int:
+        """
+        Number of image processing workers running
+        """
+        with self._workers_lock:
+            return self._workers - self._workers_to_retire
 
-    from pathlib import Path
+    @property
+    def busy_workers(self) -> int:
+        """
+        Number of image processing workers currently processing an image
+        """
+        with self._workers_lock:
+            return self._busy_workers
 
-    def monitor_queue(self):
+    def metrics_gauges(self) -> Dict[str, float]:
         """
-        Monitors the image queue, processes each image, and saves the results.
+        Current queue, worker, memory and rolling latency figures for the metrics endpoint
+        """
+        workers = self.workers
+        busy_workers = self.busy_workers
+        slo = self.slo_tracker.snapshot()
+        return {'queue_depth': self.queue_depth(),
+                'deferred_queue_depth': DEFERRED_QUEUE.qsize(),
+                'oldest_queued_wait_seconds': self.oldest_queued_wait(),
+                'workers': workers,
+                'busy_workers': busy_workers,
+                'worker_utilization': busy_workers / workers if workers else 0.0,
+                'process_resident_memory_bytes': process_rss(),
+                'images_per_minute': slo['images_per_minute'],
+                'end_to_end_p50_seconds': slo['p50'],
+                'end_to_end_p95_seconds': slo['p95'],
+                'end_to_end_p99_seconds': slo['p99']}
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
         """
-        # Initialize the ship detection model
-        ship_detection = ObjectDetection(Path(self.app_config.INBOX_FOLDER, self.app_config.MODEL_FILENAME))
+        Waits until the workers started with the processor have loaded and warmed up their models.
+        Workers that failed to start are not waited for.
 
-        # Calculate the maximum chip size based on the model's input shape and the chipping scale
-        chip_max_height = round(ship_detection.input_shape[0] * self.app_config.IMG_CHIPPING_SCALE)
-        chip_max_width = round(ship_detection.input_shape[1] * self.app_config.IMG_CHIPPING_SCALE)
+        Returns:
+            bool: True if the workers are ready, False if the timeout expired first.
+        """
+        with self._workers_warmed_up:
+            return self._workers_warmed_up.wait_for(lambda: self._warm_workers >= min(self._workers, self.app_config.NUM_OF_WORKERS), timeout=timeout)
 
-        # Start monitoring the image queue
+    def start_worker(self):
+        """
+        Starts another image processing worker
+        """
+        with self._workers_lock:
+            # Cancel a pending retirement instead of starting a thread while one is still winding down
+            if self._workers_to_retire > 0:
+                self._workers_to_retire -= 1
+                return
+            self._workers += 1
+
+        image_processor = threading.Thread(target=self.monitor_queue)
+        image_processor.daemon = True
+        image_processor.start()
+
+    def retire_worker(self):
+        """
+        Retires an image processing worker once it finishes its current image
+        """
+        with self._workers_lock:
+            if self._workers - self._workers_to_retire > 0:
+                self._workers_to_retire += 1
+
+    def _retire_worker(self) -> bool:
+        with self._workers_lock:
+            if self._workers_to_retire == 0:
+                return False
+            self._workers_to_retire -= 1
+            self._workers -= 1
+            return True
+
+    def autoscale_workers(self):
+        """
+        Periodically resizes the worker pool to the autoscaler's decision
+        """
         while True:
-            # Get the next image from the queue
-            input_image_path = Path(IMAGE_QUEUE.get())
-            logger.info(f"Processing {input_image_path}")
-
-            # Read the image into memory
-            raw_image = cv2.imread(str(input_image_path))
-            img_height, img_width, img_channels = raw_image.shape
+            time.sleep(self.app_config.AUTOSCALE_INTERVAL)
+
+            current_workers = self.workers
+            desired_workers = self.autoscaler.desired_workers(current_workers=current_workers,
+                                                              queue_depth=self.queue_depth(),
+                                                              oldest_wait=self.oldest_queued_wait(),
+                                                              busy_workers=self.busy_workers)
+            if desired_workers == current_workers:
+                continue
+
+            logger.info(f"Scaling image processing workers from {current_workers} to {desired_workers} (queue depth: {self.queue_depth()})")
+            for _ in range(current_workers, desired_workers):
+                self.start_worker()
+            for _ in range(desired_workers, current_workers):
+                self.retire_worker()
 
-            # Log the image and chip sizes
-            print(f"...image size: {img_width}x{img_height}")
-            print(f"...tensor size: {ship_detection.input_shape[0]}x{ship_detection.input_shape[1]}")
-            print(f"...maximum scale factor: {self.app_config.IMG_CHIPPING_SCALE} ({chip_max_height}x{chip_max_width})")
-
-            # Save the original image
-            self.save_image(raw_image, Path(self.app_config.OUTBOX_FOLDER, f"{input_image_path.stem}_orig.jpg"))
+    @staticmethod
+    def add_image_to_queue(imagefile:str, tracking_id:str = "", sensor_data_at:Optional[float] = None, file_ready_at:Optional[float] = None):
+        """
+        Add an image to the queue for processing, with the time.monotonic() its SensorData was received and its transfer completed if it was delivered by the sensor
+        """
 
-            # Run ship detection on the image or on each chip of the image
-            if img_width > chip_max_width or img_height > chip_max_height:
-                all_detections = self.run_ship_detection_large_image(ship_detection=ship_detection, raw_image=raw_image, chip_max_height=chip_max_height, chip_max_width=chip_max_width)
-            else:
-                all_detections = self.run_ship_detection(ship_detection=ship_detection, raw_image=raw_image)
+        image_job = ImageJob(image_path=imagefile, tracking_id=tracking_id, sensor_data_at=sensor_data_at, file_ready_at=file_ready_at)
+        if ImageProcessor.work_journal is not None:
+            ImageProcessor.work_journal.record_queued(image_job)
+        IMAGE_QUEUE.put(image_job)
 
-            # Prepare the filename for the augmented image
-            augmented_file_path = Path(self.app_config.OUTBOX_FOLDER, f"{input_image_path.stem}_augmented.jpg")
-            logger.info(f"Detected {len(all_detections)} ships.  Building augmented image '{augmented_file_path}'")
+    @staticmethod
+    def queue_depth() -> int:
+        """
+        Number of images waiting to be processed
+        """
+        return IMAGE_QUEUE.qsize()
 
-            # Loop over each detection
-            for i, detection in enumerate(all_detections, start=1):
-                print(f"Writing ship detection #{i}")
+    @staticmethod
+    def oldest_queued_wait() -> float:
+        """
+        Seconds the oldest waiting image has been in the queue, or 0 if the queue is empty
+        """
+        with IMAGE_QUEUE.mutex:
+            if not IMAGE_QUEUE.queue:
+                return 0.0
+            return time.monotonic() - IMAGE_QUEUE.queue[0].queued_at
 
-                # Draw the detection on the image
-                raw_image = self.write_hitboxes(raw_image=raw_image, detection=detection, ship_num=i)
+    @staticmethod
+    def next_image_job(timeout: float) -> Optional[ImageJob]:
+        """
+        Takes the next image off the queue, or an image re-queued after running out of its time budget if no new image is waiting
 
-                # Calculate the coordinates of the ship image with padding
-                ship_start_x = max(0, detection.x_coordinate - self.app_config.IMG_CHIPPING_PADDING)
-                ship_start_y = max(0, detection.y_coordinate - self.app_config.IMG_CHIPPING_PADDING)
-                ship_end_x = min(img_width, detection.x_coordinate + detection.width + self.app_config.IMG_CHIPPING_PADDING)
-                ship_end_y = min(img_height, detection.y_coordinate + detection.height + self.app_config.IMG_CHIPPING_PADDING)
+        Returns:
+            ImageJob: The image, or None if there was none within timeout seconds.
+        """
+        for image_queue in (IMAGE_QUEUE, DEFERRED_QUEUE):
+            try:
+                return image_queue.get_nowait()
+            except queue.Empty:
+                pass
+        try:
+            return IMAGE_QUEUE.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
-                # Extract the ship image from the raw image
-                cropped_ship_img = raw_image[int(ship_start_y):int(ship_end_y), int(ship_start_x):int(ship_end_x)]
+    from pathlib import Path
 
-                # Save the ship image
-                self.save_image(cropped_ship_img, Path(self.app_config.OUTBOX_FOLDER, self.app_config.OUTBOX_FOLDER_CHIPS, f"{input_image_path.stem}_ship_{i}.jpg"))
+    def monitor_queue(self):
+        """
+        Monitors the image queue, processes each image, and saves the results.
+        """
+        # Pin the worker to its own CPUs before the model starts its thread pool, so the pool inherits them
+        cpu_partition = None
+        intra_op_threads = 0
+        if self.cpu_partitioner is not None:
+            cpu_partition = self.cpu_partitioner.acquire()
+            pin_current_thread(self.cpu_partitioner.partitions[cpu_partition])
+            intra_op_threads = len(self.cpu_partitioner.partitions[cpu_partition])
+
+        try:
+            # Initialize the ship detection model
+            ship_detection = ObjectDetection(Path(self.app_config.INBOX_FOLDER, self.app_config.MODEL_FILENAME), intra_op_threads=intra_op_threads)
+
+            # Run one blank frame so onnxruntime's lazy initialization is paid before the first image arrives
+            if self.app_config.MODEL_WARMUP_ENABLED:
+                ship_detection.predict_image(np.zeros((ship_detection.input_shape[0], ship_detection.input_shape[1], 3), dtype=np.uint8))
+            with self._workers_lock:
+                self._warm_workers += 1
+                self._workers_warmed_up.notify_all()
+
+            # Start monitoring the image queue
+            while not self._retire_worker():
+                # Get the next image from the queue, waking up periodically to check whether this worker should retire
+                image_job = self.next_image_job(timeout=1.0)
+                if image_job is None:
+                    continue
+                image_job.dequeued_at = time.monotonic()
+
+                # Everything the image reserves or sets up is undone in the finally block, whatever raises
+                reserved = 0
+                try:
+                    # Hold the image until its decoded footprint fits the memory budget
+                    if self.memory_governor is not None:
+                        footprint = estimate_footprint(image_job.image_path, scale=self.app_config.IMAGE_DECODE_SCALE)
+                        if not self.memory_governor.acquire(footprint, timeout=0):
+                            logger.info(f"Waiting for {footprint / (1024 * 1024):.0f} MB of the memory budget to process {image_job.image_path}")
+                            self.memory_governor.acquire(footprint)
+                        reserved = footprint
+
+                    # Settings reloaded from app-config.json apply from the next image on, never halfway through one
+                    self._image_config.snapshot = self.config_store.snapshot
+
+                    # Profile the image if a profiling run was asked for through the config or the inbox
+                    self.profiling.poll(self.app_config.INBOX_FOLDER, self.app_config.PROFILING_IMAGES)
+                    profiling_run = self.profiling.claim()
+
+                    with self._workers_lock:
+                        self._busy_workers += 1
+                    try:
+                        with STAGE_TIMINGS.time("image"):
+                            if profiling_run is None:
+                                self.process_image(ship_detection=ship_detection, image_job=image_job)
+                            else:
+                                self.process_image_profiled(profiling_run=profiling_run, image_job=image_job, intra_op_threads=intra_op_threads)
+                    finally:
+                        with self._workers_lock:
+                            self._busy_workers -= 1
+
+                    self.slo_tracker.record(image_job)
+                    self.slo_tracker.check(self.app_config.SLO_LATENCY_SECONDS, self.app_config.SLO_PERCENTILE)
+                except Exception as error:
+                    # One bad image must not take the worker down, nor be resumed from the work journal on every restart
+                    logger.exception(f"Failed to process {image_job.image_path}: {error}")
+                    PIPELINE_COUNTERS.increment("images_failed")
+                    if self.work_journal is not None:
+                        self.work_journal.record_failed(image_job.image_path, str(error))
+                finally:
+                    self._image_config.snapshot = None
+                    if reserved:
+                        self.memory_governor.release(reserved)
+        except Exception:
+            # The worker dies with the error; stop counting it so the autoscaler can replace it
+            with self._workers_lock:
+                self._workers -= 1
+                self._workers_warmed_up.notify_all()
+            raise
+        finally:
+            if cpu_partition is not None:
+                self.cpu_partitioner.release(cpu_partition)
+
+    def process_image(self, ship_detection:ObjectDetection, image_job:ImageJob):
+        """
+        Runs ship detection on a queued image and writes the original, augmented and chipped images to the outbox.
+        """
+        input_image_path = Path(image_job.image_path)
+        image_started = time.perf_counter()
+        logger.debug("Processing %s", input_image_path)
+
+        # Products are grouped under the tracking ID of the tasking request that delivered the image
+        output_folder = image_job.output_folder(self.app_config.OUTBOX_FOLDER)
+        output_folder_chips = Path(output_folder, self.app_config.OUTBOX_FOLDER_CHIPS)
+        output_folder_chips.mkdir(parents=True, exist_ok=True)
+
+        # Read the image into memory, only the bands the model uses and at the configured resolution
+        with STAGE_TIMINGS.time("decode"):
+            decoded_image = decode_image(str(input_image_path), scale=self.app_config.IMAGE_DECODE_SCALE)
+        raw_image = decoded_image.pixels
+        img_height, img_width, img_channels = raw_image.shape
 
-            # Save the augmented image
-            self.save_image(raw_image, augmented_file_path)
+        aoi = self.aoi_source.get(self.app_config.AOI_POLYGONS,
+                                  os.path.join(self.app_config.INBOX_FOLDER, self.app_config.AOI_FILENAME) if self.app_config.AOI_FILENAME else "")
+
+        # GSD-adaptive chipping, areas of interest, change detection, the detection index and vessel tracking need the GeoTIFF's georeferencing
+        needs_georeference = (self.app_config.MODEL_TARGET_GSD > 0 or aoi is not None or self.tile_store is not None
+                              or self.detection_index is not None or self.vessel_tracker is not None)
+        georeference = GeoReference.from_file(str(input_image_path)) if needs_georeference else None
+        if georeference is not None and (img_width, img_height) != (decoded_image.full_width, decoded_image.full_height):
+            georeference = georeference.scaled(decoded_image.scale_x, decoded_image.scale_y)
+        captured_at = capture_time(str(input_image_path)) if georeference is not None else None
+
+        # Size the chips so ships have the pixel footprint the model expects, or by the static chipping scale without a GSD
+        chip_sizing = plan_chips(img_width, img_height, ship_detection.input_shape, self.app_config.IMG_CHIPPING_SCALE,
+                                 georeference.ground_sample_distance if georeference is not None else None, self.app_config.MODEL_TARGET_GSD)
+        chip_max_height, chip_max_width = chip_sizing.chip_height, chip_sizing.chip_width
+
+        # Log the image and chip sizes
+        logger.debug("Image size: %dx%d, GSD: %s, tensor size: %dx%d, scale factor: %.2f (%dx%d), chips: %d", img_width, img_height,
+                     chip_sizing.ground_sample_distance, ship_detection.input_shape[0], ship_detection.input_shape[1], chip_sizing.scale,
+                     chip_max_height, chip_max_width, chip_sizing.tiles)
+
+        # Only the chips that touch an area of interest are inferred
+        aoi_priorities = None
+        tile_mask = None
+        if aoi is not None and georeference is not None:
+            with STAGE_TIMINGS.time("aoi"):
+                aoi_priorities = aoi.tile_priorities(georeference, img_width, img_height, chip_max_width, chip_max_height)
+            tile_mask = aoi_priorities > 0
+        elif aoi is not None:
+            logger.debug("%s is not georeferenced.  Processing every chip regardless of the areas of interest", input_image_path)
+        tiles_outside_aoi = int(tile_mask.size - np.count_nonzero(tile_mask)) if tile_mask is not None else 0
+
+        # Re-delivered scenes are answered from the result cache instead of being re-inferred
+        cache_key = None
+        cached_detections = None
+        if self.result_cache is not None:
+            cache_key = ResultCache.make_key(ResultCache.hash_file(str(input_image_path)), self.model_hash,
+                                             self.app_config.DETECTION_THRESHOLD, chip_max_height, chip_max_width, self.app_config.IMAGE_DECODE_SCALE,
+                                             aoi.fingerprint if tile_mask is not None else "")
+            cached_detections = self.result_cache.get(cache_key)
+
+        # Save the original image
+        self.save_image(raw_image, Path(output_folder, f"{input_image_path.stem}_orig.jpg"))
+
+        # With a time budget, the chips likeliest to hold ships are inferred first and inference stops when the budget runs out
+        time_budget = self.app_config.IMAGE_TIME_BUDGET_SECONDS
+        large_image = img_width > chip_max_width or img_height > chip_max_height
+        tile_order = None
+        coverage = None
+        if time_budget > 0 and large_image and cached_detections is None:
+            with STAGE_TIMINGS.time("prioritize"):
+                previous_detections = None
+                if georeference is not None and self.detection_index is not None:
+                    previous_detections = self.previous_detection_counts(georeference, img_width, img_height, chip_max_width, chip_max_height)
+                tile_order = ordered_tiles(tile_priorities(raw_image, chip_max_height, chip_max_width, aoi_priorities, previous_detections),
+                                           chip_max_height, chip_max_width, tile_mask)
+            coverage = TileCoverage()
+
+        # Run ship detection on the image or on each chip of the image
+        if cached_detections is not None:
+            logger.debug("Result cache hit for %s.  Skipping inference", input_image_path)
+            all_detections = [ShipDetection.from_dict(detection) for detection in cached_detections]
+        elif tile_mask is not None and not tile_mask.any():
+            logger.debug("%s does not touch any area of interest.  Skipping inference", input_image_path)
+            all_detections = []
+        elif large_image:
+            all_detections = self.run_ship_detection_large_image(ship_detection=ship_detection, raw_image=raw_image, chip_max_height=chip_max_height, chip_max_width=chip_max_width, image_path=image_job.image_path, georeference=georeference, resample=chip_sizing.resample, tile_mask=tile_mask,
+                                                                 tile_order=tile_order, deadline=image_started + time_budget if coverage is not None else None, completed_tiles=image_job.completed_tiles, coverage=coverage,
+                                                                 decode_scale=self.app_config.IMAGE_DECODE_SCALE)
+        else:
+            all_detections = self.run_ship_detection(ship_detection=ship_detection, raw_image=raw_image, resample=chip_sizing.resample)
+
+        image_job.inference_done_at = time.monotonic()
+
+        # Partial results are written as they are, and the rest of the image is optionally left for when no new image is waiting
+        partial = coverage is not None and coverage.budget_exhausted
+        requeued = False
+        if partial:
+            PIPELINE_COUNTERS.increment("images_over_budget")
+            PIPELINE_COUNTERS.increment("tiles_over_budget", len(coverage.unprocessed))
+            if self.app_config.IMAGE_TIME_BUDGET_REQUEUE:
+                # The deferred pass keeps the image's timestamps, so its end-to-end latency runs from the original SensorData
+                DEFERRED_QUEUE.put(dataclasses.replace(image_job, completed_tiles=coverage.completed_tiles))
+                requeued = True
+
+        # A pass that leaves chips for later writes its products to a folder of its own, replaced on every pass and removed once
+        # the image is complete, so the final products are numbered and chipped from all of the image's detections at once
+        partial_folder = Path(output_folder, PARTIAL_FOLDER, input_image_path.stem)
+        shutil.rmtree(partial_folder, ignore_errors=True)
+        if requeued:
+            output_folder = partial_folder
+            output_folder_chips = Path(output_folder, self.app_config.OUTBOX_FOLDER_CHIPS)
+            output_folder_chips.mkdir(parents=True, exist_ok=True)
+
+        if coverage is not None:
+            with open(Path(output_folder, f"{input_image_path.stem}_coverage.json"), 'w', encoding='utf-8') as f:
+                json.dump({**coverage.to_dict(), 'budget_seconds': time_budget, 'requeued': requeued}, f)
+
+        if cache_key is not None and cached_detections is None and not partial:
+            self.result_cache.put(cache_key, [detection.to_dict() for detection in all_detections])
+
+        if georeference is not None and self.tile_store is not None:
+            try:
+                self.tile_store.save()
+            except OSError as error:
+                logger.warning(f"Unable to save the tile store: {error}")
+
+        # Images still being processed are indexed and tracked once, on the pass that completes them
+        if georeference is not None and self.detection_index is not None and not requeued:
+            with STAGE_TIMINGS.time("index"):
+                self.detection_index.add(input_image_path.name, all_detections, georeference, tracking_id=image_job.tracking_id, captured_at=captured_at)
+
+        # With vessel tracking, only new and moved vessels get chips; the rest were chipped on an earlier capture
+        chipped_detections = None
+        if georeference is not None and self.vessel_tracker is not None and not requeued:
+            # Only the chips that were searched can show a vessel is gone, not those outside the areas of interest or the time budget
+            searched_tiles = None
+            if tile_mask is not None or partial:
+                searched_tiles = tile_mask.copy() if tile_mask is not None else np.ones((-(-img_height // chip_max_height), -(-img_width // chip_max_width)), dtype=bool)
+                for chip_x_start, chip_y_start, _, _ in (coverage.unprocessed if partial else []):
+                    searched_tiles[chip_y_start // chip_max_height, chip_x_start // chip_max_width] = False
+            with STAGE_TIMINGS.time("track"):
+                track_events = self.track_vessels(all_detections, georeference, img_width, img_height, captured_at,
+                                                  searched_tiles, chip_max_width, chip_max_height)
+            chipped_detections = {event.detection for event in track_events if event.event in ("new", "moved")}
+            with open(Path(output_folder, f"{input_image_path.stem}_tracks.json"), 'w', encoding='utf-8') as f:
+                json.dump([event.to_dict() for event in track_events if event.event != "stationary"], f)
+
+        # Prepare the filename for the augmented image
+        augmented_file_path = Path(output_folder, f"{input_image_path.stem}_augmented.jpg")
+
+        # Loop over each detection
+        annotate_seconds = 0.0
+        for i, detection in enumerate(all_detections, start=1):
+            # Draw the detection on the image
+            annotate_started = time.perf_counter()
+            raw_image = self.write_hitboxes(raw_image=raw_image, detection=detection, ship_num=i)
+            annotate_seconds += time.perf_counter() - annotate_started
+
+            if chipped_detections is not None and i - 1 not in chipped_detections:
+                PIPELINE_COUNTERS.increment("stationary_chips_skipped")
+                continue
+
+            # Calculate the coordinates of the ship image with padding
+            ship_start_x = max(0, detection.x_coordinate - self.app_config.IMG_CHIPPING_PADDING)
+            ship_start_y = max(0, detection.y_coordinate - self.app_config.IMG_CHIPPING_PADDING)
+            ship_end_x = min(img_width, detection.x_coordinate + detection.width + self.app_config.IMG_CHIPPING_PADDING)
+            ship_end_y = min(img_height, detection.y_coordinate + detection.height + self.app_config.IMG_CHIPPING_PADDING)
+
+            # Extract the ship image from the raw image
+            cropped_ship_img = raw_image[int(ship_start_y):int(ship_end_y), int(ship_start_x):int(ship_end_x)]
+
+            # Save the ship image
+            self.save_image(cropped_ship_img, Path(output_folder_chips, f"{input_image_path.stem}_ship_{i}.jpg"))
+
+        STAGE_TIMINGS.record("annotate", annotate_seconds)
+
+        # Sample memory while the image is still held so the autoscaler sees the per-worker peak
+        if self.autoscaler is not None:
+            self.autoscaler.record_memory(process_rss(), self.busy_workers)
+
+        # Save the augmented image
+        self.save_image(raw_image, augmented_file_path)
+        # An image's products are only written once its last pass is done; earlier passes do not count towards the SLO
+        if not requeued:
+            image_job.products_written_at = time.monotonic()
+
+        # A re-queued image stays pending in the work journal until its last chip is done
+        if self.work_journal is not None and not requeued:
+            self.work_journal.record_done(image_job.image_path)
+
+        PIPELINE_COUNTERS.increment("images_processed")
+        PIPELINE_COUNTERS.increment("detections", len(all_detections))
+        if cached_detections is not None:
+            PIPELINE_COUNTERS.increment("result_cache_hits")
+        if tiles_outside_aoi:
+            PIPELINE_COUNTERS.increment("tiles_outside_aoi", tiles_outside_aoi)
+
+        # One structured line per image instead of one per detection
+        if logger.isEnabledFor(logging.INFO):
+            # The compute saved by the areas of interest is estimated from the mean time of a chip so far
+            tile_timings = STAGE_TIMINGS.snapshot().get("tile") if tiles_outside_aoi else None
+            sampled_detections = sorted(all_detections, key=lambda detection: detection.probability, reverse=True)[:self.app_config.LOG_SAMPLED_DETECTIONS]
+            logger.info(LogEvent("image_processed",
+                                 image=input_image_path.name,
+                                 tracking_id=image_job.tracking_id,
+                                 width=img_width,
+                                 height=img_height,
+                                 gsd=chip_sizing.ground_sample_distance,
+                                 chip=f"{chip_max_width}x{chip_max_height}",
+                                 tiles=chip_sizing.tiles,
+                                 tiles_outside_aoi=tiles_outside_aoi,
+                                 aoi_skipped_share=tiles_outside_aoi / tile_mask.size if tile_mask is not None else 0.0,
+                                 aoi_seconds_saved=tiles_outside_aoi * tile_timings.mean if tile_timings is not None else 0.0,
+                                 coverage=coverage.fraction if coverage is not None else 1.0,
+                                 requeued=requeued,
+                                 detections=len(all_detections),
+                                 cache_hit=cached_detections is not None,
+                                 seconds=time.perf_counter() - image_started,
+                                 end_to_end=image_job.end_to_end(),
+                                 top=";".join(f"{detection.probability:.2f}@{detection.x_coordinate},{detection.y_coordinate},{detection.width}x{detection.height}"
+                                              for detection in sampled_detections)))
+
+    def process_image_profiled(self, profiling_run:ProfilingRun, image_job:ImageJob, intra_op_threads:int = 0):
+        """
+        Processes an image under cProfile and tracemalloc, with its own inference session that has onnxruntime's profiler enabled.
+        """
+        logger.info(f"Profiling {image_job.image_path}")
+        try:
+            profiling_run.output_folder.mkdir(parents=True, exist_ok=True)
+            ship_detection = ObjectDetection(Path(self.app_config.INBOX_FOLDER, self.app_config.MODEL_FILENAME), intra_op_threads=intra_op_threads,
+                                             profile_prefix=str(Path(profiling_run.output_folder, f"onnxruntime_{threading.get_ident()}")))
+            # Loaded and warmed up before profiling starts; the warmup run is left out of the operator times
+            ship_detection.predict_image(np.zeros((ship_detection.input_shape[0], ship_detection.input_shape[1], 3), dtype=np.uint8))
+        except Exception:
+            profiling_run.release_claim()
+            raise
+
+        with profiling_run.profile_image(image_job.image_path):
+            try:
+                self.process_image(ship_detection=ship_detection, image_job=image_job)
+            finally:
+                profiling_run.add_onnxruntime_profile(ship_detection.end_profiling())
+
+    def track_vessels(self, detections:List[ShipDetection], georeference:GeoReference, img_width:int, img_height:int, captured_at:Optional[float] = None,
+                      searched_tiles:np.ndarray = None, chip_max_width:int = None, chip_max_height:int = None) -> List[TrackEvent]:
+        """
+        Associates an image's detections with the vessel tracks, by the longitude and latitude of their centres, and saves the tracks.
+        With searched_tiles, which chips of the image's chip grid were searched for ships, only tracks in those chips can be missed.
+        """
+        longitudes, latitudes = np.empty(0), np.empty(0)
+        if detections:
+            longitudes, latitudes = georeference.pixel_to_lonlat(np.array([detection.x_coordinate + detection.width / 2 for detection in detections], dtype=float),
+                                                                 np.array([detection.y_coordinate + detection.height / 2 for detection in detections], dtype=float))
+
+        observed = None
+        if searched_tiles is not None:
+            def observed(track_longitudes, track_latitudes):
+                xs, ys = georeference.lonlat_to_pixel(track_longitudes, track_latitudes)
+                inside = (xs >= 0) & (xs < img_width) & (ys >= 0) & (ys < img_height)
+                searched = np.zeros(len(xs), dtype=bool)
+                searched[inside] = searched_tiles[(ys[inside] // chip_max_height).astype(int), (xs[inside] // chip_max_width).astype(int)]
+                return searched
+
+        track_events = self.vessel_tracker.update(longitudes, latitudes, scene_footprint(georeference, img_width, img_height),
+                                                  captured_at if captured_at is not None else time.time(), observed)
+        try:
+            self.vessel_tracker.save()
+        except OSError as error:
+            logger.warning(f"Unable to save the vessel tracks: {error}")
+        return track_events
+
+    def previous_detection_counts(self, georeference:GeoReference, img_width:int, img_height:int, chip_max_width:int, chip_max_height:int) -> np.ndarray:
+        """
+        Counts the detections the detection index holds from earlier passes in each chip of an image.
+        """
+        detections = self.detection_index.within(*scene_footprint(georeference, img_width, img_height))
+        xs, ys = np.empty(0), np.empty(0)
+        if detections:
+            xs, ys = georeference.lonlat_to_pixel(np.array([detection.longitude for detection in detections]), np.array([detection.latitude for detection in detections]))
+        return count_in_grid(xs, ys, img_width, img_height, chip_max_width, chip_max_height)
 
-            logger.info(f"Finished processing {input_image_path}")
+    def log_slo_breach(self, stats:dict):
+        """
+        Alerts that the end-to-end latency SLO is being breached
+        """
+        logger.warning(LogEvent("slo_breached",
+                                slo_seconds=self.app_config.SLO_LATENCY_SECONDS,
+                                percentile=self.app_config.SLO_PERCENTILE,
+                                p50=stats['p50'],
+                                p95=stats['p95'],
+                                p99=stats['p99'],
+                                images=stats['count'],
+                                images_per_minute=stats['images_per_minute']))
+
+    def log_slo_recovery(self, stats:dict):
+        """
+        Reports that the end-to-end latency SLO is met again
+        """
+        logger.info(LogEvent("slo_recovered",
+                             slo_seconds=self.app_config.SLO_LATENCY_SECONDS,
+                             percentile=self.app_config.SLO_PERCENTILE,
+                             p50=stats['p50'],
+                             p95=stats['p95'],
+                             p99=stats['p99'],
+                             images=stats['count']))
 
     def save_image(self, image, path):
         """
         Saves the given image to the specified path.
         """
-        logger.info(f"Saving image to '{path}'")
-        cv2.imwrite(str(path), image)
-
-    def run_ship_detection_large_image(self, ship_detection:ObjectDetection, raw_image, chip_max_height:int, chip_max_width:int):
+        logger.debug("Saving image to '%s'", path)
+        with STAGE_TIMINGS.time("encode"):
+            encoded, buffer = cv2.imencode(Path(path).suffix, image)
+        if not encoded:
+            logger.error(f"Failed to encode image for '{path}'")
+            return
+        with STAGE_TIMINGS.time("write"):
+            with open(path, 'wb') as f:
+                f.write(buffer)
+
+    def run_ship_detection_large_image(self, ship_detection:ObjectDetection, raw_image, chip_max_height:int, chip_max_width:int, image_path:str = None, georeference:GeoReference = None, resample:int = None, tile_mask:np.ndarray = None,
+                                       tile_order:List[Tuple[int, int]] = None, deadline:float = None, completed_tiles:Dict[str, List[dict]] = None, coverage:TileCoverage = None,
+                                       decode_scale:float = 1.0):
         """
         Runs ship detection on a large image by dividing it into smaller chips and running detection on each chip.
 
@@ -126,6 +732,15 @@ class ImageProcessor:
             raw_image (numpy.ndarray): The raw image on which ship detection is performed.
             chip_max_height (int): The maximum height of each chip.
             chip_max_width (int): The maximum width of each chip.
+            image_path (str, optional): Path of the source image.  When set, completed chips are checkpointed to the work journal and chips finished before a restart are skipped.
+            georeference (GeoReference, optional): Georeferencing of the source image.  When set with change detection enabled, chips unchanged since the last capture reuse their previous detections.
+            resample (int, optional): PIL resampling filter chips are resized to the model's input with, see ChipSizing.  Defaults to the model's default.
+            tile_mask (numpy.ndarray, optional): Which chips to process, by row and column of the chip grid, see AreaOfInterest.tile_mask.  Defaults to every chip.
+            tile_order (list, optional): (y, x) start of the chips in the order to process them, see tile_scheduler.ordered_tiles.  Defaults to row by row.
+            deadline (float, optional): time.perf_counter() by which to stop.  Chips that would not finish by then, after the first, are left unprocessed.  Defaults to no deadline.
+            completed_tiles (dict, optional): Detections of chips already processed, by tile key, see WorkJournal.tile_key, to reuse instead of re-inferring them.
+            coverage (TileCoverage, optional): Filled in with the chips processed and those left unprocessed.
+            decode_scale (float, optional): Resolution the image was decoded at, part of the tile keys. Defaults to 1.
 
         Returns:
             list: A list of ShipDetection objects representing the detected ships in the image.
@@ -136,40 +751,110 @@ class ImageProcessor:
         # Get the shape of the raw image
         orig_img_height, orig_img_width, _ = raw_image.shape
 
-        # Loop through the rows and columns of the image, creating chips
-        for chip_y_start in range(0, orig_img_height, chip_max_height):
-            for chip_x_start in range(0, orig_img_width, chip_max_width):
-                # Calculate the end coordinates of the chip, ensuring they don't exceed the image dimensions
-                chip_y_end = min(chip_y_start + chip_max_height, orig_img_height)
-                chip_x_end = min(chip_x_start + chip_max_width, orig_img_width)
-
-                # Extract the chip from the raw image
-                raw_image_chip = raw_image[chip_y_start:chip_y_end, chip_x_start:chip_x_end]
-
-                # Run ship detection on the chip
-                chipped_detections = self.run_ship_detection(ship_detection=ship_detection, raw_image=raw_image_chip)
-
-                # Adjust the coordinates of the detections based on the chip's position in the image
-                for chipped_detection in chipped_detections:
-                    chipped_detection.x_coordinate += chip_x_start
-                    chipped_detection.y_coordinate += chip_y_start
-
-                    # Log the detection
-                    logger.info(f"Ship detected at ({chipped_detection.x_coordinate}, {chipped_detection.y_coordinate}).  Width: {chipped_detection.width}  Height: {chipped_detection.height}")
-
-                    # Add the detection to the list of all detections
-                    all_detections.append(chipped_detection)
+        # Chips finished before a restart, or before the image ran out of its time budget, are reloaded instead of re-inferred
+        journal = self.work_journal if image_path else None
+        completed_tiles = {**(journal.completed_tiles(image_path) if journal else {}), **(completed_tiles or {})}
+        tile_store = self.tile_store if georeference is not None else None
+        tile_context = TileStore.make_context(self.model_hash, self.app_config.DETECTION_THRESHOLD, self.app_config.DETECTION_LABELS) if tile_store is not None else ""
+        reused_tiles = 0
+        total_tiles = 0
+
+        # Chips are only reloaded from the same chip grid and decode resolution
+        def tile_key(chip_y_start, chip_x_start):
+            return WorkJournal.tile_key(chip_y_start, chip_x_start, chip_max_height, chip_max_width, decode_scale)
+
+        # Chips are processed in the given order, by default row by row, leaving out those outside the tile mask
+        tiles = tile_order if tile_order is not None else chip_grid(orig_img_width, orig_img_height, chip_max_width, chip_max_height)
+        if tile_mask is not None:
+            tiles = [(chip_y_start, chip_x_start) for chip_y_start, chip_x_start in tiles if tile_mask[chip_y_start // chip_max_height, chip_x_start // chip_max_width]]
+        # Reloaded chips go first, so none are lost if the deadline is reached
+        tiles = sorted(tiles, key=lambda tile: tile_key(*tile) not in completed_tiles)
+        if coverage is not None:
+            coverage.tiles_total = len(tiles)
+        inferred_tiles = 0
+        inference_seconds = 0.0
+
+        for tile_index, (chip_y_start, chip_x_start) in enumerate(tiles):
+            key = tile_key(chip_y_start, chip_x_start)
+            if key in completed_tiles:
+                all_detections.extend(ShipDetection.from_dict(detection) for detection in completed_tiles[key])
+                if coverage is not None:
+                    coverage.completed_tiles[key] = completed_tiles[key]
+                continue
+
+            # Stop before a chip that would not finish within the budget, going by the chips of this image so far.  At least one
+            # chip is inferred per call, so an image re-queued with its remaining chips always makes progress
+            if deadline is not None and inferred_tiles and time.perf_counter() + inference_seconds / inferred_tiles > deadline:
+                if coverage is not None:
+                    coverage.unprocessed = [(x, y, min(chip_max_width, orig_img_width - x), min(chip_max_height, orig_img_height - y))
+                                            for y, x in tiles[tile_index:] if tile_key(y, x) not in completed_tiles]
+                break
+
+            tile_started = time.perf_counter()
+
+            # Calculate the end coordinates of the chip, ensuring they don't exceed the image dimensions
+            chip_y_end = min(chip_y_start + chip_max_height, orig_img_height)
+            chip_x_end = min(chip_x_start + chip_max_width, orig_img_width)
+
+            # Extract the chip from the raw image
+            raw_image_chip = raw_image[chip_y_start:chip_y_end, chip_x_start:chip_x_end]
+
+            total_tiles += 1
+            PIPELINE_COUNTERS.increment("tiles_processed")
+
+            # Reuse the previous capture's detections if the chip has not changed, otherwise run ship detection on it
+            chipped_detections = None
+            if tile_store is not None:
+                tile_id = TileStore.tile_id(georeference, chip_x_start, chip_y_start, chip_x_end, chip_y_end)
+                tile_fingerprint = tile_store.fingerprint(raw_image_chip)
+                previous_detections = tile_store.lookup(tile_id, tile_fingerprint, tile_context)
+                if previous_detections is not None:
+                    chipped_detections = [ShipDetection.from_dict(detection) for detection in previous_detections]
+                    reused_tiles += 1
+                    PIPELINE_COUNTERS.increment("tiles_reused")
+
+            if chipped_detections is None:
+                chipped_detections = self.run_ship_detection(ship_detection=ship_detection, raw_image=raw_image_chip, resample=resample)
+                if tile_store is not None:
+                    tile_store.update(tile_id, tile_fingerprint, [detection.to_dict() for detection in chipped_detections], tile_context)
+
+            # Adjust the coordinates of the detections based on the chip's position in the image
+            for chipped_detection in chipped_detections:
+                chipped_detection.x_coordinate += chip_x_start
+                chipped_detection.y_coordinate += chip_y_start
+
+                # Log the detection; the image's summary line lists the strongest detections at INFO
+                logger.debug("Ship detected at (%d, %d).  Width: %d  Height: %d", chipped_detection.x_coordinate, chipped_detection.y_coordinate, chipped_detection.width, chipped_detection.height)
+
+                # Add the detection to the list of all detections
+                all_detections.append(chipped_detection)
+
+            if journal or coverage is not None:
+                tile_detections = [chipped_detection.to_dict() for chipped_detection in chipped_detections]
+                if journal:
+                    journal.record_tile(image_path, key, tile_detections)
+                if coverage is not None:
+                    coverage.completed_tiles[key] = tile_detections
+
+            tile_seconds = time.perf_counter() - tile_started
+            inferred_tiles += 1
+            inference_seconds += tile_seconds
+            STAGE_TIMINGS.record("tile", tile_seconds)
+
+        if tile_store is not None:
+            logger.info(f"Change detection reused {reused_tiles} of {total_tiles} chips unchanged since the last capture")
 
         # Return the list of all detections
         return all_detections
 
-    def run_ship_detection(self, ship_detection:ObjectDetection, raw_image):
+    def run_ship_detection(self, ship_detection:ObjectDetection, raw_image, resample:int = None):
         """
         Runs ship detection on the given raw image using the provided ship detection model.
 
         Args:
             ship_detection (ObjectDetection): The ship detection model used for prediction.
             raw_image (numpy.ndarray): The raw image on which ship detection is performed.
+            resample (int, optional): PIL resampling filter the image is resized to the model's input with.  Defaults to the model's default.
 
         Returns:
             list: A list of ShipDetection objects representing the detected ships in the image.
@@ -178,7 +863,9 @@ class ImageProcessor:
         orig_img_height, orig_img_width, _ = raw_image.shape
 
         # Run the ship detection model on the raw image
-        ship_predictions = ship_detection.predict_image(raw_image)
+        ship_predictions = ship_detection.predict_image(raw_image, resample)
+
+        parse_started = time.perf_counter()
 
         # Parse the predictions using the detection labels
         ship_predictions = self.parse_predictions(self.app_config.DETECTION_LABELS, ship_predictions)
@@ -196,6 +883,8 @@ class ImageProcessor:
             if ship_hitbox['probability'] >= self.app_config.DETECTION_THRESHOLD
         ]
 
+        STAGE_TIMINGS.record("parse", time.perf_counter() - parse_started)
+
         # Return the list of all detections
         return all_detections
 
@@ -217,9 +906,6 @@ class ImageProcessor:
         color = (0, 0, 255)  # Color for the hitbox and text background (Blue, Green, Red)
         hitbox_thickness = 2  # Thickness of the hitbox outline
 
-        # Make a copy of the original image to use for blending
-        orig_img = raw_image.copy()
-
         # Get image dimensions
         img_height, img_width, img_channels = raw_image.shape
 
@@ -227,11 +913,22 @@ class ImageProcessor:
         hitbox_start_point = (detection.x_coordinate, detection.y_coordinate)
         hitbox_end_point = (detection.x_coordinate + detection.width, detection.y_coordinate + detection.height)
 
+        # Only the pixels under the hitbox outline change, so copy and blend just that region instead of the full frame.  Both
+        # ends are clamped to the image, so a box partly or wholly outside it neither wraps around nor blends an empty region
+        roi_start_x = min(max(0, detection.x_coordinate - hitbox_thickness), img_width)
+        roi_start_y = min(max(0, detection.y_coordinate - hitbox_thickness), img_height)
+        roi_end_x = max(min(img_width, detection.x_coordinate + detection.width + hitbox_thickness + 1), 0)
+        roi_end_y = max(min(img_height, detection.y_coordinate + detection.height + hitbox_thickness + 1), 0)
+        if roi_end_x <= roi_start_x or roi_end_y <= roi_start_y:
+            return raw_image
+        orig_roi = raw_image[roi_start_y:roi_end_y, roi_start_x:roi_end_x].copy()
+
         # Draw the hitbox on the image
-        ship_highlight = cv2.rectangle(raw_image, hitbox_start_point, hitbox_end_point, color, hitbox_thickness)
+        cv2.rectangle(raw_image, hitbox_start_point, hitbox_end_point, color, hitbox_thickness)
 
-        # Blend the original image and the image with the hitbox
-        raw_image = cv2.addWeighted(orig_img, alpha, ship_highlight, 1 - alpha, 0)
+        # Blend the original region and the region with the hitbox
+        ship_highlight = raw_image[roi_start_y:roi_end_y, roi_start_x:roi_end_x]
+        raw_image[roi_start_y:roi_end_y, roi_start_x:roi_end_x] = cv2.addWeighted(orig_roi, alpha, ship_highlight, 1 - alpha, 0)
 
         # Initialize hitbox header position for text display
         hitbox_header_start_x = detection.x_coordinate
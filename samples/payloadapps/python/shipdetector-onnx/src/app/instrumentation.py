@@ -0,0 +1,199 @@
+"""
+Per-stage latency histograms and running totals for the image pipeline
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds of the histogram buckets, Prometheus style; the last bucket is unbounded
+BUCKET_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, float('inf'))
+
+
+class Histogram:
+    """
+    Counts of observed durations per bucket, with their sum and maximum
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        """
+        Adds a duration
+        """
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def copy(self) -> 'Histogram':
+        """
+        Returns an independent copy
+        """
+        histogram = Histogram(self.bounds)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.max = self.max
+        return histogram
+
+    def minus(self, earlier: 'Histogram') -> 'Histogram':
+        """
+        Returns the durations observed since the earlier copy of this histogram.  The maximum stays the overall maximum, which only caps percentiles
+        """
+        histogram = self.copy()
+        histogram.counts = [count - earlier_count for count, earlier_count in zip(self.counts, earlier.counts)]
+        histogram.count -= earlier.count
+        histogram.sum -= earlier.sum
+        return histogram
+
+    @property
+    def mean(self) -> float:
+        """
+        Mean duration in seconds, or 0 if nothing was observed
+        """
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimates a percentile in seconds by interpolating within its bucket, capped at the largest observed duration
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = self.count * percent / 100
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = min(self.bounds[i], self.max)
+                return lower + (max(upper, lower) - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.max
+
+
+class StageTimings:
+    """
+    Thread-safe histograms of how long each pipeline stage takes, keyed by stage name
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def record(self, stage: str, seconds: float):
+        """
+        Adds a duration to the stage's histogram
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """
+        Records how long the block takes, measured with the monotonic performance counter
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        """
+        Returns copies of every stage's histogram since the app started
+        """
+        with self._lock:
+            return {stage: histogram.copy() for stage, histogram in self._histograms.items()}
+
+
+# Timings of the image pipeline, shared by every worker
+STAGE_TIMINGS = StageTimings()
+
+
+class Counters:
+    """
+    Thread-safe running totals, keyed by name
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+
+    def increment(self, name: str, amount: int = 1):
+        """
+        Adds to the named total
+        """
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, int]:
+        """
+        Returns every total since the app started
+        """
+        with self._lock:
+            return dict(self._counts)
+
+
+# Images, tiles, detections and inference sessions handled by the image pipeline, shared by every worker
+PIPELINE_COUNTERS = Counters()
+
+
+class TelemetryPublisher:
+    """
+    Publishes each stage's count, mean, p50, p90 and p99 since the previous publish as integer telemetry metrics,
+    named "<prefix>.<stage>.<statistic>" with durations in milliseconds
+    """
+
+    def __init__(self, send: Callable[[str, int], object], timings: StageTimings = STAGE_TIMINGS, prefix: str = "shipdetector"):
+        """
+        Args:
+            send (Callable): Sends one metric, e.g. spacefx.logging.send_telemetry.
+            timings (StageTimings, optional): Timings to publish. Defaults to the pipeline's timings.
+            prefix (str, optional): Prefix of every metric name. Defaults to "shipdetector".
+        """
+        self.send = send
+        self.timings = timings
+        self.prefix = prefix
+        self._published: Dict[str, Histogram] = {}
+
+    def metrics(self) -> List[Tuple[str, int]]:
+        """
+        Returns the metrics for the stages observed since the previous call, and marks them published
+        """
+        current = self.timings.snapshot()
+        metrics = []
+        for stage, histogram in sorted(current.items()):
+            earlier: Optional[Histogram] = self._published.get(stage)
+            interval = histogram.minus(earlier) if earlier is not None else histogram
+            if interval.count == 0:
+                continue
+            name = f"{self.prefix}.{stage}"
+            metrics += [(f"{name}.count", interval.count),
+                        (f"{name}.mean_ms", round(interval.mean * 1000)),
+                        (f"{name}.p50_ms", round(interval.percentile(50) * 1000)),
+                        (f"{name}.p90_ms", round(interval.percentile(90) * 1000)),
+                        (f"{name}.p99_ms", round(interval.percentile(99) * 1000))]
+        self._published = current
+        return metrics
+
+    def publish(self) -> int:
+        """
+        Sends the metrics since the previous publish
+
+        Returns:
+            int: Number of metrics sent.
+        """
+        metrics = self.metrics()
+        for name, value in metrics:
+            self.send(name, value)
+        return len(metrics)
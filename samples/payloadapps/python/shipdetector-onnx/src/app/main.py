@@ -1,14 +1,22 @@
-import logging
-import sys
-import os
-import sys
 import time
 
-from app_config import AppConfig
-from image_processor import ImageProcessor
+# Measured from here, before the imports below, so the startup timings include them
+STARTUP_STARTED = time.monotonic()
 
-import rasterio
+import asyncio
+import collections
+import logging
+import os
+import sys
 
+from app_core import AppCore
+from config_store import RESTART_REQUIRED_KEYS, ConfigStore
+from image_job import IMAGE_QUEUE
+from instrumentation import STAGE_TIMINGS, TelemetryPublisher
+from metrics_server import MetricsServer
+from startup_graph import StartupGraph
+from structured_logging import LogEvent, install_batching
+from tasking_scheduler import TaskingScheduler, expand_targets
 
 import spacefx
 from spacefx.protos.common.Common_pb2 import StatusCodes
@@ -16,107 +24,398 @@ from spacefx.protos.sensor.Sensor_pb2 import SensorData
 
 logger = spacefx.logger(level=logging.INFO)
 
-import sys
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".protos", "datagenerator", "planetary_computer"))
 
+from PlanetaryComputer_pb2 import EarthImageRequest, EarthImageResponse, GeographicCoordinates
+
+app_core = AppCore()
 
+# Tracking IDs of the most recent SensorData whose images were all queued, used to drop re-delivered messages before any work starts
+RECENT_TRACKING_IDS_LIMIT = 1024
+recent_tracking_ids = collections.OrderedDict()
 
-from PlanetaryComputer_pb2 import EarthImageRequest, EarthImageResponse, GeographicCoordinates
+# Tracking IDs of the SensorData being received; a re-delivery is dropped while the first one is in progress, but handled if it failed
+receiving_tracking_ids = set()
+
+# Created once the config is loaded; frees a tasking slot whenever a request's sensor data has been handled
+tasking_scheduler = None
+
+# Startup steps; the image processor, and with it OpenCV, onnxruntime and the model, loads while the sensor is being tasked
+startup = None
+
+# Set once the first tasking request has been sent, for the startup timing log
+first_tasking_request_sent = False
+
+
+def load_image_processor(config_store):
+    """
+    Imports and starts the image processor.  Deferred so the processing stack loads in the background instead of delaying the first tasking request
+    """
+    started = time.monotonic()
+    from image_processor import ImageProcessor
+    image_processor = ImageProcessor(config_store)
+    logger.info(f"Image processor loaded in {time.monotonic() - started:.2f}s")
+    return image_processor
 
 
 def process_sensor_data(sensor_data):
     """
-    Event handler for Sensor Updates
+    Event handler for Sensor Updates.  Called on a spacefx thread, so the work is handed to the event loop and the callback returns immediately
     """
-    logger.info(f"Received sensor data:")
-    logger.info(f"TrackingId: {sensor_data.responseHeader.trackingId}")
-    logger.info(f"SensorID: {sensor_data.sensorID}")
+    future = app_core.submit_threadsafe(handle_sensor_data(sensor_data))
+    future.add_done_callback(log_sensor_data_failure)
+
+
+def log_sensor_data_failure(future):
+    """
+    Logs the error raised while handling sensor data, if any
+    """
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Failed to process sensor data: {future.exception()}")
+
+
+async def handle_sensor_data(sensor_data):
+    """
+    Parses the sensor data, waits for the imagery transfer and queues the image for processing
+    """
+    sensor_data_at = time.monotonic()
+    logger.info(LogEvent("sensor_data", tracking_id=sensor_data.responseHeader.trackingId, sensor_id=sensor_data.sensorID))
 
     if sensor_data.sensorID != "PlanetaryComputer":
         logger.info(f"SensorID: {sensor_data.sensorID} is not PlanetaryComputer. Ignoring...")
         return
 
-    logger.info(f"Parsing PlanetaryComputer Sensor Data...")
+    if is_duplicate_tracking_id(sensor_data.responseHeader.trackingId):
+        logger.info(f"TrackingID: {sensor_data.responseHeader.trackingId} was already handled. Ignoring duplicate...")
+        return
+
+    received = False
+    try:
+        received = await receive_sensor_payload(sensor_data, sensor_data_at)
+    finally:
+        record_tracking_id(sensor_data.responseHeader.trackingId, received)
+        if tasking_scheduler is not None:
+            tasking_scheduler.complete(sensor_data.responseHeader.trackingId)
+
 
+async def receive_sensor_payload(sensor_data, sensor_data_at):
+    """
+    Parses the EarthImageResponse and waits for all of its image files.  sensor_data_at is the time.monotonic() the SensorData was received
+
+    Returns:
+        bool: True if every image file was received and queued, False if any failed to arrive.
+    """
     sensor_payload = EarthImageResponse()
     sensor_payload.ParseFromString(sensor_data.data.value)
-    logger.info("EarthImageResponse Sensor Data: %s", sensor_payload)
+    logger.debug("EarthImageResponse Sensor Data: %s", sensor_payload)
+
+    if not sensor_payload.imageFiles:
+        logger.warning(f"TrackingID: {sensor_data.responseHeader.trackingId} has no image files. Ignoring...")
+        return True
+
+    inbox_folder = str(spacefx.link.get_xfer_directories()["inbox"])
+    tracking_id = sensor_data.responseHeader.trackingId
+
+    # Wait for every asset at once; each one is queued as soon as its own transfer completes
+    logger.debug("Waiting for %d image file(s) for TrackingID: %s...", len(sensor_payload.imageFiles), tracking_id)
+    results = await asyncio.gather(*[receive_image_file(inbox_folder, image_file, tracking_id, sensor_data_at) for image_file in sensor_payload.imageFiles], return_exceptions=True)
+
+    received = True
+    for image_file, result in zip(sensor_payload.imageFiles, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to receive {image_file.fileName} for TrackingID: {tracking_id}: {result}")
+            received = False
+    return received
 
-    geotiff_img = str(spacefx.link.get_xfer_directories()["inbox"])
 
-    geotiff_img = f"{geotiff_img}/{sensor_payload.imageFiles[0].fileName}"
-    logger.info(f"TrackingID: {sensor_data.responseHeader.trackingId}")
-    logger.info(f"Asset: {sensor_payload.imageFiles[0].asset}")
-    logger.info(f"Filename: {sensor_payload.imageFiles[0].fileName}")
+def is_duplicate_tracking_id(tracking_id):
+    """
+    Returns True if SensorData with this trackingId was already handled or is being received, otherwise marks it as being received.
+    Only runs on the event loop, so no locking is needed
+    """
+    if not tracking_id:
+        return False
+
+    if tracking_id in recent_tracking_ids:
+        recent_tracking_ids.move_to_end(tracking_id)
+        return True
+    if tracking_id in receiving_tracking_ids:
+        return True
+
+    receiving_tracking_ids.add(tracking_id)
+    return False
+
+
+def record_tracking_id(tracking_id, received):
+    """
+    Records that SensorData with this trackingId is no longer being received.  It is only remembered as handled if all of its
+    images were queued, so a re-delivery after a failed or timed out transfer is processed
+    """
+    if not tracking_id:
+        return
+
+    receiving_tracking_ids.discard(tracking_id)
+    if not received:
+        return
+
+    recent_tracking_ids[tracking_id] = None
+    if len(recent_tracking_ids) > RECENT_TRACKING_IDS_LIMIT:
+        recent_tracking_ids.popitem(last=False)
+
+
+async def receive_image_file(inbox_folder, image_file, tracking_id, sensor_data_at=None):
+    """
+    Waits for a single image file to be delivered to the inbox and queues it for processing
+    """
+    geotiff_img = f"{inbox_folder}/{image_file.fileName}"
 
     # Wait for the file to appear, using the associated linkResponse to indicate that the file is ready to use
     geotiff_img_linkresponse = f"{geotiff_img}.linkResponse"
 
-    logger.info(f"Waiting for {geotiff_img_linkresponse}...")
-    file_available_timeout = time.time() + 300  # seconds
-    while (not os.path.isfile(geotiff_img_linkresponse)) and (time.time() < file_available_timeout):
-        time.sleep(1)
+    logger.debug("TrackingID: %s Asset: %s waiting for %s...", tracking_id, image_file.asset, geotiff_img_linkresponse)
+    with STAGE_TIMINGS.time("file_wait"):
+        await app_core.wait_for_file(geotiff_img_linkresponse, timeout=300)
+    file_ready_at = time.monotonic()
 
     if not os.path.isfile(geotiff_img):
         logger.error(f"Failed to receive {geotiff_img_linkresponse}")
         raise TimeoutError(f"Failed to receive {geotiff_img}")
 
 
-    logger.info(f"PlanetaryComputer Geotiff Image Received: {geotiff_img}.  Processing...")
-    ImageProcessor.add_image_to_queue(geotiff_img)
+    logger.debug("PlanetaryComputer Geotiff Image Received: %s", geotiff_img)
+    image_processor = await startup.result("image_processor")
+    image_processor.add_image_to_queue(geotiff_img, tracking_id=tracking_id, sensor_data_at=sensor_data_at, file_ready_at=file_ready_at)
 
 
-def main():
+def build_earth_image_request(latitude, longitude):
     """
-    Initialize SpaceFx, subscribe to sensor and heartbeat, and submit a request to sensor
+    Builds the PlanetaryComputer request for imagery at the given coordinates
     """
+    earth_image_request = EarthImageRequest()
+    line_of_sight = GeographicCoordinates()
+    line_of_sight.latitude = latitude
+    line_of_sight.longitude = longitude
+    earth_image_request.collection = "naip"
+    earth_image_request.asset.append("image")
+    earth_image_request.geographicCoordinates.CopyFrom(line_of_sight)
+    return earth_image_request
 
-    print("Building Client...")
-    spacefx.client.build()
 
-    app_config = AppConfig()
-    image_processor = ImageProcessor()
+async def pre_check_imagery(target):
+    """
+    Asks the PlanetaryComputer sensor whether it will accept a tasking request for the target, ahead of sending it
+    """
+    latitude, longitude = target
+    payload_metadata = {"SOURCE_PAYLOAD_APP_ID": spacefx.client.get_app_id()}
+
+    pre_check_response = await app_core.run_blocking(spacefx.sensor.sensor_tasking_pre_check, "PlanetaryComputer", build_earth_image_request(latitude, longitude), metadata=payload_metadata)
+    if pre_check_response.responseHeader.status not in [StatusCodes.PENDING, StatusCodes.SUCCESSFUL]:
+        logger.info(f"Sensor Tasking Pre-Check for ({latitude}, {longitude}) failed: {pre_check_response.responseHeader.status}")
+        return False
+    return True
 
-    for key, value in vars(app_config).items():
-        logger.info(f"AppConfig {key} : {value}")
+
+async def request_imagery(target):
+    """
+    Tasks the PlanetaryComputer sensor for imagery at the target.  Safe to run many at once; each request only holds an executor slot while the spacefx call is blocked
+
+    Returns:
+        str: TrackingId of the accepted request, or None if the sensor did not accept it.
+    """
+    global first_tasking_request_sent
+
+    latitude, longitude = target
+    logger.info(f"Tasking PlanetaryComputer sensor for ({latitude}, {longitude})...")
+
+    if not first_tasking_request_sent:
+        first_tasking_request_sent = True
+        logger.info(f"Startup: first tasking request sent {time.monotonic() - STARTUP_STARTED:.2f}s after start")
+
+    payload_metadata = {"SOURCE_PAYLOAD_APP_ID": spacefx.client.get_app_id()}
+
+    sensor_response = await app_core.run_blocking(spacefx.sensor.sensor_tasking, "PlanetaryComputer", build_earth_image_request(latitude, longitude), metadata=payload_metadata)
+    logger.info(
+        "Sensor Tasking Request Status: %s",
+        sensor_response.responseHeader.status,
+    )
+    if sensor_response.responseHeader.status not in [StatusCodes.PENDING, StatusCodes.SUCCESSFUL]:
+        return None
+    return sensor_response.responseHeader.trackingId
+
+
+def warm_up_models(image_processor):
+    """
+    Waits until every image processing worker has loaded and warmed up its model
+    """
+    if not image_processor.wait_until_ready():
+        logger.warning("Image processing workers did not finish warming up")
 
 
+async def subscribe_to_sensor_data(_client):
+    """
+    Subscribes to SensorData once the client is built
+    """
     logger.info("Subscribing to SensorData...")
     spacefx.sensor.subscribe_to_sensor_data(callback_function=process_sensor_data)
 
+
+async def discover_sensors(_client):
+    """
+    Queries the sensors available once the client is built
+
+    Returns:
+        list: SensorIDs of the available sensors.
+    """
     logger.info("Querying sensors...")
-    sensors_avaliable = spacefx.sensor.get_available_sensors()
+    sensors_avaliable = await app_core.run_blocking(spacefx.sensor.get_available_sensors)
     for sensor in sensors_avaliable.sensors:
         logger.info("Sensors Found: %s", sensor.sensorID)
+    return [sensor.sensorID for sensor in sensors_avaliable.sensors]
+
+
+def build_startup_graph():
+    """
+    Declares the startup steps.  Loading and warming up the models only depends on the config, so it overlaps with
+    the client build, sensor discovery and the first tasking round-trip
+    """
+    graph = StartupGraph(app_core, origin=STARTUP_STARTED)
+    graph.add_step("client", spacefx.client.build)
+    graph.add_step("config", ConfigStore.shared)
+    graph.add_step("image_processor", load_image_processor, depends_on=["config"])
+    graph.add_step("model_warmup", warm_up_models, depends_on=["image_processor"])
+    graph.add_step("subscribe", subscribe_to_sensor_data, depends_on=["client"])
+    graph.add_step("sensors", discover_sensors, depends_on=["client"])
+    return graph
+
+
+def log_config_change(app_config, changed_keys):
+    """
+    Logs the settings changed by a reload of app-config.json
+    """
+    for key in changed_keys:
+        logger.info(f"AppConfig reloaded {key} : {getattr(app_config, key)}")
+        if key in RESTART_REQUIRED_KEYS:
+            logger.warning(f"AppConfig {key} only takes effect after a restart")
+
+
+def log_config_error(error):
+    """
+    Logs a change to app-config.json that could not be applied
+    """
+    logger.error(f"Ignoring changed app-config.json, keeping the current config: {error}")
+
+
+async def publish_stage_timings(interval):
+    """
+    Periodically publishes the pipeline's per-stage latency histograms and rolling SLO statistics as telemetry
+    """
+    publisher = TelemetryPublisher(spacefx.logging.send_telemetry)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await app_core.run_blocking(publisher.publish)
+
+            # Rolling end-to-end latency and throughput, once the image processor is up
+            image_processor = await startup.result("image_processor")
+            for name, value in image_processor.slo_tracker.metrics():
+                await app_core.run_blocking(spacefx.logging.send_telemetry, name, value)
+        except Exception as error:
+            logger.warning(f"Failed to publish stage timings: {error}")
+
+
+async def serve_metrics(port):
+    """
+    Serves the pipeline's metrics on /metrics once the image processor is up
+    """
+    image_processor = await startup.result("image_processor")
+    try:
+        metrics_server = MetricsServer(port, gauges=image_processor.metrics_gauges)
+    except OSError as error:
+        logger.warning(f"Failed to serve metrics on port {port}: {error}")
+        return
+    metrics_server.start()
+    logger.info(f"Serving metrics on port {metrics_server.port} at /metrics")
+
+
+async def log_startup_timings():
+    """
+    Logs every startup step's timing and the critical path once startup has finished
+    """
+    try:
+        await startup.wait()
+    except Exception:
+        pass
+    for line in startup.timing_report():
+        logger.info(line)
+
+
+async def main_async():
+    """
+    Initialize SpaceFx, subscribe to sensor and heartbeat, and submit a request to sensor
+    """
+    global tasking_scheduler, startup
+
+    logger.info(f"Startup: modules imported {time.monotonic() - STARTUP_STARTED:.2f}s after start")
+
+    print("Building Client...")
+    startup = build_startup_graph()
+    startup.start()
+    app_core.spawn(log_startup_timings())
+
+    config_store = await startup.result("config")
+    app_config = config_store.snapshot
+
+    for key, value in vars(app_config).items():
+        if not key.startswith('_'):
+            logger.info(f"AppConfig {key} : {value}")
+
+    # Everything logged from here on goes out in batches, with chatty call sites rate limited
+    install_batching(logger, app_config.LOG_BATCH_SIZE, app_config.LOG_FLUSH_INTERVAL, app_config.LOG_MAX_RECORDS_PER_MINUTE)
 
-    if "PlanetaryComputer" not in [sensor.sensorID for sensor in sensors_avaliable.sensors]:
+    if app_config.CONFIG_RELOAD_INTERVAL > 0:
+        config_store.watch(app_config.CONFIG_RELOAD_INTERVAL, on_change=log_config_change, on_error=log_config_error)
+
+    await startup.result("subscribe")
+
+    if app_config.TELEMETRY_INTERVAL > 0:
+        app_core.spawn(publish_stage_timings(app_config.TELEMETRY_INTERVAL))
+    if app_config.METRICS_PORT > 0:
+        app_core.spawn(serve_metrics(app_config.METRICS_PORT))
+    sensor_ids = await startup.result("sensors")
+
+    if "PlanetaryComputer" not in sensor_ids:
         logger.info("PlanetaryComputer not found. Exiting...")
         sys.exit(1)
 
-    logger.info(f"Tasking PlanetaryComputer sensor for ({app_config.LATITUDE}, {app_config.LONGITUDE})...")
+    # Keep the next images arriving while the current ones are processed
+    tasking_scheduler = TaskingScheduler(pre_check=pre_check_imagery,
+                                         task=request_imagery,
+                                         queue_depth=IMAGE_QUEUE.qsize,
+                                         max_in_flight=app_config.TASKING_MAX_IN_FLIGHT,
+                                         max_queue_depth=app_config.TASKING_MAX_QUEUE_DEPTH,
+                                         request_timeout=app_config.TASKING_TIMEOUT,
+                                         on_error=lambda target, error: logger.warning(f"Tasking for {target} failed: {error}"))
 
-    earth_image_request = EarthImageRequest()
-    line_of_sight = GeographicCoordinates()
-    line_of_sight.latitude = app_config.LATITUDE
-    line_of_sight.longitude = app_config.LONGITUDE
-    earth_image_request.collection = "naip"
-    earth_image_request.asset.append("image")
-    earth_image_request.geographicCoordinates.CopyFrom(line_of_sight)
+    targets = [(float(latitude), float(longitude)) for latitude, longitude in app_config.TASKING_TARGETS] or [(app_config.LATITUDE, app_config.LONGITUDE)]
+    accepted = await tasking_scheduler.run(expand_targets(targets, app_config.TASKING_PASSES))
 
-    payload_metadata = {"SOURCE_PAYLOAD_APP_ID": spacefx.client.get_app_id()}
+    # Surfaces any error raised while loading or warming up the image processor
+    await startup.wait()
 
-    sensor_response = spacefx.sensor.sensor_tasking("PlanetaryComputer", earth_image_request, metadata=payload_metadata)
-    logger.info(
-        "Sensor Tasking Request Status: %s",
-        sensor_response.responseHeader.status,
-    )
-    if sensor_response.responseHeader.status in [StatusCodes.PENDING, StatusCodes.SUCCESSFUL]:
-        logger.info("Waiting patiently for sensor data...")
-        spacefx.client.keep_app_open()
+    if accepted > 0:
+        logger.info(f"{accepted} tasking request(s) accepted.  Waiting patiently for sensor data...")
+        await app_core.run_blocking(spacefx.client.keep_app_open)
     else:
         logger.info("Exiting Application: Sensor PlanetaryComputer tasking was not successful")
 
 
+def main():
+    """
+    Runs the app on the AppCore event loop
+    """
+    app_core.run(main_async())
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
     main()
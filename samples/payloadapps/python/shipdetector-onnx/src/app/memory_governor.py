@@ -0,0 +1,110 @@
+"""
+Admits image decodes only while they fit a memory budget
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import PIL.Image
+
+from resource_limits import cgroup_memory_limit, process_rss
+
+# Images are decoded to 8-bit BGR
+DECODED_BYTES_PER_PIXEL = 3
+
+# The decoded frame plus one working copy of it (e.g. an encode buffer or a decoded overview) held at the same time
+FRAME_COPIES = 2
+
+
+def estimate_footprint(path: str, scale: float = 1.0) -> int:
+    """
+    Estimates the memory needed to process an image decoded at scale of its full resolution from its header, without decoding its pixels.
+    Falls back to rasterio for images Pillow cannot open (e.g. very large or unusual GeoTIFFs), then to the file size.
+    """
+    scale = min(1.0, scale)
+    width = height = None
+    try:
+        with PIL.Image.open(path) as image:
+            width, height = image.size
+    except (OSError, PIL.Image.DecompressionBombError):
+        try:
+            import rasterio
+            with rasterio.open(path) as dataset:
+                width, height = dataset.width, dataset.height
+        except Exception:
+            pass
+
+    if width is None:
+        try:
+            return os.path.getsize(path) * FRAME_COPIES
+        except OSError:
+            return 0
+    return round(width * scale) * round(height * scale) * DECODED_BYTES_PER_PIXEL * FRAME_COPIES
+
+
+def default_budget(fraction: float) -> Optional[int]:
+    """
+    Returns the given fraction of the container memory not already used by the process, or None if memory is unlimited
+    """
+    memory_limit = cgroup_memory_limit()
+    if memory_limit is None:
+        return None
+    return max(0, int((memory_limit - process_rss()) * fraction))
+
+
+class MemoryGovernor:
+    """
+    Counts the memory reserved by images being processed and blocks new reservations until they fit the budget.
+
+    An image larger than the whole budget is admitted once nothing else is reserved, so it runs alone instead of waiting forever.
+    """
+
+    def __init__(self, budget: int):
+        """
+        Args:
+            budget (int): Bytes that images being processed may reserve at once.
+        """
+        self.budget = budget
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    @property
+    def in_use(self) -> int:
+        """
+        Bytes currently reserved
+        """
+        with self._condition:
+            return self._in_use
+
+    def acquire(self, nbytes: int, timeout: Optional[float] = None) -> bool:
+        """
+        Reserves nbytes, waiting until they fit the budget.
+
+        Returns:
+            bool: True if the memory was reserved, False if the timeout expired first.
+        """
+        with self._condition:
+            admitted = self._condition.wait_for(lambda: self._in_use == 0 or self._in_use + nbytes <= self.budget, timeout=timeout)
+            if admitted:
+                self._in_use += nbytes
+            return admitted
+
+    def release(self, nbytes: int):
+        """
+        Returns nbytes reserved by acquire
+        """
+        with self._condition:
+            self._in_use = max(0, self._in_use - nbytes)
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        """
+        Holds nbytes of the budget for the duration of the block
+        """
+        self.acquire(nbytes)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
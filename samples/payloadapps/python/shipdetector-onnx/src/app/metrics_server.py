@@ -0,0 +1,130 @@
+"""
+Optional HTTP endpoint serving the pipeline's metrics in the Prometheus text format, for ground test rigs and the pod metrics stack to scrape
+"""
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from instrumentation import PIPELINE_COUNTERS, STAGE_TIMINGS, Counters, Histogram, StageTimings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value: float) -> str:
+    """
+    Formats a sample value or bucket bound as Prometheus expects, with +Inf for infinity
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_histogram(name: str, stage: str, histogram: Histogram) -> List[str]:
+    """
+    Returns the sample lines of one stage's histogram: cumulative buckets, sum and count
+    """
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{stage="{stage}",le="{format_value(bound)}"}} {cumulative}')
+    lines.append(f'{name}_sum{{stage="{stage}"}} {format_value(histogram.sum)}')
+    lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+    return lines
+
+
+class MetricsServer:
+    """
+    Serves /metrics on a background thread: each stage's latency histogram, the pipeline's running totals as counters,
+    and the gauges returned by a callback, e.g. queue depth, worker utilization and resident memory.
+    """
+
+    def __init__(self, port: int, gauges: Optional[Callable[[], Dict[str, float]]] = None, host: str = "0.0.0.0",
+                 timings: StageTimings = STAGE_TIMINGS, counters: Counters = PIPELINE_COUNTERS, prefix: str = "shipdetector"):
+        """
+        Args:
+            port (int): Port to listen on.  0 picks a free port, see port.
+            gauges (Callable, optional): Returns the current value of each gauge, keyed by name without the prefix.
+            host (str, optional): Address to listen on. Defaults to every interface.
+            timings (StageTimings, optional): Stage histograms to serve. Defaults to the pipeline's timings.
+            counters (Counters, optional): Running totals to serve. Defaults to the pipeline's counters.
+            prefix (str, optional): Prefix of every metric name. Defaults to "shipdetector".
+        """
+        self.gauges = gauges
+        self.timings = timings
+        self.counters = counters
+        self.prefix = prefix
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """
+        Port the server is listening on
+        """
+        return self._server.server_address[1]
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format
+        """
+        lines = []
+
+        if self.gauges is not None:
+            for name, value in sorted(self.gauges().items()):
+                lines += [f"# TYPE {self.prefix}_{name} gauge", f"{self.prefix}_{name} {format_value(value)}"]
+
+        for name, value in sorted(self.counters.snapshot().items()):
+            lines += [f"# TYPE {self.prefix}_{name}_total counter", f"{self.prefix}_{name}_total {value}"]
+
+        histogram_name = f"{self.prefix}_stage_seconds"
+        lines += [f"# HELP {histogram_name} Time spent in each stage of the image pipeline.", f"# TYPE {histogram_name} histogram"]
+        for stage, histogram in sorted(self.timings.snapshot().items()):
+            lines += render_histogram(histogram_name, stage, histogram)
+
+        return "\n".join(lines) + "\n"
+
+    def start(self):
+        """
+        Starts serving on a daemon thread
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops serving and closes the socket
+        """
+        # shutdown waits for serve_forever to return, so it would block if serving never started
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def _handler_class(self) -> type:
+        """
+        Returns a request handler class bound to this server
+        """
+        metrics_server = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics_server.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would otherwise flood stderr
+                pass
+
+        return MetricsHandler
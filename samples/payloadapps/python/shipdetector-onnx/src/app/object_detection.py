@@ -1,17 +1,41 @@
 import cv2
 
 import numpy as np
-import onnx
 import onnxruntime
 import PIL.Image
 
+from instrumentation import PIPELINE_COUNTERS, STAGE_TIMINGS
+
+# onnx is only used to read the model's metadata; onnxruntime exposes the same metadata when it is not installed
+try:
+    import onnx
+except ImportError:
+    onnx = None
+
 class ObjectDetection:
     """
     Runs Inference on a visual image using ONNX
     """
 
-    def __init__(self, model_filename):
-        self.session = onnxruntime.InferenceSession(str(model_filename))
+    def __init__(self, model_filename, intra_op_threads: int = 0, profile_prefix: str = None):
+        """
+        Args:
+            model_filename: Path to the ONNX model.
+            intra_op_threads (int, optional): Threads the session uses within an operator.  0 lets onnxruntime use one per core. Defaults to 0.
+            profile_prefix (str, optional): When set, onnxruntime profiles every run to a JSON file starting with this path, written by end_profiling. Defaults to None.
+        """
+        if intra_op_threads > 0 or profile_prefix:
+            session_options = onnxruntime.SessionOptions()
+            if intra_op_threads > 0:
+                session_options.intra_op_num_threads = intra_op_threads
+                session_options.inter_op_num_threads = 1
+            if profile_prefix:
+                session_options.enable_profiling = True
+                session_options.profile_file_prefix = profile_prefix
+            self.session = onnxruntime.InferenceSession(str(model_filename), sess_options=session_options)
+        else:
+            self.session = onnxruntime.InferenceSession(str(model_filename))
+        PIPELINE_COUNTERS.increment("ort_sessions_created")
         assert len(self.session.get_inputs()) == 1
         self.input_shape = self.session.get_inputs()[0].shape[2:]
         self.input_name = self.session.get_inputs()[0].name
@@ -20,23 +44,35 @@ class ObjectDetection:
 
         self.is_bgr = False
         self.is_range255 = False
-        onnx_model = onnx.load(model_filename)
-        for metadata in onnx_model.metadata_props:
-            if metadata.key == 'Image.BitmapPixelFormat' and metadata.value == 'Bgr8':
+        if onnx is not None:
+            metadata_props = {metadata.key: metadata.value for metadata in onnx.load(model_filename).metadata_props}
+        else:
+            metadata_props = self.session.get_modelmeta().custom_metadata_map
+        for key, value in metadata_props.items():
+            if key == 'Image.BitmapPixelFormat' and value == 'Bgr8':
                 self.is_bgr = True
-            elif metadata.key == 'Image.NominalPixelRange' and metadata.value == 'NominalRange_0_255':
+            elif key == 'Image.NominalPixelRange' and value == 'NominalRange_0_255':
                 self.is_range255 = True
 
 
-    def predict_image(self, opencvimg):
+    def predict_image(self, opencvimg, resample=None):
+        """
+        Run interference on the image, resized to the model's input with the given PIL resampling filter or PIL's default
+        """
+        with STAGE_TIMINGS.time("preprocess"):
+            input_array = self.preprocess(opencvimg, resample)
+        with STAGE_TIMINGS.time("infer"):
+            return self.infer(input_array)
+
+    def preprocess(self, opencvimg, resample=None):
         """
-        Run interference on the image
+        Converts a BGR image to the model's input tensor
         """
 
         image = PIL.Image.fromarray(cv2.cvtColor(opencvimg, cv2.COLOR_BGR2RGB))
 
         # Resize the image to match the input shape
-        image = image.resize(self.input_shape)
+        image = image.resize(self.input_shape) if resample is None else image.resize(self.input_shape, resample)
 
         # Convert the image back to a numpy array and normalize pixel values if necessary
         input_array = np.array(image, dtype=np.float32)[np.newaxis, :, :, :]
@@ -46,6 +82,21 @@ class ObjectDetection:
         if not self.is_range255:
             input_array = input_array / 255  # => Pixel values should be in range [0, 1]
 
+        return input_array.astype(self.input_type)
 
-        outputs = self.session.run(self.output_names, {self.input_name: input_array.astype(self.input_type)})
-        return {name: outputs[i] for i, name in enumerate(self.output_names)}
\ No newline at end of file
+    def infer(self, input_array):
+        """
+        Runs the model on an input tensor from preprocess
+        """
+        outputs = self.session.run(self.output_names, {self.input_name: input_array})
+        PIPELINE_COUNTERS.increment("ort_runs")
+        return {name: outputs[i] for i, name in enumerate(self.output_names)}
+
+    def end_profiling(self) -> str:
+        """
+        Stops profiling a session created with profile_prefix and writes the profile
+
+        Returns:
+            str: Path of the onnxruntime profile JSON.
+        """
+        return self.session.end_profiling()
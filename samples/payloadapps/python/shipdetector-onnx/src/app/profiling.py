@@ -0,0 +1,261 @@
+"""
+On-demand profiling of the next images processed: cProfile, onnxruntime's profiler and tracemalloc
+"""
+import cProfile
+import datetime
+import gzip
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Dropped into the inbox to profile the next images; its content is the number of images, or empty for DEFAULT_PROFILE_IMAGES
+PROFILE_MARKER_FILENAME = "profile-next-images"
+DEFAULT_PROFILE_IMAGES = 5
+
+# Entries kept in the summary of each profiler
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 5
+
+
+def summarize_onnxruntime_profile(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Totals an onnxruntime profile's kernel time per operator type.  The session's first run is left out, since it includes lazy initialization
+
+    Returns:
+        Dict[str, Dict[str, float]]: Calls and total milliseconds keyed by operator type.
+    """
+    with open(path, encoding='utf-8') as f:
+        events = json.load(f)
+
+    runs = sorted((event for event in events if event.get('name') == 'model_run'), key=lambda event: event['ts'])
+    first_run_end = runs[0]['ts'] + runs[0]['dur'] if len(runs) > 1 else 0
+
+    operators: Dict[str, Dict[str, float]] = defaultdict(lambda: {'calls': 0, 'total_ms': 0.0})
+    for event in events:
+        if event.get('cat') == 'Node' and event['ts'] >= first_run_end and 'op_name' in event.get('args', {}):
+            operator = operators[event['args']['op_name']]
+            operator['calls'] += 1
+            operator['total_ms'] += event['dur'] / 1000
+    return dict(operators)
+
+
+class ProfilingRun:
+    """
+    Profiles a fixed number of images, one at a time, and writes a compact summary of them to a folder once the last one finishes:
+    summary.json with the top functions, operator times and allocations, and cprofile.pstats.gz with the full cProfile statistics.
+    """
+
+    def __init__(self, images: int, output_folder: Path, on_written: Optional[Callable[[Path], None]] = None):
+        """
+        Args:
+            images (int): Number of images to profile.
+            output_folder (Path): Folder the profiles are written to.
+            on_written (Callable, optional): Called with the output folder once the profiles are written.
+        """
+        self.images = images
+        self.output_folder = Path(output_folder)
+        self.on_written = on_written
+        self._lock = threading.Lock()
+        self._claimed = 0
+        self._finished = 0
+        self._active = False
+        self._stats: Optional[pstats.Stats] = None
+        self._operators: Dict[str, Dict[str, float]] = defaultdict(lambda: {'calls': 0, 'total_ms': 0.0})
+        self._image_reports: List[dict] = []
+
+        # tracemalloc only sees allocations made after it starts, and slows every allocation while it runs
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether every image has been profiled
+        """
+        with self._lock:
+            return self._finished >= self.images
+
+    def claim(self) -> bool:
+        """
+        Reserves the next image for profiling.  Only one image is profiled at a time, since cProfile follows a single
+        thread and per-image memory peaks would mix; images claimed while another is profiled run unprofiled.
+        """
+        with self._lock:
+            if self._active or self._claimed >= self.images:
+                return False
+            self._claimed += 1
+            self._active = True
+            return True
+
+    def release_claim(self):
+        """
+        Gives back a claimed image that could not be profiled
+        """
+        with self._lock:
+            self._claimed -= 1
+            self._active = False
+
+    @contextmanager
+    def profile_image(self, image_name: str) -> Iterator[None]:
+        """
+        Profiles the block processing a claimed image, and writes the profiles if it was the last image
+        """
+        profiler = cProfile.Profile()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            seconds = time.perf_counter() - started
+            _, peak_traced = tracemalloc.get_traced_memory()
+
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+                self._image_reports.append({'image': os.path.basename(image_name), 'seconds': round(seconds, 3), 'peak_traced_bytes': peak_traced})
+                self._finished += 1
+                self._active = False
+                last_image = self._finished >= self.images
+
+            if last_image:
+                self.write()
+
+    def add_onnxruntime_profile(self, path: str):
+        """
+        Adds an onnxruntime profile to the run's operator times and deletes it, since the raw profile is too large to downlink
+        """
+        operators = summarize_onnxruntime_profile(path)
+        with self._lock:
+            for operator_type, operator in operators.items():
+                self._operators[operator_type]['calls'] += operator['calls']
+                self._operators[operator_type]['total_ms'] += operator['total_ms']
+        os.remove(path)
+
+    def summary(self) -> dict:
+        """
+        The run's per-image timings, top functions by cumulative time, operator times and top allocation sites
+        """
+        functions = []
+        if self._stats is not None:
+            rows = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+            for (filename, line, function), (_, calls, total_time, cumulative_time, _) in rows:
+                functions.append({'function': f"{os.path.basename(filename)}:{line}({function})", 'calls': calls,
+                                  'tottime': round(total_time, 4), 'cumtime': round(cumulative_time, 4)})
+
+        total_operator_ms = sum(operator['total_ms'] for operator in self._operators.values()) or 1.0
+        operators = [{'op_type': operator_type, 'calls': operator['calls'], 'total_ms': round(operator['total_ms'], 2),
+                      'share': round(operator['total_ms'] / total_operator_ms, 4)}
+                     for operator_type, operator in sorted(self._operators.items(), key=lambda item: item[1]['total_ms'], reverse=True)]
+
+        allocations = []
+        if tracemalloc.is_tracing():
+            for statistic in tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]:
+                frame = statistic.traceback[0]
+                allocations.append({'location': f"{os.path.basename(frame.filename)}:{frame.lineno}", 'size_bytes': statistic.size, 'count': statistic.count})
+
+        return {'images': self._image_reports, 'functions': functions, 'onnxruntime_operators': operators, 'allocations': allocations}
+
+    def write(self) -> Path:
+        """
+        Writes summary.json and cprofile.pstats.gz to the output folder and stops tracemalloc if this run started it
+
+        Returns:
+            Path: The output folder.
+        """
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            summary = self.summary()
+            stats = self._stats
+
+        with open(self.output_folder / "summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=1)
+        if stats is not None:
+            # The same marshalled format as pstats.Stats.dump_stats, gzipped
+            with gzip.open(self.output_folder / "cprofile.pstats.gz", 'wb') as f:
+                f.write(marshal.dumps(stats.stats))
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        if self.on_written is not None:
+            self.on_written(self.output_folder)
+        return self.output_folder
+
+
+class ProfilingControl:
+    """
+    Starts profiling runs when asked to, through the PROFILING_IMAGES setting or a marker file dropped into the inbox
+    """
+
+    def __init__(self, output_folder: str, on_written: Optional[Callable[[Path], None]] = None):
+        """
+        Args:
+            output_folder (str): Folder each run's profiles are written under, in a timestamped subfolder.
+            on_written (Callable, optional): Called with a run's folder once its profiles are written.
+        """
+        self.output_folder = output_folder
+        self.on_written = on_written
+        self._lock = threading.Lock()
+        self._run: Optional[ProfilingRun] = None
+        self._configured_images = 0
+
+    def poll(self, inbox_folder: str, configured_images: int):
+        """
+        Starts a run if the marker file is in the inbox, or if PROFILING_IMAGES was raised above 0 since the last poll
+        """
+        marker = Path(inbox_folder, PROFILE_MARKER_FILENAME)
+        if marker.is_file():
+            try:
+                images = int(marker.read_text().strip() or DEFAULT_PROFILE_IMAGES)
+            except ValueError:
+                images = DEFAULT_PROFILE_IMAGES
+            try:
+                marker.unlink()
+            except FileNotFoundError:
+                # Another worker took the marker first
+                images = 0
+            if images > 0:
+                self.start(images)
+
+        with self._lock:
+            changed = configured_images != self._configured_images
+            self._configured_images = configured_images
+        if changed and configured_images > 0:
+            self.start(configured_images)
+
+    def start(self, images: int) -> bool:
+        """
+        Starts profiling the next images, unless a run is already in progress
+
+        Returns:
+            bool: True if a run was started.
+        """
+        with self._lock:
+            if self._run is not None and not self._run.done:
+                return False
+            folder = Path(self.output_folder, datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ"))
+            self._run = ProfilingRun(images, folder, on_written=self.on_written)
+            return True
+
+    def claim(self) -> Optional[ProfilingRun]:
+        """
+        Returns the run to profile the next image with, or None if the image should run unprofiled
+        """
+        with self._lock:
+            run = self._run
+        if run is not None and run.claim():
+            return run
+        return None
@@ -0,0 +1,79 @@
+"""
+Reads the CPU and memory limits of the container the app runs in
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+# cgroup v1 reports "no limit" as a page-aligned value close to 2^63
+CGROUP_V1_UNLIMITED = 1 << 60
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs the process may be scheduled on
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def cgroup_cpu_limit(cgroup_root: str = CGROUP_ROOT) -> float:
+    """
+    Returns the number of CPUs allotted by the container's CPU quota, capped at the CPUs the process can run on.
+    Supports cgroup v2 (cpu.max) and v1 (cpu.cfs_quota_us / cpu.cfs_period_us).
+    """
+    cpus = float(available_cpus())
+    root = Path(cgroup_root)
+
+    cpu_max = _read_text(root / "cpu.max")
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return min(cpus, int(quota) / int(period))
+        return cpus
+
+    quota = _read_text(root / "cpu" / "cpu.cfs_quota_us")
+    period = _read_text(root / "cpu" / "cpu.cfs_period_us")
+    if quota is not None and period is not None and int(quota) > 0:
+        return min(cpus, int(quota) / int(period))
+    return cpus
+
+
+def cgroup_memory_limit(cgroup_root: str = CGROUP_ROOT) -> Optional[int]:
+    """
+    Returns the container's memory limit in bytes, or None if it is unlimited.
+    Supports cgroup v2 (memory.max) and v1 (memory.limit_in_bytes).
+    """
+    root = Path(cgroup_root)
+
+    memory_max = _read_text(root / "memory.max")
+    if memory_max is not None:
+        return None if memory_max == "max" else int(memory_max)
+
+    limit = _read_text(root / "memory" / "memory.limit_in_bytes")
+    if limit is not None and int(limit) < CGROUP_V1_UNLIMITED:
+        return int(limit)
+    return None
+
+
+def process_rss() -> int:
+    """
+    Returns the resident set size of the process in bytes
+    """
+    statm = _read_text(Path("/proc/self/statm"))
+    if statm is not None:
+        return int(statm.split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,103 @@
+"""
+Content-addressed cache of detection results
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+
+class ResultCache:
+    """
+    On-disk cache of the detections found in an image.  Entries are keyed by the image's content hash plus
+    everything else that changes the result (model, threshold and chipping), so a re-delivered scene skips inference.
+
+    Entries are evicted least recently used first once the cache exceeds its entry or size limit.
+    """
+
+    def __init__(self, folder: str, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            folder (str): Folder that holds the cache entries.
+            max_entries (int, optional): Maximum number of entries to keep. Defaults to 10000.
+            max_bytes (int, optional): Maximum total size of the entries on disk. Defaults to 64 MiB.
+        """
+        self.folder = Path(folder)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+        """
+        Returns the SHA-256 of a file's contents, read in chunks so large scenes are never fully loaded
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(image_hash: str, model_hash: str, detection_threshold: float, chip_max_height: int, chip_max_width: int, decode_scale: float = 1.0,
+                 aoi: str = "") -> str:
+        """
+        Builds the cache key for an image processed with the given model, threshold, chipping parameters, decode resolution
+        and fingerprint of the area of interest its chips were limited to
+        """
+        key_parts = [image_hash, model_hash, detection_threshold, chip_max_height, chip_max_width]
+        # Full-resolution keys are left as they were before images could be decoded at a reduced resolution
+        if decode_scale != 1.0:
+            key_parts.append(decode_scale)
+        if aoi:
+            key_parts.append(aoi)
+        key_parts = json.dumps(key_parts)
+        return hashlib.sha256(key_parts.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return Path(self.folder, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """
+        Returns the cached detections for key, or None on a miss.  A hit marks the entry as recently used.
+        """
+        entry_path = self._entry_path(key)
+        with self._lock:
+            try:
+                with open(entry_path, 'r', encoding='utf-8') as f:
+                    detections = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+            os.utime(entry_path)
+        return detections
+
+    def put(self, key: str, detections: List[dict]):
+        """
+        Stores the detections for key and evicts old entries if the cache is over its limits
+        """
+        entry_path = self._entry_path(key)
+        temp_path = entry_path.with_suffix('.tmp')
+        with self._lock:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(detections, f)
+            os.replace(temp_path, entry_path)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry_path in self.folder.glob('*.json'):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, entry_path = entries.pop(0)
+            entry_path.unlink(missing_ok=True)
+            total_bytes -= size
@@ -4,4 +4,24 @@ class ShipDetection:
     self.x_coordinate = x_coordinate
     self.y_coordinate = y_coordinate
     self.width = width
-    self.height = height
\ No newline at end of file
+    self.height = height
+
+  def to_dict(self) -> dict:
+    """
+    Returns a JSON-serializable copy of the detection
+    """
+    return {
+      'probability': self.probability,
+      'x_coordinate': self.x_coordinate,
+      'y_coordinate': self.y_coordinate,
+      'width': self.width,
+      'height': self.height
+    }
+
+  @classmethod
+  def from_dict(cls, data: dict) -> 'ShipDetection':
+    """
+    Rebuilds a detection from the output of to_dict
+    """
+    return cls(probability=data['probability'], x_coordinate=data['x_coordinate'], y_coordinate=data['y_coordinate'],
+               width=data['width'], height=data['height'])
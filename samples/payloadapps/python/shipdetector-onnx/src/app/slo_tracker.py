@@ -0,0 +1,128 @@
+"""
+Rolling end-to-end latency and throughput of processed images, checked against a latency SLO
+"""
+import collections
+import math
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from image_job import ImageJob
+from instrumentation import STAGE_TIMINGS, StageTimings
+
+# Images needed in the window before the SLO is checked, so one slow image after startup does not raise an alert
+MIN_SAMPLES = 5
+
+
+class SloTracker:
+    """
+    Keeps the end-to-end latencies of the images processed in the last window seconds, from the SensorData being received
+    to the augmented image and chips being on disk, and reports when a latency percentile crosses the SLO and when it recovers.
+    """
+
+    def __init__(self, window: float = 900.0, on_breach: Optional[Callable[[Dict[str, float]], None]] = None,
+                 on_recovery: Optional[Callable[[Dict[str, float]], None]] = None, timings: StageTimings = STAGE_TIMINGS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            window (float, optional): Seconds of images the rolling statistics cover. Defaults to 900.
+            on_breach (Callable, optional): Called with the rolling statistics when the SLO starts being breached.
+            on_recovery (Callable, optional): Called with the rolling statistics when the SLO is met again.
+            timings (StageTimings, optional): Histograms the end-to-end and queue wait latencies are also recorded in. Defaults to the pipeline's timings.
+            clock (Callable, optional): Monotonic clock, matching the ImageJob timestamps. Defaults to time.monotonic.
+        """
+        self.window = window
+        self.on_breach = on_breach
+        self.on_recovery = on_recovery
+        self.timings = timings
+        self.clock = clock
+        self._lock = threading.Lock()
+        # (completed at, end-to-end seconds) of each image in the window, oldest first
+        self._latencies: Deque[Tuple[float, float]] = collections.deque()
+        self._breached = False
+
+    def record(self, image_job: ImageJob) -> Optional[float]:
+        """
+        Adds a processed image
+
+        Returns:
+            float: The image's end-to-end latency in seconds, or None if its products were not written.
+        """
+        latency = image_job.end_to_end()
+        if latency is None:
+            return None
+
+        self.timings.record("end_to_end", latency)
+        queue_wait = image_job.lifecycle().get("queue_wait")
+        if queue_wait is not None:
+            self.timings.record("queue_wait", queue_wait)
+
+        with self._lock:
+            self._latencies.append((image_job.products_written_at, latency))
+            self._expire()
+        return latency
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns the images in the window, their throughput in images per minute and their p50, p95 and p99 latencies in seconds
+        """
+        with self._lock:
+            self._expire()
+            latencies = sorted(latency for _, latency in self._latencies)
+            oldest = self._latencies[0][0] if self._latencies else None
+
+        # Until the window has filled, throughput is over the time since the first image rather than the whole window
+        span = min(self.window, self.clock() - oldest) if oldest is not None else 0.0
+        return {'count': len(latencies),
+                'images_per_minute': len(latencies) * 60 / span if span > 0 else 0.0,
+                'p50': self._percentile(latencies, 50),
+                'p95': self._percentile(latencies, 95),
+                'p99': self._percentile(latencies, 99)}
+
+    def check(self, slo_seconds: float, percentile: float = 95.0) -> bool:
+        """
+        Compares the window's latency percentile to the SLO, calling on_breach or on_recovery when that changes.  An SLO of 0 is never breached
+
+        Returns:
+            bool: Whether the SLO is breached.
+        """
+        with self._lock:
+            self._expire()
+            latencies = sorted(latency for _, latency in self._latencies)
+            breached = slo_seconds > 0 and len(latencies) >= MIN_SAMPLES and self._percentile(latencies, percentile) > slo_seconds
+            changed = breached != self._breached
+            self._breached = breached
+
+        if changed:
+            callback = self.on_breach if breached else self.on_recovery
+            if callback is not None:
+                callback(self.snapshot())
+        return breached
+
+    def metrics(self, prefix: str = "shipdetector") -> List[Tuple[str, int]]:
+        """
+        Returns the rolling statistics as integer telemetry metrics, named "<prefix>.slo.<statistic>" with latencies in milliseconds
+        """
+        snapshot = self.snapshot()
+        return [(f"{prefix}.slo.count", snapshot['count']),
+                (f"{prefix}.slo.images_per_minute", round(snapshot['images_per_minute'])),
+                (f"{prefix}.slo.p50_ms", round(snapshot['p50'] * 1000)),
+                (f"{prefix}.slo.p95_ms", round(snapshot['p95'] * 1000)),
+                (f"{prefix}.slo.p99_ms", round(snapshot['p99'] * 1000))]
+
+    def _expire(self):
+        """
+        Drops the images that completed before the window.  Callers hold the lock
+        """
+        cutoff = self.clock() - self.window
+        while self._latencies and self._latencies[0][0] < cutoff:
+            self._latencies.popleft()
+
+    @staticmethod
+    def _percentile(latencies: List[float], percent: float) -> float:
+        """
+        Nearest-rank percentile of sorted latencies, or 0 if there are none
+        """
+        if not latencies:
+            return 0.0
+        return latencies[max(0, math.ceil(len(latencies) * percent / 100) - 1)]
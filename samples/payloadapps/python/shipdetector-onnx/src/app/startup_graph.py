@@ -0,0 +1,138 @@
+"""
+Runs the app's startup steps concurrently in dependency order
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app_core import AppCore
+
+
+@dataclass
+class StartupStep:
+    """
+    A startup step, the steps it waits for, and when it ran
+    """
+
+    name: str
+    """
+    Name used for dependencies and timing logs
+    """
+
+    func: Callable
+    """
+    Called with the results of depends_on, in order.  Coroutine functions are awaited; other functions run on the AppCore executor
+    """
+
+    depends_on: List[str] = field(default_factory=list)
+    """
+    Names of the steps that must finish first
+    """
+
+    started: Optional[float] = None
+    """
+    Seconds after the graph's origin the step started
+    """
+
+    finished: Optional[float] = None
+    """
+    Seconds after the graph's origin the step finished
+    """
+
+    @property
+    def duration(self) -> float:
+        """
+        Seconds the step ran for, or 0 if it has not finished
+        """
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+
+class StartupGraph:
+    """
+    Startup steps declared with their dependencies.  Every step starts as soon as the steps it depends on have finished,
+    so independent steps such as model loading and the client build overlap.  A failed step fails the steps that depend on it.
+    """
+
+    def __init__(self, app_core: AppCore, origin: Optional[float] = None):
+        """
+        Args:
+            app_core (AppCore): Runs the blocking steps off the event loop.
+            origin (float, optional): time.monotonic() that step timings are measured from. Defaults to now.
+        """
+        self.app_core = app_core
+        self.origin = time.monotonic() if origin is None else origin
+        self.steps: Dict[str, StartupStep] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add_step(self, name: str, func: Callable, depends_on: Optional[List[str]] = None):
+        """
+        Declares a step.  Dependencies must be declared first, which also rules out cycles.
+
+        Raises:
+            ValueError: If the name is taken or a dependency has not been declared.
+        """
+        if name in self.steps:
+            raise ValueError(f"Startup step '{name}' is already declared")
+        for dependency in depends_on or []:
+            if dependency not in self.steps:
+                raise ValueError(f"Startup step '{name}' depends on undeclared step '{dependency}'")
+        self.steps[name] = StartupStep(name=name, func=func, depends_on=list(depends_on or []))
+
+    def start(self):
+        """
+        Starts every step on the running event loop
+        """
+        for name in self.steps:
+            self._tasks[name] = self.app_core.spawn(self._run_step(self.steps[name]))
+
+    async def _run_step(self, step: StartupStep) -> Any:
+        dependency_results = [await self._tasks[dependency] for dependency in step.depends_on]
+
+        step.started = time.monotonic() - self.origin
+        try:
+            if asyncio.iscoroutinefunction(step.func):
+                return await step.func(*dependency_results)
+            return await self.app_core.run_blocking(step.func, *dependency_results)
+        finally:
+            step.finished = time.monotonic() - self.origin
+
+    async def result(self, name: str) -> Any:
+        """
+        Waits for a step and returns its result, raising its error if it failed
+        """
+        return await asyncio.shield(self._tasks[name])
+
+    async def wait(self):
+        """
+        Waits for every step to finish, raising the first error
+        """
+        await asyncio.gather(*self._tasks.values())
+
+    def critical_path(self) -> List[StartupStep]:
+        """
+        The chain of steps that determined when startup finished: the step that finished last,
+        preceded by whichever of its dependencies finished last, and so on
+        """
+        finished_steps = [step for step in self.steps.values() if step.finished is not None]
+        if not finished_steps:
+            return []
+
+        path = [max(finished_steps, key=lambda step: step.finished)]
+        while path[0].depends_on:
+            path.insert(0, max((self.steps[dependency] for dependency in path[0].depends_on), key=lambda step: step.finished or 0.0))
+        return path
+
+    def timing_report(self) -> List[str]:
+        """
+        One line per step with its start and duration, followed by the critical path
+        """
+        lines = [f"Startup step {step.name}: started at {step.started:.2f}s, took {step.duration:.2f}s"
+                 for step in sorted(self.steps.values(), key=lambda step: step.started or 0.0) if step.started is not None]
+
+        path = self.critical_path()
+        if path:
+            lines.append(f"Startup critical path ({path[-1].finished:.2f}s): " + " -> ".join(f"{step.name} ({step.duration:.2f}s)" for step in path))
+        return lines
@@ -0,0 +1,201 @@
+"""
+Structured, rate-limited and batched logging for the image pipeline's hot path
+"""
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class LogEvent:
+    """
+    A structured log message, "event key=value ...".  Passed to the logger as the message, it is only formatted if the record is emitted:
+
+        logger.info(LogEvent("image_processed", image=path, detections=len(detections)))
+    """
+
+    def __init__(self, event: str, **fields):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        parts = [self.event]
+        for key, value in self.fields.items():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            value = str(value)
+            if not value or any(character.isspace() or character in '"=' for character in value):
+                value = '"' + value.replace('"', '\\"') + '"'
+            parts.append(f"{key}={value}")
+        return " ".join(parts)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most max_records records from each call site through per interval.  The next record let through from a
+    call site reports how many of its records were dropped.
+    """
+
+    def __init__(self, max_records: int, interval: float = 60.0):
+        """
+        Args:
+            max_records (int): Records allowed per call site per interval.  0 disables the limit.
+            interval (float, optional): Length of the window in seconds. Defaults to 60.
+        """
+        super().__init__()
+        self.max_records = max_records
+        self.interval = interval
+        self._lock = threading.Lock()
+        # Call site -> (window start, records let through in the window, records dropped since the last one let through)
+        self._windows: Dict[Tuple[str, int], List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.max_records <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault((record.pathname, record.lineno), [now, 0, 0])
+            if now - window[0] >= self.interval:
+                window[0], window[1] = now, 0
+            if window[1] >= self.max_records:
+                window[2] += 1
+                return False
+            window[1] += 1
+            dropped, window[2] = window[2], 0
+
+        if dropped:
+            record.msg = f"{record.getMessage()} ({dropped} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+class BatchingHandler(logging.Handler):
+    """
+    Buffers records and hands them to the target handlers in batches: consecutive records of the same level are joined into
+    one multi-line record, so the logging service receives one message per batch instead of one per line.
+    A batch is sent when the buffer is full, every flush_interval seconds, and straight away for records at flush_level or above.
+    """
+
+    def __init__(self, targets: List[logging.Handler], capacity: int = 50, flush_interval: float = 2.0, flush_level: int = logging.WARNING):
+        """
+        Args:
+            targets (List[logging.Handler]): Handlers the batches are sent to.
+            capacity (int, optional): Records buffered before a batch is sent. Defaults to 50.
+            flush_interval (float, optional): Longest a record is held, in seconds. Defaults to 2.
+            flush_level (int, optional): Level that sends the buffer at once. Defaults to WARNING.
+        """
+        super().__init__()
+        self.targets = targets
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._buffer: List[logging.LogRecord] = []
+        # Separate from the handler's own lock, which logging holds around emit, so emit and the flusher thread cannot deadlock
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # Rendered now, while the objects the message refers to still hold the values being logged
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._buffer_lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.capacity
+        if full or record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        """
+        Sends the buffered records
+        """
+        with self._flush_lock:
+            with self._buffer_lock:
+                records, self._buffer = self._buffer, []
+            for batch in self._batches(records):
+                for target in self.targets:
+                    if batch.levelno >= target.level:
+                        target.handle(batch)
+
+    @staticmethod
+    def _batches(records: List[logging.LogRecord]) -> List[logging.LogRecord]:
+        """
+        Joins runs of records from the same logger at the same level into single records
+        """
+        runs: List[List[logging.LogRecord]] = []
+        for record in records:
+            previous = runs[-1][-1] if runs else None
+            if previous is not None and previous.levelno == record.levelno and previous.name == record.name and not previous.exc_text and not record.exc_text:
+                runs[-1].append(record)
+            else:
+                runs.append([record])
+
+        batches = []
+        for run in runs:
+            batch = run[0]
+            if len(run) > 1:
+                batch = logging.makeLogRecord(batch.__dict__)
+                batch.msg = "\n".join(record.msg for record in run)
+            batches.append(batch)
+        return batches
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        super().close()
+
+
+def install_batching(logger: logging.Logger, capacity: int, flush_interval: float, max_records_per_minute: int = 0) -> Optional[BatchingHandler]:
+    """
+    Routes the logger's handlers through a BatchingHandler, with rate limiting per call site.  Installing again replaces the earlier one.
+
+    Args:
+        logger (logging.Logger): Logger whose handlers send to the logging service.
+        capacity (int): Records per batch.  0 or less sends every record straight away, as before.
+        flush_interval (float): Longest a record is held, in seconds.
+        max_records_per_minute (int, optional): Records allowed per call site per minute.  0 disables rate limiting. Defaults to 0.
+
+    Returns:
+        BatchingHandler: The installed handler, or None if batching is off or the logger has no handlers to batch.
+    """
+    for existing in list(logger.filters):
+        if isinstance(existing, RateLimitFilter):
+            logger.removeFilter(existing)
+    if max_records_per_minute > 0:
+        logger.addFilter(RateLimitFilter(max_records_per_minute, interval=60.0))
+
+    targets = []
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        if isinstance(handler, BatchingHandler):
+            targets.extend(handler.targets)
+            handler.close()
+        else:
+            targets.append(handler)
+
+    if capacity <= 0 or not targets:
+        for target in targets:
+            logger.addHandler(target)
+        return None
+
+    handler = BatchingHandler(targets, capacity=capacity, flush_interval=flush_interval)
+    logger.addHandler(handler)
+    return handler
@@ -0,0 +1,164 @@
+"""
+Pipelined scheduler for continuous sensor tasking
+"""
+import asyncio
+import collections
+import itertools
+from typing import AsyncIterable, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Target = Tuple[float, float]
+
+# Tracking IDs remembered as delivered before their tasking request was recorded; older ones are forgotten first
+EARLY_COMPLETIONS_LIMIT = 1024
+
+
+def expand_targets(targets: List[Target], passes: int) -> Iterator[Target]:
+    """
+    Yields the targets in order, repeated for the given number of passes.  Zero passes repeats them forever.
+    """
+    pass_numbers = itertools.count() if passes == 0 else range(passes)
+    for _ in pass_numbers:
+        yield from targets
+
+
+class TaskingScheduler:
+    """
+    Tasks the sensor for a list or stream of target coordinates while earlier images are still being processed.
+
+    Targets are pre-checked ahead of time, up to max_in_flight tasking requests are kept waiting on sensor data at once,
+    and new requests are held back while the processing queue is deeper than max_queue_depth.
+    """
+
+    def __init__(self,
+                 pre_check: Callable[[Target], Awaitable[bool]],
+                 task: Callable[[Target], Awaitable[Optional[str]]],
+                 queue_depth: Callable[[], int],
+                 max_in_flight: int = 2,
+                 max_queue_depth: int = 10,
+                 request_timeout: float = 600,
+                 poll_interval: float = 1.0,
+                 on_error: Optional[Callable[[Target, Exception], None]] = None):
+        """
+        Args:
+            pre_check (Callable): Coroutine returning True if the sensor will accept a tasking request for the target.
+            task (Callable): Coroutine that tasks the sensor for the target and returns the request's tracking ID, or None if it was rejected.
+            queue_depth (Callable): Returns the number of images waiting to be processed.
+            max_in_flight (int, optional): Maximum number of tasking requests waiting on sensor data. Defaults to 2.
+            max_queue_depth (int, optional): Processing queue depth at which new tasking is held back. Defaults to 10.
+            request_timeout (float, optional): Seconds after which a request that never delivered data stops counting as in flight. Defaults to 600.
+            poll_interval (float, optional): Seconds between queue depth checks while held back. Defaults to 1.0.
+            on_error (Callable, optional): Called with the target and the error when pre-checking or tasking it raises; the target counts as rejected.
+        """
+        self.pre_check = pre_check
+        self.task = task
+        self.queue_depth = queue_depth
+        self.max_in_flight = max_in_flight
+        self.max_queue_depth = max_queue_depth
+        self.request_timeout = request_timeout
+        self.poll_interval = poll_interval
+        self.on_error = on_error
+
+        self.accepted = 0
+        self.rejected = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, asyncio.TimerHandle] = {}
+        self._completed_early: collections.OrderedDict = collections.OrderedDict()
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of tasking requests still waiting on sensor data
+        """
+        return len(self._in_flight)
+
+    async def run(self, targets: Union[Iterable[Target], AsyncIterable[Target]]) -> int:
+        """
+        Tasks the sensor for every target and returns once the last request has been sent.
+
+        Returns:
+            int: Number of tasking requests the sensor accepted.
+        """
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        # Pre-check the next targets while the current ones wait for a slot
+        checked_targets: asyncio.Queue = asyncio.Queue(maxsize=self.max_in_flight)
+        pre_checker = asyncio.ensure_future(self._pre_check_targets(targets, checked_targets))
+
+        try:
+            while True:
+                target = await checked_targets.get()
+                if target is None:
+                    break
+
+                await self._slots.acquire()
+                while self.queue_depth() >= self.max_queue_depth:
+                    await asyncio.sleep(self.poll_interval)
+
+                # A failed call, e.g. a transient gRPC error, only costs its target, not the rest of the mission
+                try:
+                    tracking_id = await self.task(target)
+                except Exception as error:
+                    self._report_error(target, error)
+                    tracking_id = None
+                if tracking_id is None:
+                    self.rejected += 1
+                    self._slots.release()
+                    continue
+
+                self.accepted += 1
+
+                # Sensor data can arrive before the request that asked for it has been recorded
+                if self._completed_early.pop(tracking_id, False):
+                    self._slots.release()
+                    continue
+
+                self._in_flight[tracking_id] = asyncio.get_running_loop().call_later(self.request_timeout, self.complete, tracking_id)
+
+            # Surfaces any error raised while pre-checking
+            await pre_checker
+        finally:
+            pre_checker.cancel()
+
+        return self.accepted
+
+    async def _pre_check_targets(self, targets, checked_targets: asyncio.Queue):
+        try:
+            async for target in self._iterate(targets):
+                try:
+                    passed = await self.pre_check(target)
+                except Exception as error:
+                    self._report_error(target, error)
+                    passed = False
+                if passed:
+                    await checked_targets.put(target)
+                else:
+                    self.rejected += 1
+        finally:
+            await checked_targets.put(None)
+
+    def _report_error(self, target: Target, error: Exception):
+        if self.on_error is not None:
+            self.on_error(target, error)
+
+    @staticmethod
+    async def _iterate(targets):
+        if hasattr(targets, '__aiter__'):
+            async for target in targets:
+                yield target
+        else:
+            for target in targets:
+                yield target
+
+    def complete(self, tracking_id: str):
+        """
+        Marks a tasking request as delivered, freeing its slot for the next target.  Unknown tracking IDs are remembered, in
+        case their request has not been recorded yet, and free its slot as soon as it is.
+        """
+        timeout_handle = self._in_flight.pop(tracking_id, None)
+        if timeout_handle is None:
+            self._completed_early[tracking_id] = True
+            if len(self._completed_early) > EARLY_COMPLETIONS_LIMIT:
+                self._completed_early.popitem(last=False)
+            return
+        timeout_handle.cancel()
+        self._slots.release()
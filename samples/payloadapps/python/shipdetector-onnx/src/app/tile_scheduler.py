@@ -0,0 +1,130 @@
+"""
+Orders a scene's chips by how likely they are to hold ships and tracks how much of the scene a time budget covered
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Pixels darker than this (mean of B, G and R) and at least as blue as they are red count as water
+WATER_MAX_BRIGHTNESS = 100
+
+# Pixels sampled along each side of a chip to estimate its water fraction
+SAMPLES_PER_SIDE = 32
+
+# How much a chip's previous detections count against its water fraction, per log of the count
+PREVIOUS_DETECTIONS_WEIGHT = 1.0
+
+
+def chip_grid(image_width: int, image_height: int, chip_width: int, chip_height: int) -> List[Tuple[int, int]]:
+    """
+    Returns the (y, x) start of every chip of an image, in raster order
+    """
+    return [(chip_y_start, chip_x_start) for chip_y_start in range(0, image_height, chip_height) for chip_x_start in range(0, image_width, chip_width)]
+
+
+def water_fractions(raw_image: np.ndarray, chip_height: int, chip_width: int) -> np.ndarray:
+    """
+    Estimates the fraction of each chip that is water, as a (rows, columns) array of the chip grid, from a sparse sample of
+    its pixels: dark, blue-leaning pixels count as water.  Cheap enough to run on every chip of a scene before inference
+    """
+    image_height, image_width = raw_image.shape[:2]
+    rows, columns = -(-image_height // chip_height), -(-image_width // chip_width)
+    fractions = np.zeros((rows, columns))
+    for chip_y_start, chip_x_start in chip_grid(image_width, image_height, chip_width, chip_height):
+        chip = raw_image[chip_y_start:chip_y_start + chip_height, chip_x_start:chip_x_start + chip_width]
+        stride_y, stride_x = max(1, chip.shape[0] // SAMPLES_PER_SIDE), max(1, chip.shape[1] // SAMPLES_PER_SIDE)
+        samples = chip[::stride_y, ::stride_x].reshape(-1, 3).astype(np.int16)
+        water = (samples.sum(axis=1) < WATER_MAX_BRIGHTNESS * 3) & (samples[:, 0] >= samples[:, 2])
+        fractions[chip_y_start // chip_height, chip_x_start // chip_width] = water.mean()
+    return fractions
+
+
+def tile_priorities(raw_image: np.ndarray, chip_height: int, chip_width: int, aoi_priorities: Optional[np.ndarray] = None,
+                    previous_detections: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Scores each chip of an image by how likely it is to hold ships: its water fraction plus its previous detections,
+    weighted by the priority of the areas of interest it touches
+
+    Args:
+        raw_image (np.ndarray): The decoded image.
+        chip_height (int): Height of the chips.
+        chip_width (int): Width of the chips.
+        aoi_priorities (np.ndarray, optional): Priority of each chip's areas of interest, see AreaOfInterest.tile_priorities.
+        previous_detections (np.ndarray, optional): Number of detections in each chip on earlier passes.
+
+    Returns:
+        np.ndarray: (rows, columns) scores of the chip grid, higher first.
+    """
+    priorities = water_fractions(raw_image, chip_height, chip_width)
+    if previous_detections is not None:
+        priorities += PREVIOUS_DETECTIONS_WEIGHT * np.log1p(previous_detections)
+    if aoi_priorities is not None:
+        priorities *= aoi_priorities
+    return priorities
+
+
+def ordered_tiles(priorities: np.ndarray, chip_height: int, chip_width: int, tile_mask: Optional[np.ndarray] = None) -> List[Tuple[int, int]]:
+    """
+    Returns the (y, x) start of the chips to process, highest priority first and in raster order among equals.  Chips outside tile_mask are left out
+    """
+    order = np.argsort(-priorities, axis=None, kind='stable')
+    rows, columns = np.unravel_index(order, priorities.shape)
+    return [(int(row) * chip_height, int(column) * chip_width) for row, column in zip(rows, columns)
+            if tile_mask is None or tile_mask[row, column]]
+
+
+def count_in_grid(xs: np.ndarray, ys: np.ndarray, image_width: int, image_height: int, chip_width: int, chip_height: int) -> np.ndarray:
+    """
+    Counts the points falling in each chip of an image, as a (rows, columns) array of the chip grid.  Points outside the image are ignored
+    """
+    rows, columns = -(-image_height // chip_height), -(-image_width // chip_width)
+    xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+    inside = (xs >= 0) & (xs < image_width) & (ys >= 0) & (ys < image_height)
+    counts = np.zeros((rows, columns))
+    np.add.at(counts, ((ys[inside] // chip_height).astype(int), (xs[inside] // chip_width).astype(int)), 1)
+    return counts
+
+
+@dataclass
+class TileCoverage:
+    """
+    Which chips of an image were processed within its time budget
+    """
+
+    tiles_total: int = 0
+    """
+    Chips the image was to be processed in, not counting those outside the areas of interest
+    """
+
+    completed_tiles: Dict[str, List[dict]] = field(default_factory=dict)
+    """
+    Detections of each processed chip as dicts, by tile key, in the image's coordinates
+    """
+
+    unprocessed: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    """
+    (x, y, width, height) of the chips the budget ran out before
+    """
+
+    @property
+    def tiles_processed(self) -> int:
+        return len(self.completed_tiles)
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return bool(self.unprocessed)
+
+    @property
+    def fraction(self) -> float:
+        """
+        Fraction of the chips processed, 1 if there were none to process
+        """
+        return self.tiles_processed / self.tiles_total if self.tiles_total else 1.0
+
+    def to_dict(self) -> dict:
+        return {'tiles_total': self.tiles_total,
+                'tiles_processed': self.tiles_processed,
+                'coverage': self.fraction,
+                'complete': not self.budget_exhausted,
+                'unprocessed': [list(tile) for tile in self.unprocessed]}
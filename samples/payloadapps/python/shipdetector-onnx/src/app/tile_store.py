@@ -0,0 +1,134 @@
+"""
+Store of previously captured tiles used to skip inference on tiles that have not changed
+"""
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from georeference import GeoReference
+
+
+class TileStore:
+    """
+    Fingerprints and detections of previously captured tiles, keyed by a geographic tile ID derived from the GeoTIFF transform.
+
+    Repeat captures of the same coordinates are compared tile by tile against a small grayscale fingerprint; tiles where no
+    fingerprint cell differs by more than the threshold reuse the stored detections instead of being re-inferred.  Detections
+    are only reused for the model, threshold and labels they were found with.
+    """
+
+    def __init__(self, path: str, difference_threshold: float = 4.0, fingerprint_size: int = 16, max_tiles: int = 50000,
+                 save_interval: float = 60.0):
+        """
+        Args:
+            path (str): Path to the JSON file backing the store.
+            difference_threshold (float, optional): Absolute difference (0-255) of any one fingerprint cell above which a tile counts as changed. Defaults to 4.0.
+            fingerprint_size (int, optional): Width and height of the grayscale fingerprint. Defaults to 16.
+            max_tiles (int, optional): Maximum number of tiles kept; the least recently updated are dropped first. Defaults to 50000.
+            save_interval (float, optional): Minimum seconds between writes of the store by save. Defaults to 60.
+        """
+        self.path = Path(path)
+        self.difference_threshold = difference_threshold
+        self.fingerprint_size = fingerprint_size
+        self.max_tiles = max_tiles
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._tiles: OrderedDict = OrderedDict()
+        self._dirty = False
+        self._last_saved = -math.inf
+
+        if self.path.is_file():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._tiles = OrderedDict(json.load(f))
+
+    @staticmethod
+    def tile_id(georeference: GeoReference, x_start: int, y_start: int, x_end: int, y_end: int) -> str:
+        """
+        Returns the geographic ID of a tile: the CRS plus the tile's corners, rounded to whole pixels of the source grid
+        """
+        world_x_start, world_y_start = georeference.pixel_to_world(x_start, y_start)
+        world_x_end, world_y_end = georeference.pixel_to_world(x_end, y_end)
+        pixel_width, pixel_height = georeference.pixel_size
+        corners = [round(world_x_start / pixel_width), round(world_y_start / pixel_height), round(world_x_end / pixel_width), round(world_y_end / pixel_height)]
+        return f"{georeference.crs.to_string()}:{':'.join(str(corner) for corner in corners)}"
+
+    @staticmethod
+    def make_context(model_hash: str, detection_threshold: float, detection_labels: List[str]) -> str:
+        """
+        Returns a fingerprint of everything besides the tile that its detections depend on: the model, threshold and labels
+        """
+        context = json.dumps([model_hash, detection_threshold, list(detection_labels)])
+        return hashlib.sha256(context.encode('utf-8')).hexdigest()[:16]
+
+    def fingerprint(self, tile) -> np.ndarray:
+        """
+        Returns a small grayscale thumbnail of a BGR tile used as its fingerprint
+        """
+        gray = cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY) if tile.ndim == 3 else tile
+        return cv2.resize(gray, (self.fingerprint_size, self.fingerprint_size), interpolation=cv2.INTER_AREA)
+
+    def lookup(self, tile_id: str, fingerprint: np.ndarray, context: str = "") -> Optional[List[dict]]:
+        """
+        Returns the stored detections for the tile if it is unchanged since the last capture and they were found in the same
+        context, see make_context, otherwise None.  Detections are in tile coordinates.
+        """
+        with self._lock:
+            stored = self._tiles.get(tile_id)
+        if stored is None or stored.get('context', "") != context:
+            return None
+
+        stored_fingerprint = np.asarray(stored['fingerprint'], dtype=np.float32)
+        if stored_fingerprint.shape != fingerprint.shape:
+            return None
+        # The largest cell difference, not the mean, so a small new ship on an otherwise unchanged tile is not averaged away
+        if float(np.max(np.abs(stored_fingerprint - fingerprint.astype(np.float32)))) > self.difference_threshold:
+            return None
+        return stored['detections']
+
+    def update(self, tile_id: str, fingerprint: np.ndarray, detections: List[dict], context: str = ""):
+        """
+        Records the tile's latest fingerprint and detections, and the context they were found in.  Detections are in tile coordinates.
+        """
+        with self._lock:
+            self._tiles[tile_id] = {'fingerprint': fingerprint.tolist(), 'detections': detections, 'context': context}
+            self._tiles.move_to_end(tile_id)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+            self._dirty = True
+
+    def save(self, force: bool = False):
+        """
+        Writes the store to disk if it changed, at most once every save_interval seconds unless forced.  Each write goes to its
+        own temporary file, so concurrent saves never rename a half-written file into place
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty or (not force and time.monotonic() - self._last_saved < self.save_interval):
+                    return
+                # Entries are replaced, never modified, so a shallow copy is a consistent snapshot to write outside the lock
+                tiles = dict(self._tiles)
+                self._dirty = False
+                self._last_saved = time.monotonic()
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.path.parent, prefix=f"{self.path.name}.", suffix='.tmp', delete=False)
+            try:
+                with temp_file:
+                    json.dump(tiles, temp_file)
+                os.replace(temp_file.name, self.path)
+            except BaseException:
+                Path(temp_file.name).unlink(missing_ok=True)
+                with self._lock:
+                    self._dirty = True
+                raise
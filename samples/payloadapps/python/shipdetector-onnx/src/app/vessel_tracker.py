@@ -0,0 +1,243 @@
+"""
+Incremental tracking of vessels across repeat captures of the same coordinates
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from georeference import GeoReference
+
+METERS_PER_DEGREE = 111320.0
+
+# Size in degrees of the grid cells tracks are bucketed by, so a scene only gates against the tracks around it
+GRID_CELL_DEGREES = 0.01
+
+
+def scene_footprint(georeference: GeoReference, width: int, height: int) -> Tuple[float, float, float, float]:
+    """
+    Returns the (min longitude, max longitude, min latitude, max latitude) bounds of an image's corners
+    """
+    longitudes, latitudes = georeference.pixel_to_lonlat(np.array([0, width, 0, width]), np.array([0, 0, height, height]))
+    return float(longitudes.min()), float(longitudes.max()), float(latitudes.min()), float(latitudes.max())
+
+
+@dataclass
+class TrackEvent:
+    """
+    What a scene showed about one track: a new vessel, a vessel that moved or stayed put, or a vessel no longer seen
+    """
+
+    event: str
+    """
+    "new", "moved", "stationary" or "lost"
+    """
+
+    track_id: int
+    longitude: float
+    latitude: float
+
+    detection: Optional[int] = None
+    """
+    Index of the scene's detection the event is for.  None for lost tracks
+    """
+
+    moved_meters: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class VesselTracker:
+    """
+    Tracks of the vessels seen so far, updated one scene at a time.  Each scene's detections are gated against the tracks
+    around the scene, assigned to the nearest track in the gate, and the rest start new tracks.  Tracks inside a scene that
+    are missed max_misses scenes in a row are reported lost and dropped.
+
+    Each track is kept as its last position, when it was last seen, and its hit and miss counts, in a JSON file.
+    """
+
+    def __init__(self, path: str, gate_meters: float = 300.0, max_speed: float = 0.0, moved_meters: float = 50.0,
+                 max_misses: int = 3, max_tracks: int = 100000, max_gate_meters: float = 5000.0):
+        """
+        Args:
+            path (str): Path to the JSON file backing the tracks.
+            gate_meters (float, optional): Furthest a detection can be from a track to continue it. Defaults to 300.
+            max_speed (float, optional): Meters per second the gate widens by for the time since a track was last seen. Defaults to 0.
+            moved_meters (float, optional): Distance beyond which a continued track counts as moved. Defaults to 50.
+            max_misses (int, optional): Scenes in a row a track can be missed before it is lost. Defaults to 3.
+            max_tracks (int, optional): Maximum number of tracks kept; the longest unseen are dropped first. Defaults to 100000.
+            max_gate_meters (float, optional): Widest the gate of a long unseen track grows to with max_speed. Defaults to 5000.
+        """
+        self.path = Path(path)
+        self.gate_meters = gate_meters
+        self.max_speed = max_speed
+        self.moved_meters = moved_meters
+        self.max_misses = max_misses
+        self.max_tracks = max_tracks
+        self.max_gate_meters = max(gate_meters, max_gate_meters)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._next_id = 1
+        # Track ID -> [longitude, latitude, last seen, hits, misses]
+        self._tracks: Dict[int, list] = {}
+        self._grid: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+
+        if self.path.is_file():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self._next_id = state['next_id']
+            for track_id, track in state['tracks'].items():
+                self._add(int(track_id), track)
+
+    @property
+    def track_count(self) -> int:
+        """
+        Number of tracks
+        """
+        with self._lock:
+            return len(self._tracks)
+
+    def update(self, longitudes: np.ndarray, latitudes: np.ndarray, footprint: Tuple[float, float, float, float], captured_at: float,
+               observed: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None) -> List[TrackEvent]:
+        """
+        Associates a scene's detections with the tracks and updates them
+
+        Args:
+            longitudes (np.ndarray): Longitude of each detection.
+            latitudes (np.ndarray): Latitude of each detection.
+            footprint (Tuple): The scene's (min longitude, max longitude, min latitude, max latitude), see scene_footprint.
+            captured_at (float): Capture time of the scene in seconds since the epoch.
+            observed (Callable, optional): Returns which of the given longitudes and latitudes the scene was searched for ships at.
+                Tracks elsewhere in the footprint, e.g. in chips outside the areas of interest or left over when the time budget ran
+                out, are not counted as missed.  Defaults to the whole footprint.
+
+        Returns:
+            List[TrackEvent]: One event per detection, in detection order, then one per track lost.
+        """
+        longitudes = np.asarray(longitudes, dtype=float).reshape(-1)
+        latitudes = np.asarray(latitudes, dtype=float).reshape(-1)
+        min_longitude, max_longitude, min_latitude, max_latitude = footprint
+
+        with self._lock:
+            # Tracks the scene's detections could belong to: those around the footprint, out to the widest gate any track can have
+            widest_gate = self.max_gate_meters if self.max_speed > 0 else self.gate_meters
+            margin_latitude = widest_gate / METERS_PER_DEGREE
+            margin_longitude = margin_latitude / max(0.01, math.cos(math.radians(max(abs(min_latitude), abs(max_latitude)))))
+            candidate_ids = np.array(sorted(self._tracks_in(min_longitude - margin_longitude, max_longitude + margin_longitude,
+                                                            min_latitude - margin_latitude, max_latitude + margin_latitude)), dtype=np.int64)
+            candidates = np.array([self._tracks[track_id][:3] for track_id in candidate_ids], dtype=float).reshape(-1, 3)
+
+            # Distances between every detection and candidate, in meters on a local equirectangular projection
+            meters_per_degree_longitude = METERS_PER_DEGREE * np.cos(np.radians((latitudes[:, None] + candidates[None, :, 1]) / 2))
+            distances = np.hypot((longitudes[:, None] - candidates[None, :, 0]) * meters_per_degree_longitude,
+                                 (latitudes[:, None] - candidates[None, :, 1]) * METERS_PER_DEGREE)
+            gates = np.minimum(self.gate_meters + self.max_speed * np.maximum(0.0, captured_at - candidates[:, 2]), self.max_gate_meters)
+            distances[distances > gates[None, :]] = np.inf
+
+            # Greedy nearest-first assignment over the gated pairs
+            assigned_tracks = np.full(len(longitudes), -1, dtype=np.int64)
+            track_taken = np.zeros(len(candidate_ids), dtype=bool)
+            gated = np.flatnonzero(np.isfinite(distances))
+            for flat_index in gated[np.argsort(distances.flat[gated], kind='stable')]:
+                detection, candidate = divmod(int(flat_index), len(candidate_ids))
+                if assigned_tracks[detection] < 0 and not track_taken[candidate]:
+                    assigned_tracks[detection] = candidate
+                    track_taken[candidate] = True
+
+            events = []
+            for detection, candidate in enumerate(assigned_tracks):
+                longitude, latitude = float(longitudes[detection]), float(latitudes[detection])
+                if candidate < 0:
+                    track_id = self._next_id
+                    self._next_id += 1
+                    self._add(track_id, [longitude, latitude, captured_at, 1, 0])
+                    events.append(TrackEvent("new", track_id, longitude, latitude, detection))
+                    continue
+
+                track_id = int(candidate_ids[candidate])
+                moved = float(distances[detection, candidate])
+                self._move(track_id, longitude, latitude)
+                track = self._tracks[track_id]
+                track[2], track[3], track[4] = max(track[2], captured_at), track[3] + 1, 0
+                events.append(TrackEvent("moved" if moved > self.moved_meters else "stationary", track_id, longitude, latitude, detection, round(moved, 1)))
+
+            # Tracks inside the part of the scene that was searched but that were not seen in it
+            inside = ((candidates[:, 0] >= min_longitude) & (candidates[:, 0] <= max_longitude)
+                      & (candidates[:, 1] >= min_latitude) & (candidates[:, 1] <= max_latitude) & ~track_taken)
+            if observed is not None and inside.any():
+                inside[inside] = observed(candidates[inside, 0], candidates[inside, 1])
+            for candidate in np.flatnonzero(inside):
+                track_id = int(candidate_ids[candidate])
+                track = self._tracks[track_id]
+                track[4] += 1
+                if track[4] >= self.max_misses:
+                    events.append(TrackEvent("lost", track_id, track[0], track[1]))
+                    self._remove(track_id)
+
+            while len(self._tracks) > self.max_tracks:
+                self._remove(min(self._tracks, key=lambda track_id: self._tracks[track_id][2]))
+
+        return events
+
+    def save(self):
+        """
+        Writes the tracks to disk.  Each write goes to its own temporary file, so concurrent saves never rename a half-written file into place
+        """
+        with self._save_lock:
+            with self._lock:
+                state = json.dumps({'next_id': self._next_id, 'tracks': self._tracks})
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.path.parent, prefix=f"{self.path.name}.", suffix='.tmp', delete=False)
+            try:
+                with temp_file:
+                    temp_file.write(state)
+                os.replace(temp_file.name, self.path)
+            except BaseException:
+                Path(temp_file.name).unlink(missing_ok=True)
+                raise
+
+    @staticmethod
+    def _cell(longitude: float, latitude: float) -> Tuple[int, int]:
+        return math.floor(longitude / GRID_CELL_DEGREES), math.floor(latitude / GRID_CELL_DEGREES)
+
+    def _tracks_in(self, min_longitude: float, max_longitude: float, min_latitude: float, max_latitude: float) -> Set[int]:
+        """
+        Returns the IDs of the tracks in the grid cells covering the bounds.  Callers hold the lock
+        """
+        min_x, min_y = self._cell(min_longitude, min_latitude)
+        max_x, max_y = self._cell(max_longitude, max_latitude)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._grid):
+            return {track_id for (x, y), cell in self._grid.items() if min_x <= x <= max_x and min_y <= y <= max_y for track_id in cell}
+        return {track_id for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1) for track_id in self._grid.get((x, y), ())}
+
+    def _add(self, track_id: int, track: list):
+        self._tracks[track_id] = track
+        self._grid[self._cell(track[0], track[1])].add(track_id)
+
+    def _move(self, track_id: int, longitude: float, latitude: float):
+        track = self._tracks[track_id]
+        old_cell, new_cell = self._cell(track[0], track[1]), self._cell(longitude, latitude)
+        if old_cell != new_cell:
+            self._discard_from_grid(old_cell, track_id)
+            self._grid[new_cell].add(track_id)
+        track[0], track[1] = longitude, latitude
+
+    def _remove(self, track_id: int):
+        track = self._tracks.pop(track_id)
+        self._discard_from_grid(self._cell(track[0], track[1]), track_id)
+
+    def _discard_from_grid(self, cell: Tuple[int, int], track_id: int):
+        tracks = self._grid.get(cell)
+        if tracks is not None:
+            tracks.discard(track_id)
+            if not tracks:
+                del self._grid[cell]
@@ -0,0 +1,182 @@
+"""
+Crash-resumable journal of queued images and completed tiles
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from image_job import ImageJob
+
+
+class WorkJournal:
+    """
+    Append-only JSON lines journal of the image processor's work.  Every queued image, completed tile and
+    finished or failed image is recorded so a restarted pod can reload pending work and skip tiles that already have results.
+
+    Tile records are fsync'd in batches, and by a background thread once they have waited fsync_interval; queued and
+    finished records are fsync'd immediately since losing them means dropping or repeating a whole image.
+
+    The journal is compacted to the pending work when it is opened, and when an image finishes once it has grown past compact_size.
+    """
+
+    def __init__(self, path: str, fsync_batch_size: int = 32, fsync_interval: float = 1.0, compact_size: int = 1024 * 1024):
+        """
+        Loads any existing journal at path, compacts it to the work that is still pending, and opens it for appending.
+
+        Args:
+            path (str): Path to the journal file.
+            fsync_batch_size (int, optional): Number of tile records written between fsyncs. Defaults to 32.
+            fsync_interval (float, optional): Maximum number of seconds a tile record waits for an fsync. Defaults to 1.0.
+            compact_size (int, optional): Size in bytes past which the journal is compacted when an image finishes. Defaults to 1 MiB.
+        """
+        self.path = Path(path)
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+        self.compact_size = compact_size
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, dict] = {}
+        self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+        self._closed = threading.Event()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+        # Without new records to trigger it, the last tiles of a burst are fsync'd by a background thread
+        if self.fsync_interval > 0:
+            threading.Thread(target=self._sync_periodically, daemon=True).start()
+
+    @staticmethod
+    def tile_key(chip_y_start: int, chip_x_start: int, chip_height: int, chip_width: int, decode_scale: float = 1.0) -> str:
+        """
+        Returns the key of a tile: its origin plus the chip size and decode resolution of the grid it belongs to, so tiles of an
+        image resumed with another chip grid, e.g. after the chipping scale was changed, are re-inferred instead of mixed in
+        """
+        return f"{chip_y_start}_{chip_x_start}_{chip_height}x{chip_width}@{decode_scale:g}"
+
+    def _replay(self):
+        """
+        Rebuilds the pending work from the records on disk.  A torn final record from a crash mid-write is ignored.
+        """
+        if not self.path.is_file():
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: dict):
+        image_path = record['image']
+        if record['op'] == 'queued':
+            self._pending.setdefault(image_path, {'tracking_id': record.get('tracking_id', ''), 'tiles': {}})
+        elif record['op'] == 'tile' and image_path in self._pending:
+            self._pending[image_path]['tiles'][record['tile']] = record['detections']
+        elif record['op'] in ('done', 'failed'):
+            self._pending.pop(image_path, None)
+
+    def _compact(self):
+        """
+        Rewrites the journal with only the pending work so it does not grow without bound across restarts
+        """
+        compacted_path = self.path.with_name(f"{self.path.name}.compact")
+        with open(compacted_path, 'w', encoding='utf-8') as f:
+            for image_path, state in self._pending.items():
+                f.write(json.dumps({'op': 'queued', 'image': image_path, 'tracking_id': state['tracking_id']}) + '\n')
+                for tile_key, detections in state['tiles'].items():
+                    f.write(json.dumps({'op': 'tile', 'image': image_path, 'tile': tile_key, 'detections': detections}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(compacted_path, self.path)
+
+    def _append(self, record: dict, sync: bool):
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record) + '\n')
+            self._unsynced_records += 1
+            if sync or self._unsynced_records >= self.fsync_batch_size or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+
+    def _sync_periodically(self):
+        while not self._closed.wait(self.fsync_interval):
+            with self._lock:
+                if self._unsynced_records and not self._file.closed and time.monotonic() - self._last_sync >= self.fsync_interval:
+                    self._sync()
+
+    def pending_jobs(self) -> List[ImageJob]:
+        """
+        Returns the images that were queued but not finished, in the order they were queued
+        """
+        with self._lock:
+            return [ImageJob(image_path=image_path, tracking_id=state['tracking_id']) for image_path, state in self._pending.items()]
+
+    def is_pending(self, image_path: str) -> bool:
+        """
+        Returns True if the image is queued or in progress
+        """
+        with self._lock:
+            return image_path in self._pending
+
+    def completed_tiles(self, image_path: str) -> Dict[str, List[dict]]:
+        """
+        Returns the detections already recorded for each completed tile of the image, keyed by tile
+        """
+        with self._lock:
+            state = self._pending.get(image_path)
+            return dict(state['tiles']) if state else {}
+
+    def record_queued(self, image_job: ImageJob):
+        """
+        Records that an image was queued for processing
+        """
+        self._append({'op': 'queued', 'image': image_job.image_path, 'tracking_id': image_job.tracking_id}, sync=True)
+
+    def record_tile(self, image_path: str, tile_key: str, detections: List[dict]):
+        """
+        Records the detections of a completed tile.  Detections are stored in image coordinates.
+        """
+        self._append({'op': 'tile', 'image': image_path, 'tile': tile_key, 'detections': detections}, sync=False)
+
+    def record_done(self, image_path: str):
+        """
+        Records that all of an image's products have been written
+        """
+        self._append({'op': 'done', 'image': image_path}, sync=True)
+
+        # Finished images leave only dead records behind, so this is when compacting pays off
+        with self._lock:
+            if not self._file.closed and self._file.tell() > self.compact_size:
+                self._file.close()
+                self._compact()
+                self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record_failed(self, image_path: str, error: str):
+        """
+        Records that an image could not be processed, so it is not resumed again on the next start
+        """
+        self._append({'op': 'failed', 'image': image_path, 'error': error}, sync=True)
+
+    def close(self):
+        """
+        Flushes outstanding records and closes the journal
+        """
+        self._closed.set()
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
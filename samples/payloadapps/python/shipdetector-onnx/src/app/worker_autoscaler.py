@@ -0,0 +1,110 @@
+"""
+Decides how many image processor workers to run
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+
+class WorkerAutoscaler:
+    """
+    Sizes the worker pool from the queue depth, how long the oldest image has waited and the measured memory per busy worker,
+    within min/max bounds, the container's CPU quota and its memory limit.
+
+    Workers are added one at a time while images wait longer than target_wait, and retired one at a time once the queue has
+    stayed empty with a worker idle for scale_down_cooldown, so a queue that drains between images does not cycle workers
+    and their model sessions.
+    """
+
+    def __init__(self, min_workers: int, max_workers: int, cpu_limit: float, memory_limit: Optional[int],
+                 base_memory: int = 0, memory_headroom: float = 0.85, target_wait: float = 10.0, memory_samples: int = 20,
+                 scale_down_cooldown: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            min_workers (int): Fewest workers to keep running.
+            max_workers (int): Most workers to run.  0 uses the CPU quota.
+            cpu_limit (float): CPUs allotted to the container.
+            memory_limit (int): Container memory limit in bytes, or None if unlimited.
+            base_memory (int, optional): Resident memory of the app before any worker started. Defaults to 0.
+            memory_headroom (float, optional): Fraction of the memory limit the workers may grow into. Defaults to 0.85.
+            target_wait (float, optional): Seconds an image may wait in the queue before another worker is added. Defaults to 10.0.
+            memory_samples (int, optional): Number of recent per-worker memory measurements to keep. Defaults to 20.
+            scale_down_cooldown (float, optional): Seconds the queue must stay empty with a worker idle before a worker is retired. Defaults to 60.
+            clock (Callable, optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max_workers if max_workers > 0 else max(1, math.floor(cpu_limit))
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.base_memory = base_memory
+        self.memory_headroom = memory_headroom
+        self.target_wait = target_wait
+        self.scale_down_cooldown = scale_down_cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._memory_per_worker = deque(maxlen=memory_samples)
+        self._idle_since: Optional[float] = None
+
+    def record_memory(self, process_memory: int, busy_workers: int):
+        """
+        Records the process's resident memory measured while busy_workers were processing images
+        """
+        if busy_workers <= 0:
+            return
+        with self._lock:
+            self._memory_per_worker.append(max(0, process_memory - self.base_memory) / busy_workers)
+
+    @property
+    def memory_per_worker(self) -> Optional[float]:
+        """
+        Largest recently measured memory per busy worker, or None before the first measurement
+        """
+        with self._lock:
+            return max(self._memory_per_worker) if self._memory_per_worker else None
+
+    def worker_ceiling(self) -> int:
+        """
+        Most workers that fit the CPU quota, max_workers and the memory limit
+        """
+        ceiling = min(self.max_workers, max(1, math.ceil(self.cpu_limit)))
+
+        memory_per_worker = self.memory_per_worker
+        if self.memory_limit is not None and memory_per_worker:
+            memory_budget = self.memory_limit * self.memory_headroom - self.base_memory
+            ceiling = min(ceiling, max(1, math.floor(memory_budget / memory_per_worker)))
+
+        return max(self.min_workers, ceiling)
+
+    def desired_workers(self, current_workers: int, queue_depth: int, oldest_wait: float, busy_workers: int) -> int:
+        """
+        Returns the number of workers to run next.
+
+        Args:
+            current_workers (int): Workers running now.
+            queue_depth (int): Images waiting to be processed.
+            oldest_wait (float): Seconds the oldest waiting image has been queued.
+            busy_workers (int): Workers processing an image now.
+        """
+        ceiling = self.worker_ceiling()
+
+        # An empty queue only means a worker is spare if one is idle, and only once it has stayed that way for the cooldown
+        now = self.clock()
+        if queue_depth > 0 or busy_workers >= current_workers:
+            self._idle_since = None
+        elif self._idle_since is None:
+            self._idle_since = now
+
+        if current_workers > ceiling:
+            desired = ceiling
+        elif queue_depth > 0 and oldest_wait >= self.target_wait:
+            desired = current_workers + 1
+        elif self._idle_since is not None and now - self._idle_since >= self.scale_down_cooldown:
+            desired = current_workers - 1
+            # Each further retirement waits out a cooldown of its own
+            self._idle_since = now
+        else:
+            desired = current_workers
+
+        return min(ceiling, max(self.min_workers, desired))
@@ -4,12 +4,16 @@ Shared pytest fixtures for shipdetector-onnx tests.
 This module provides common fixtures used across unit and integration tests.
 """
 import json
+import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import Mock, MagicMock
 import numpy as np
 import pytest
 
+# Modules in src/app import each other by module name, the same way main.py runs them
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "app"))
+
 
 @pytest.fixture
 def temp_dir():
@@ -191,3 +195,23 @@ def mock_complete_config_setup(temp_dir, mock_app_config_data, mock_labels_file,
     (inbox_folder / "labels.txt").write_text("ship\nboat\nvessel\n")
 
     return config_path, inbox_folder, outbox_folder
+
+
+@pytest.fixture
+def sample_geotiff_file(temp_dir):
+    """
+    Create a small 4-band (R, G, B, NIR) NAIP-style GeoTIFF in UTM zone 10N with 0.6 m pixels.
+
+    Returns:
+        Path: Path to the GeoTIFF.
+    """
+    import rasterio
+    from rasterio.transform import from_origin
+
+    geotiff_path = temp_dir / "naip_scene.tif"
+    height, width = 256, 320
+    bands = np.random.default_rng(0).integers(0, 256, (4, height, width), dtype=np.uint8)
+    with rasterio.open(geotiff_path, 'w', driver='GTiff', height=height, width=width, count=4, dtype='uint8',
+                       crs='EPSG:26910', transform=from_origin(540000.0, 5236000.0, 0.6, 0.6)) as dataset:
+        dataset.write(bands)
+    return geotiff_path
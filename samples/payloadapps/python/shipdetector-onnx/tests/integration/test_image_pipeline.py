@@ -13,8 +13,39 @@ import cv2
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
-from app.image_processor import ImageProcessor
+from app.config_store import ConfigStore
+from app.image_processor import DEFERRED_QUEUE, ImageJob, ImageProcessor
+from app.tile_scheduler import TileCoverage
 from app.ship_detection import ShipDetection
+from app.work_journal import WorkJournal
+
+
+def disable_optional_features(mock_config):
+    """Switch off the optional processor features so only the mocked model is exercised."""
+    mock_config.WORK_JOURNAL_ENABLED = False
+    mock_config.RESULT_CACHE_ENABLED = False
+    mock_config.CHANGE_DETECTION_ENABLED = False
+    mock_config.DETECTION_INDEX_ENABLED = False
+    mock_config.VESSEL_TRACKING_ENABLED = False
+    mock_config.AUTOSCALE_ENABLED = False
+    mock_config.MEMORY_GOVERNOR_ENABLED = False
+    mock_config.MODEL_WARMUP_ENABLED = False
+    mock_config.CPU_PARTITIONING_ENABLED = False
+    mock_config.PROFILING_IMAGES = 0
+    mock_config.IMAGE_DECODE_SCALE = 1.0
+    mock_config.MODEL_TARGET_GSD = 0.0
+    mock_config.AOI_POLYGONS = []
+    mock_config.AOI_FILENAME = ""
+    mock_config.IMAGE_TIME_BUDGET_SECONDS = 0.0
+    mock_config.IMAGE_TIME_BUDGET_REQUEUE = False
+    mock_config.LOG_BATCH_SIZE = 0
+    mock_config.LOG_FLUSH_INTERVAL = 2.0
+    mock_config.LOG_MAX_RECORDS_PER_MINUTE = 0
+    mock_config.LOG_SAMPLED_DETECTIONS = 5
+    mock_config.SLO_LATENCY_SECONDS = 0.0
+    mock_config.SLO_PERCENTILE = 95.0
+    mock_config.SLO_WINDOW_SECONDS = 900.0
+    return mock_config
 
 
 class TestImageProcessingPipeline:
@@ -22,8 +53,7 @@ class TestImageProcessingPipeline:
 
     @pytest.mark.integration
     @patch('app.image_processor.ObjectDetection')
-    @patch('app.image_processor.AppConfig')
-    def test_complete_pipeline_with_small_image(self, mock_app_config_class, mock_object_detection_class,
+    def test_complete_pipeline_with_small_image(self, mock_object_detection_class,
                                                  temp_dir, sample_small_image):
         """
         Test complete pipeline with a small image (no chipping required).
@@ -35,7 +65,7 @@ class TestImageProcessingPipeline:
         4. Output files are created
         """
         # Arrange - Setup mock configuration
-        mock_config = Mock()
+        mock_config = disable_optional_features(Mock())
         mock_config.NUM_OF_WORKERS = 1
         mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
         mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
@@ -45,7 +75,6 @@ class TestImageProcessingPipeline:
         mock_config.IMG_CHIPPING_SCALE = 2
         mock_config.IMG_CHIPPING_PADDING = 10
         mock_config.DETECTION_LABELS = ["ship"]
-        mock_app_config_class.return_value = mock_config
 
         # Create directories
         (temp_dir / "inbox").mkdir()
@@ -67,7 +96,7 @@ class TestImageProcessingPipeline:
         cv2.imwrite(str(test_image_path), sample_small_image)
 
         # Act - Create processor and add image to queue
-        processor = ImageProcessor()
+        processor = ImageProcessor(ConfigStore(mock_config))
         ImageProcessor.add_image_to_queue(str(test_image_path))
 
         # Manually call monitor_queue logic for testing
@@ -76,7 +105,7 @@ class TestImageProcessingPipeline:
         from app.image_processor import IMAGE_QUEUE
 
         if not IMAGE_QUEUE.empty():
-            input_image_path = Path(IMAGE_QUEUE.get())
+            input_image_path = Path(IMAGE_QUEUE.get().image_path)
             raw_image = cv2.imread(str(input_image_path))
 
             # Run detection
@@ -90,8 +119,7 @@ class TestImageProcessingPipeline:
 
     @pytest.mark.integration
     @patch('app.image_processor.ObjectDetection')
-    @patch('app.image_processor.AppConfig')
-    def test_pipeline_filters_low_confidence_detections(self, mock_app_config_class, mock_object_detection_class,
+    def test_pipeline_filters_low_confidence_detections(self, mock_object_detection_class,
                                                          temp_dir, sample_small_image):
         """
         Test that detections below threshold are filtered out.
@@ -99,7 +127,7 @@ class TestImageProcessingPipeline:
         This test verifies the threshold filtering logic works correctly.
         """
         # Arrange
-        mock_config = Mock()
+        mock_config = disable_optional_features(Mock())
         mock_config.NUM_OF_WORKERS = 1
         mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
         mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
@@ -109,7 +137,6 @@ class TestImageProcessingPipeline:
         mock_config.IMG_CHIPPING_SCALE = 2
         mock_config.IMG_CHIPPING_PADDING = 10
         mock_config.DETECTION_LABELS = ["ship"]
-        mock_app_config_class.return_value = mock_config
 
         # Create directories
         (temp_dir / "inbox").mkdir()
@@ -126,7 +153,7 @@ class TestImageProcessingPipeline:
         mock_object_detection_class.return_value = mock_detector
 
         # Act
-        processor = ImageProcessor()
+        processor = ImageProcessor(ConfigStore(mock_config))
 
         # Parse predictions manually to test filtering
         ship_predictions = mock_detector.predict_image(sample_small_image)
@@ -142,15 +169,14 @@ class TestImageProcessingPipeline:
 
     @pytest.mark.integration
     @patch('app.image_processor.ObjectDetection')
-    @patch('app.image_processor.AppConfig')
-    def test_pipeline_error_propagation(self, mock_app_config_class, mock_object_detection_class, temp_dir):
+    def test_pipeline_error_propagation(self, mock_object_detection_class, temp_dir):
         """
         Test that errors in the pipeline are properly propagated.
 
         This test verifies error handling throughout the pipeline.
         """
         # Arrange
-        mock_config = Mock()
+        mock_config = disable_optional_features(Mock())
         mock_config.NUM_OF_WORKERS = 1
         mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
         mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
@@ -158,7 +184,6 @@ class TestImageProcessingPipeline:
         mock_config.DETECTION_THRESHOLD = 0.8
         mock_config.IMG_CHIPPING_SCALE = 2
         mock_config.DETECTION_LABELS = ["ship"]
-        mock_app_config_class.return_value = mock_config
 
         (temp_dir / "inbox").mkdir()
         (temp_dir / "outbox").mkdir()
@@ -170,27 +195,76 @@ class TestImageProcessingPipeline:
         mock_object_detection_class.return_value = mock_detector
 
         # Act & Assert
-        processor = ImageProcessor()
+        processor = ImageProcessor(ConfigStore(mock_config))
 
         # Verify that calling predict_image raises the error
         with pytest.raises(RuntimeError, match="Model inference failed"):
             mock_detector.predict_image(np.zeros((416, 416, 3)))
 
+    @pytest.mark.integration
+    @patch('app.image_processor.ObjectDetection')
+    def test_resumed_missing_or_corrupt_images_do_not_stop_the_worker(self, mock_object_detection_class, temp_dir, monkeypatch):
+        """
+        Test that resuming a work journal drops images whose file is gone, and that a worker records an image it cannot
+        decode as failed and moves on to the next image instead of dying.
+        """
+        # Arrange
+        mock_config = disable_optional_features(Mock())
+        mock_config.NUM_OF_WORKERS = 0
+        mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
+        mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
+        mock_config.OUTBOX_FOLDER_CHIPS = "chips"
+        mock_config.STATE_FOLDER = str(temp_dir / "state")
+        mock_config.MODEL_FILENAME = "model.onnx"
+        mock_config.DETECTION_THRESHOLD = 0.8
+        mock_config.IMG_CHIPPING_SCALE = 2
+        mock_config.IMG_CHIPPING_PADDING = 10
+        mock_config.DETECTION_LABELS = ["ship"]
+        mock_config.WORK_JOURNAL_ENABLED = True
+        mock_config.WORK_JOURNAL_FSYNC_BATCH_SIZE = 32
+        mock_config.WORK_JOURNAL_FSYNC_INTERVAL = 0.0
+        mock_config.WORK_JOURNAL_COMPACT_MB = 1
+        monkeypatch.setattr(ImageProcessor, 'work_journal', None)
+
+        mock_detector = Mock()
+        mock_detector.input_shape = [416, 416]
+        mock_object_detection_class.return_value = mock_detector
+
+        missing_image_path = str(temp_dir / "missing.jpg")
+        corrupt_image_path = temp_dir / "corrupt.jpg"
+        corrupt_image_path.write_bytes(b"not an image")
+        journal = WorkJournal(str(temp_dir / "state" / "work-journal.jsonl"), fsync_interval=0.0)
+        journal.record_queued(ImageJob(missing_image_path))
+        journal.close()
+
+        # Act - The corrupt image is handed to the worker directly, and the next request for an image ends the loop
+        processor = ImageProcessor(ConfigStore(mock_config))
+        resumed = processor.work_journal.pending_jobs()
+        processor.work_journal.record_queued(ImageJob(str(corrupt_image_path)))
+        processor.next_image_job = Mock(side_effect=[ImageJob(str(corrupt_image_path))])
+        with pytest.raises(StopIteration):
+            processor.monitor_queue()
+        processor.work_journal.close()
+
+        # Assert
+        assert resumed == []
+        assert processor.next_image_job.call_count == 2
+        assert WorkJournal(str(temp_dir / "state" / "work-journal.jsonl"), fsync_interval=0.0).pending_jobs() == []
+
 
 class TestImageChipping:
     """Integration tests for large image chipping functionality."""
 
     @pytest.mark.integration
     @patch('app.image_processor.ObjectDetection')
-    @patch('app.image_processor.AppConfig')
-    def test_large_image_requires_chipping(self, mock_app_config_class, mock_object_detection_class, temp_dir):
+    def test_large_image_requires_chipping(self, mock_object_detection_class, temp_dir):
         """
         Test that large images are properly chipped for processing.
 
         This test verifies the image chipping logic when image exceeds chip size.
         """
         # Arrange
-        mock_config = Mock()
+        mock_config = disable_optional_features(Mock())
         mock_config.NUM_OF_WORKERS = 1
         mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
         mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
@@ -200,7 +274,6 @@ class TestImageChipping:
         mock_config.IMG_CHIPPING_SCALE = 2
         mock_config.IMG_CHIPPING_PADDING = 10
         mock_config.DETECTION_LABELS = ["ship"]
-        mock_app_config_class.return_value = mock_config
 
         (temp_dir / "inbox").mkdir()
         (temp_dir / "outbox").mkdir()
@@ -217,7 +290,7 @@ class TestImageChipping:
         mock_object_detection_class.return_value = mock_detector
 
         # Create processor
-        processor = ImageProcessor()
+        processor = ImageProcessor(ConfigStore(mock_config))
 
         # Calculate chip dimensions
         chip_max_height = round(416 * 2)  # 832
@@ -252,29 +325,239 @@ class TestImageChipping:
         assert mock_detector.predict_image.call_count == 4
         assert isinstance(all_detections, list)
 
+    @pytest.mark.integration
+    @patch('app.image_processor.ObjectDetection')
+    def test_tile_mask_limits_chips_inferred(self, mock_object_detection_class, temp_dir):
+        """
+        Test that only the chips in an area of interest's tile mask are inferred.
+        """
+        # Arrange
+        mock_config = disable_optional_features(Mock())
+        mock_config.NUM_OF_WORKERS = 1
+        mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
+        mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
+        mock_config.OUTBOX_FOLDER_CHIPS = "chips"
+        mock_config.MODEL_FILENAME = "model.onnx"
+        mock_config.DETECTION_THRESHOLD = 0.8
+        mock_config.IMG_CHIPPING_SCALE = 2
+        mock_config.IMG_CHIPPING_PADDING = 10
+        mock_config.DETECTION_LABELS = ["ship"]
+
+        mock_detector = Mock()
+        mock_detector.input_shape = [416, 416]
+        mock_detector.predict_image.return_value = {
+            'detected_boxes': np.array([[[0.1, 0.2, 0.3, 0.4]]]),
+            'detected_classes': np.array([[0]]),
+            'detected_scores': np.array([[0.9]])
+        }
+        mock_object_detection_class.return_value = mock_detector
+
+        processor = ImageProcessor(ConfigStore(mock_config))
+        large_image = np.random.randint(0, 256, (1000, 1200, 3), dtype=np.uint8)
+
+        # Act - Only the bottom right of the 2x2 chip grid is in the area of interest
+        all_detections = processor.run_ship_detection_large_image(
+            ship_detection=mock_detector,
+            raw_image=large_image,
+            chip_max_height=832,
+            chip_max_width=832,
+            tile_mask=np.array([[False, False], [False, True]])
+        )
+
+        # Assert
+        assert mock_detector.predict_image.call_count == 1
+        assert mock_detector.predict_image.call_args[0][0].shape == (1000 - 832, 1200 - 832, 3)
+        assert all_detections[0].x_coordinate >= 832 and all_detections[0].y_coordinate >= 832
+
+    @pytest.mark.integration
+    @patch('app.image_processor.ObjectDetection')
+    def test_deadline_leaves_remaining_chips_unprocessed(self, mock_object_detection_class, temp_dir):
+        """
+        Test that a passed deadline stops after one chip, in the given order, and reports the chips left unprocessed.
+        """
+        # Arrange
+        mock_config = disable_optional_features(Mock())
+        mock_config.NUM_OF_WORKERS = 1
+        mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
+        mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
+        mock_config.OUTBOX_FOLDER_CHIPS = "chips"
+        mock_config.MODEL_FILENAME = "model.onnx"
+        mock_config.DETECTION_THRESHOLD = 0.8
+        mock_config.IMG_CHIPPING_SCALE = 2
+        mock_config.IMG_CHIPPING_PADDING = 10
+        mock_config.DETECTION_LABELS = ["ship"]
+
+        mock_detector = Mock()
+        mock_detector.input_shape = [416, 416]
+        mock_detector.predict_image.return_value = {
+            'detected_boxes': np.array([[[0.1, 0.2, 0.3, 0.4]]]),
+            'detected_classes': np.array([[0]]),
+            'detected_scores': np.array([[0.9]])
+        }
+        mock_object_detection_class.return_value = mock_detector
+
+        processor = ImageProcessor(ConfigStore(mock_config))
+        large_image = np.random.randint(0, 256, (1000, 1200, 3), dtype=np.uint8)
+        coverage = TileCoverage()
+
+        # Act - The bottom left chip was done on an earlier pass and the bottom right comes first
+        all_detections = processor.run_ship_detection_large_image(
+            ship_detection=mock_detector,
+            raw_image=large_image,
+            chip_max_height=832,
+            chip_max_width=832,
+            tile_order=[(832, 832), (0, 0), (0, 832), (832, 0)],
+            deadline=0.0,
+            completed_tiles={WorkJournal.tile_key(832, 0, 832, 832): [{'probability': 0.95, 'x_coordinate': 10, 'y_coordinate': 900, 'width': 20, 'height': 20}]},
+            coverage=coverage
+        )
+
+        # Assert
+        assert mock_detector.predict_image.call_count == 1
+        assert len(all_detections) == 2
+        assert coverage.tiles_total == 4
+        assert sorted(coverage.completed_tiles) == sorted([WorkJournal.tile_key(832, 0, 832, 832), WorkJournal.tile_key(832, 832, 832, 832)])
+        assert coverage.unprocessed == [(0, 0, 832, 832), (832, 0, 1200 - 832, 832)]
+
+    @pytest.mark.integration
+    @patch('app.image_processor.ObjectDetection')
+    def test_requeued_image_replaces_its_partial_products(self, mock_object_detection_class, temp_dir):
+        """
+        Test that an image processed over two or more passes writes its partial products apart, and that the final pass
+        removes them and writes one chip per detection of the whole image.  Every pass keeps the image's original timestamps
+        and only the final one counts as having written its products.
+        """
+        # Arrange
+        mock_config = disable_optional_features(Mock())
+        mock_config.NUM_OF_WORKERS = 1
+        mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
+        mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
+        mock_config.OUTBOX_FOLDER_CHIPS = "chips"
+        mock_config.MODEL_FILENAME = "model.onnx"
+        mock_config.DETECTION_THRESHOLD = 0.8
+        mock_config.IMG_CHIPPING_SCALE = 2
+        mock_config.IMG_CHIPPING_PADDING = 10
+        mock_config.DETECTION_LABELS = ["ship"]
+        mock_config.IMAGE_TIME_BUDGET_SECONDS = 1e-9
+        mock_config.IMAGE_TIME_BUDGET_REQUEUE = True
+
+        mock_detector = Mock()
+        mock_detector.input_shape = [416, 416]
+        mock_detector.predict_image.return_value = {
+            'detected_boxes': np.array([[[0.1, 0.2, 0.3, 0.4]]]),
+            'detected_classes': np.array([[0]]),
+            'detected_scores': np.array([[0.9]])
+        }
+        mock_object_detection_class.return_value = mock_detector
+
+        test_image_path = temp_dir / "scene.jpg"
+        cv2.imwrite(str(test_image_path), np.random.randint(0, 256, (1000, 1200, 3), dtype=np.uint8))
+        processor = ImageProcessor(ConfigStore(mock_config))
+        outbox = temp_dir / "outbox"
+
+        # Act - One chip per pass, so the first pass leaves three for later
+        image_job = ImageJob(str(test_image_path), sensor_data_at=5.0, file_ready_at=6.0)
+        processor.process_image(mock_detector, image_job)
+        partial_chips = sorted(path.name for path in (outbox / "partial" / "scene" / "chips").iterdir())
+        jobs = [image_job]
+        while not DEFERRED_QUEUE.empty():
+            jobs.append(DEFERRED_QUEUE.get_nowait())
+            processor.process_image(mock_detector, jobs[-1])
+
+        # Assert
+        assert partial_chips == ["scene_ship_1.jpg"]
+        assert len(jobs) == 4
+        assert all((job.sensor_data_at, job.file_ready_at, job.queued_at) == (5.0, 6.0, image_job.queued_at) for job in jobs)
+        assert [job.products_written_at is not None for job in jobs] == [False, False, False, True]
+        assert mock_detector.predict_image.call_count == 4
+        assert not (outbox / "partial" / "scene").exists()
+        assert sorted(path.name for path in (outbox / "chips").iterdir()) == [f"scene_ship_{i}.jpg" for i in range(1, 5)]
+        assert (outbox / "scene_augmented.jpg").is_file()
+
+
+class TestWorkerResources:
+    """Integration tests for what a worker holds while processing an image."""
+
+    @pytest.mark.integration
+    @patch('app.image_processor.ObjectDetection')
+    def test_memory_reservation_is_released_when_setup_raises(self, mock_object_detection_class, temp_dir):
+        """
+        Test that an image's memory budget reservation is returned when a step between reserving it and processing the
+        image raises, so the budget is not permanently shrunk.
+        """
+        # Arrange
+        mock_config = disable_optional_features(Mock())
+        mock_config.NUM_OF_WORKERS = 0
+        mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
+        mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
+        mock_config.MODEL_FILENAME = "model.onnx"
+        mock_config.MEMORY_GOVERNOR_ENABLED = True
+        mock_config.MEMORY_BUDGET_MB = 100
+        mock_config.MEMORY_BUDGET_FRACTION = 0.5
+
+        mock_detector = Mock()
+        mock_detector.input_shape = [416, 416]
+        mock_object_detection_class.return_value = mock_detector
+
+        test_image_path = temp_dir / "scene.jpg"
+        cv2.imwrite(str(test_image_path), np.zeros((200, 200, 3), dtype=np.uint8))
+        processor = ImageProcessor(ConfigStore(mock_config))
+        processor.profiling.poll = Mock(side_effect=OSError("marker file vanished"))
+        processor.next_image_job = Mock(side_effect=[ImageJob(str(test_image_path))])
+
+        # Act - The next request for an image ends the loop
+        with pytest.raises(StopIteration):
+            processor.monitor_queue()
+
+        # Assert
+        assert processor.profiling.poll.call_count == 1
+        assert processor.memory_governor.in_use == 0
+
+
+class TestWriteHitboxes:
+    """Integration tests for drawing detections on the augmented image."""
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("x_coordinate, y_coordinate", [(110, 10), (10, 110), (-50, 10), (10, -50)])
+    def test_boxes_outside_the_image_leave_it_unchanged(self, temp_dir, x_coordinate, y_coordinate):
+        """
+        Test that a box, outline included, starting past the image edge or ending before it neither raises nor blends another region.
+        """
+        # Arrange
+        mock_config = disable_optional_features(Mock())
+        mock_config.NUM_OF_WORKERS = 0
+        mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
+        mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
+        processor = ImageProcessor(ConfigStore(mock_config))
+        raw_image = np.full((100, 100, 3), 128, dtype=np.uint8)
+
+        # Act
+        augmented = processor.write_hitboxes(raw_image, ShipDetection(0.9, x_coordinate, y_coordinate, 20, 20), 1)
+
+        # Assert
+        assert (augmented == 128).all()
+
 
 class TestParsePredictions:
     """Integration tests for prediction parsing."""
 
     @pytest.mark.integration
-    @patch('app.image_processor.AppConfig')
-    def test_parse_predictions_formats_correctly(self, mock_app_config_class, temp_dir, mock_predictions):
+    def test_parse_predictions_formats_correctly(self, temp_dir, mock_predictions):
         """
         Test that predictions are correctly parsed into expected format.
 
         This verifies the parse_predictions method produces correct output structure.
         """
         # Arrange
-        mock_config = Mock()
+        mock_config = disable_optional_features(Mock())
         mock_config.NUM_OF_WORKERS = 1
         mock_config.INBOX_FOLDER = str(temp_dir / "inbox")
         mock_config.OUTBOX_FOLDER = str(temp_dir / "outbox")
-        mock_app_config_class.return_value = mock_config
 
         (temp_dir / "inbox").mkdir()
         (temp_dir / "outbox").mkdir()
 
-        processor = ImageProcessor()
+        processor = ImageProcessor(ConfigStore(mock_config))
         labels = ["ship", "boat"]
 
         # Act
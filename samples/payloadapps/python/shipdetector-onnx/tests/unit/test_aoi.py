@@ -0,0 +1,124 @@
+"""
+Unit tests for aoi.py module.
+
+Tests cover reading area of interest polygons, intersecting them with
+a scene's chip grid and reloading them from the inbox.
+"""
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.aoi import AoiSource, parse_geometries
+from app.georeference import GeoReference
+
+
+def pixel_box(georeference, x_start, y_start, x_end, y_end):
+    """A [longitude, latitude] ring around a box of pixels."""
+    longitudes, latitudes = georeference.pixel_to_lonlat(np.array([x_start, x_end, x_end, x_start, x_start], dtype=float),
+                                                         np.array([y_start, y_start, y_end, y_end, y_start], dtype=float))
+    return [[float(longitude), float(latitude)] for longitude, latitude in zip(longitudes, latitudes)]
+
+
+class TestParseGeometries:
+    """Tests for reading polygons from GeoJSON and config lists."""
+
+    @pytest.mark.unit
+    def test_reads_feature_collections_and_point_lists(self):
+        """Test that polygons are read from a FeatureCollection and from lists of [longitude, latitude] points."""
+        # Arrange
+        ring = [[10.0, 50.0], [10.1, 50.0], [10.1, 50.1], [10.0, 50.0]]
+        collection = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {'name': 'port'}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}},
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'MultiPolygon', 'coordinates': [[ring]]}}]}
+
+        # Act
+        from_collection = parse_geometries(collection)
+        from_points = parse_geometries([ring, tuple(tuple(point) for point in ring)])
+
+        # Assert
+        assert [geometry['type'] for geometry in from_collection] == ['Polygon', 'MultiPolygon']
+        assert from_points == [{'type': 'Polygon', 'coordinates': [ring]}] * 2
+
+    @pytest.mark.unit
+    def test_rejects_non_polygons(self):
+        """Test that geometries other than polygons are rejected."""
+        # Arrange & Act & Assert
+        with pytest.raises(ValueError):
+            parse_geometries({'type': 'Point', 'coordinates': [10.0, 50.0]})
+
+
+class TestTileMask:
+    """Tests for intersecting areas of interest with a scene's chip grid."""
+
+    @pytest.mark.unit
+    def test_only_chips_touching_the_polygons_are_kept(self, sample_geotiff_file):
+        """Test that the mask keeps the chips a polygon touches and drops the rest."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+        source = AoiSource()
+        area = source.get([pixel_box(georeference, 10, 10, 100, 100)], "")
+
+        # Act
+        mask = area.tile_mask(georeference, 320, 256, 128, 128)
+
+        # Assert
+        assert mask.shape == (2, 3)
+        assert mask.tolist() == [[True, False, False], [False, False, False]]
+
+    @pytest.mark.unit
+    def test_chips_take_the_highest_priority_they_touch(self, sample_geotiff_file):
+        """Test that each chip gets the highest priority of the polygons it touches, and 0 outside them."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+        source = AoiSource()
+        area = source.get([
+            {'type': 'Feature', 'properties': {'priority': 3}, 'geometry': {'type': 'Polygon', 'coordinates': [pixel_box(georeference, 10, 10, 100, 100)]}},
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'Polygon', 'coordinates': [pixel_box(georeference, 10, 10, 200, 100)]}}], "")
+
+        # Act
+        priorities = area.tile_priorities(georeference, 320, 256, 128, 128)
+
+        # Assert
+        assert priorities.tolist() == [[3.0, 1.0, 0.0], [0.0, 0.0, 0.0]]
+
+
+class TestAoiSource:
+    """Tests for loading areas of interest from the config and the inbox."""
+
+    @pytest.mark.unit
+    def test_no_polygons_means_no_area_of_interest(self, temp_dir):
+        """Test that without polygons in the config or the inbox there is no area of interest."""
+        # Arrange
+        source = AoiSource()
+
+        # Act & Assert
+        assert source.get([], str(temp_dir / "aoi.geojson")) is None
+
+    @pytest.mark.unit
+    def test_file_is_reloaded_and_bad_files_keep_the_last_area(self, temp_dir):
+        """Test that a changed file is read again, and that an unreadable one is reported and the last area kept."""
+        # Arrange
+        errors = []
+        source = AoiSource(on_error=lambda path, error: errors.append(path))
+        aoi_path = temp_dir / "aoi.geojson"
+        ring = [[10.0, 50.0], [10.1, 50.0], [10.1, 50.1], [10.0, 50.0]]
+        aoi_path.write_text(json.dumps({'type': 'Polygon', 'coordinates': [ring]}))
+        first = source.get([], str(aoi_path))
+
+        # Act
+        aoi_path.write_text("{not json")
+        os.utime(aoi_path, ns=(0, os.stat(aoi_path).st_mtime_ns + 1_000_000_000))
+        after_bad_file = source.get([], str(aoi_path))
+        after_bad_file_again = source.get([], str(aoi_path))
+
+        # Assert
+        assert first is not None and len(first.geometries) == 1
+        assert after_bad_file is first
+        assert after_bad_file_again is first
+        assert errors == [str(aoi_path)]
@@ -54,6 +54,18 @@ class TestAppConfigValidLoading:
         assert config.DETECTION_LABELS == ["ship", "boat", "vessel"]
         assert len(config.DETECTION_LABELS) == 3
 
+    @pytest.mark.unit
+    def test_omitted_list_settings_default_to_empty(self, mock_complete_config_setup):
+        """Test that list settings left out of the file default to an empty list."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+
+        # Act
+        config = AppConfig(file_path=str(config_path))
+
+        # Assert
+        assert config.TASKING_TARGETS == []
+
     @pytest.mark.unit
     def test_config_creates_outbox_directories(self, mock_complete_config_setup):
         """Test that outbox directories are created if they don't exist."""
@@ -324,6 +336,45 @@ class TestAppConfigErrorHandling:
         with pytest.raises(ValueError):
             AppConfig(file_path=str(config_file))
 
+    @pytest.mark.unit
+    def test_boolean_strings_are_parsed(self, mock_complete_config_setup):
+        """Test that boolean settings given as strings are parsed instead of every non-empty string being true."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        data = json.loads(config_path.read_text())
+        data.update(RESULT_CACHE_ENABLED="false", CHANGE_DETECTION_ENABLED="True", WORK_JOURNAL_ENABLED=0)
+        config_path.write_text(json.dumps(data))
+
+        # Act
+        config = AppConfig(file_path=str(config_path))
+
+        # Assert
+        assert config.RESULT_CACHE_ENABLED is False
+        assert config.CHANGE_DETECTION_ENABLED is True
+        assert config.WORK_JOURNAL_ENABLED is False
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("changes", [
+        {"RESULT_CACHE_ENABLED": "maybe"},
+        {"DETECTION_THRESHOLD": 1.5},
+        {"DETECTION_THRESHOLD": "nan"},
+        {"IMG_CHIPPING_SCALE": 0},
+        {"NUM_OF_WORKERS": -1},
+        {"IMAGE_DECODE_SCALE": 0.0},
+        {"DETECTON_THRESHOLD": 0.5},
+    ])
+    def test_values_outside_the_schema_raise_error(self, mock_complete_config_setup, changes):
+        """Test that unparseable booleans, numbers outside their range and keys the config does not declare are rejected."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        data = json.loads(config_path.read_text())
+        data.update(changes)
+        config_path.write_text(json.dumps(data))
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            AppConfig(file_path=str(config_path))
+
 
 class TestAppConfigEdgeCases:
     """Tests for edge cases and boundary conditions."""
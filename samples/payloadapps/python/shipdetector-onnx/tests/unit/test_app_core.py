@@ -0,0 +1,166 @@
+"""
+Unit tests for app_core.py module.
+
+Tests cover running blocking calls off the event loop, waiting for files,
+and scheduling work from threads outside the loop.
+"""
+import asyncio
+import threading
+import time
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.app_core import AppCore
+
+
+class TestAppCoreBlockingCalls:
+    """Tests for running blocking calls on the executor."""
+
+    @pytest.mark.unit
+    def test_run_blocking_returns_result_from_executor_thread(self):
+        """Test that blocking calls run off the event loop thread."""
+        # Arrange
+        core = AppCore(max_blocking_calls=2)
+        loop_thread = threading.get_ident()
+
+        async def scenario():
+            return await core.run_blocking(lambda value: (value, threading.get_ident()), "tasked")
+
+        # Act
+        value, call_thread = core.run(scenario())
+
+        # Assert
+        assert value == "tasked"
+        assert call_thread != loop_thread
+
+    @pytest.mark.unit
+    def test_run_blocking_passes_keyword_arguments(self):
+        """Test that keyword arguments reach the blocking call."""
+        # Arrange
+        core = AppCore()
+
+        def sensor_tasking(sensor_id, request, metadata=None):
+            return sensor_id, request, metadata
+
+        async def scenario():
+            return await core.run_blocking(sensor_tasking, "PlanetaryComputer", "request", metadata={"key": "value"})
+
+        # Act
+        result = core.run(scenario())
+
+        # Assert
+        assert result == ("PlanetaryComputer", "request", {"key": "value"})
+
+    @pytest.mark.unit
+    def test_blocking_calls_run_concurrently(self):
+        """Test that several blocking calls are in flight at once."""
+        # Arrange
+        core = AppCore(max_blocking_calls=8)
+
+        async def scenario():
+            start = time.monotonic()
+            await asyncio.gather(*(core.run_blocking(time.sleep, 0.2) for _ in range(8)))
+            return time.monotonic() - start
+
+        # Act
+        elapsed = core.run(scenario())
+
+        # Assert
+        assert elapsed < 1.0
+
+
+class TestAppCoreFileWaits:
+    """Tests for waiting on file transfers."""
+
+    @pytest.mark.unit
+    def test_wait_for_existing_file(self, temp_dir):
+        """Test that an existing file is reported immediately."""
+        # Arrange
+        core = AppCore(file_poll_interval=0.01)
+        existing = temp_dir / "image.tif.linkResponse"
+        existing.write_text("")
+
+        # Act
+        result = core.run(core.wait_for_file(str(existing), timeout=1))
+
+        # Assert
+        assert result is True
+
+    @pytest.mark.unit
+    def test_wait_for_file_times_out(self, temp_dir):
+        """Test that a missing file returns False once the timeout expires."""
+        # Arrange
+        core = AppCore(file_poll_interval=0.01)
+
+        # Act
+        result = core.run(core.wait_for_file(str(temp_dir / "missing"), timeout=0.05))
+
+        # Assert
+        assert result is False
+
+    @pytest.mark.unit
+    def test_many_file_waits_share_the_loop_thread(self, temp_dir):
+        """Test that dozens of concurrent waits do not create a thread each."""
+        # Arrange
+        core = AppCore(file_poll_interval=0.01)
+        paths = [temp_dir / f"image_{i}.tif.linkResponse" for i in range(50)]
+        thread_count_before = threading.active_count()
+
+        async def scenario():
+            waits = [core.spawn(core.wait_for_file(str(path), timeout=2)) for path in paths]
+            await asyncio.sleep(0.05)
+            threads_while_waiting = threading.active_count()
+            for path in paths:
+                path.write_text("")
+            return await asyncio.gather(*waits), threads_while_waiting
+
+        # Act
+        results, threads_while_waiting = core.run(scenario())
+
+        # Assert
+        assert all(results)
+        assert threads_while_waiting == thread_count_before
+
+
+class TestAppCoreThreadsafeSubmission:
+    """Tests for scheduling coroutines from callback threads."""
+
+    @pytest.mark.unit
+    def test_submit_threadsafe_from_callback_thread(self):
+        """Test that a coroutine submitted from another thread runs on the loop."""
+        # Arrange
+        core = AppCore()
+        results = []
+
+        async def handler(value):
+            results.append(value)
+
+        async def scenario():
+            callback = threading.Thread(target=lambda: core.submit_threadsafe(handler("sensor_data")).result(timeout=1))
+            await core.run_blocking(lambda: (callback.start(), callback.join()))
+
+        # Act
+        core.run(scenario())
+
+        # Assert
+        assert results == ["sensor_data"]
+
+    @pytest.mark.unit
+    def test_submit_threadsafe_without_loop_raises(self):
+        """Test that submitting before the loop runs raises RuntimeError."""
+        # Arrange
+        core = AppCore()
+
+        async def handler():
+            pass
+
+        coroutine = handler()
+
+        # Act & Assert
+        with pytest.raises(RuntimeError, match="not running"):
+            core.submit_threadsafe(coroutine)
+        coroutine.close()
@@ -0,0 +1,79 @@
+"""
+Unit tests for chip_sizing.py module.
+
+Tests cover the static chipping scale, chips sized from the image's
+ground sample distance, resampling choice and the tile count.
+"""
+from pathlib import Path
+import PIL.Image
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.chip_sizing import MAX_CHIPPING_SCALE, plan_chips
+
+
+class TestStaticChipping:
+    """Tests for chips sized by the chipping scale."""
+
+    @pytest.mark.unit
+    def test_chipping_scale_is_used_without_target_gsd(self):
+        """Test that chips are the chipping scale times the model input when no target GSD is set."""
+        # Arrange & Act
+        sizing = plan_chips(2000, 1000, [416, 416], 2, ground_sample_distance=0.6, target_gsd=0.0)
+
+        # Assert
+        assert (sizing.chip_height, sizing.chip_width) == (832, 832)
+        assert sizing.tiles == 3 * 2
+        assert sizing.ground_sample_distance is None
+        assert sizing.resample is None
+
+    @pytest.mark.unit
+    def test_chipping_scale_is_used_without_image_gsd(self):
+        """Test that images that are not georeferenced fall back to the chipping scale."""
+        # Arrange & Act
+        sizing = plan_chips(600, 400, [416, 416], 3, ground_sample_distance=None, target_gsd=1.5)
+
+        # Assert
+        assert (sizing.chip_height, sizing.chip_width) == (1248, 1248)
+        assert sizing.tiles == 1
+
+
+class TestGsdAdaptiveChipping:
+    """Tests for chips sized from the image's ground sample distance."""
+
+    @pytest.mark.unit
+    def test_finer_imagery_gets_larger_area_averaged_chips(self):
+        """Test that imagery finer than the target GSD is tiled into larger chips that are area-averaged down."""
+        # Arrange & Act
+        sizing = plan_chips(4000, 4000, [416, 416], 3, ground_sample_distance=0.5, target_gsd=2.0)
+
+        # Assert
+        assert sizing.scale == 4.0
+        assert (sizing.chip_height, sizing.chip_width) == (1664, 1664)
+        assert sizing.tiles == 3 * 3
+        assert sizing.ground_sample_distance == 0.5
+        assert sizing.resample == PIL.Image.Resampling.BOX
+
+    @pytest.mark.unit
+    def test_coarser_imagery_gets_smaller_interpolated_chips(self):
+        """Test that imagery coarser than the target GSD is tiled into smaller chips that are interpolated up."""
+        # Arrange & Act
+        sizing = plan_chips(1000, 1000, [416, 416], 3, ground_sample_distance=3.0, target_gsd=1.5)
+
+        # Assert
+        assert (sizing.chip_height, sizing.chip_width) == (208, 208)
+        assert sizing.tiles == 5 * 5
+        assert sizing.resample == PIL.Image.Resampling.BICUBIC
+
+    @pytest.mark.unit
+    def test_scale_is_clamped(self):
+        """Test that an implausible GSD cannot size chips beyond the scale bounds."""
+        # Arrange & Act
+        sizing = plan_chips(10000, 10000, [416, 416], 3, ground_sample_distance=0.001, target_gsd=2.0)
+
+        # Assert
+        assert sizing.scale == MAX_CHIPPING_SCALE
+        assert sizing.chip_width == round(416 * MAX_CHIPPING_SCALE)
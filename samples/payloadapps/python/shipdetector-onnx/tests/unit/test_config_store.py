@@ -0,0 +1,202 @@
+"""
+Unit tests for config_store.py module.
+
+Tests cover read-only snapshots, schema validation, reloading a changed
+app-config.json, keeping the current snapshot when a change is invalid and
+the keys that need a restart.
+"""
+import ast
+import dataclasses
+import json
+import os
+import time
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.app_config import AppConfig
+from app.config_store import RESTART_REQUIRED_KEYS, ConfigStore
+
+SRC_FOLDER = Path(__file__).parent.parent.parent / "src" / "app"
+
+
+def config_keys_read(module_file, *function_path):
+    """Returns the AppConfig keys read through an app_config name or attribute inside the named function or method."""
+    node = ast.parse((SRC_FOLDER / module_file).read_text())
+    for name in function_path:
+        node = next(child for child in node.body if getattr(child, 'name', None) == name)
+    return {child.attr for child in ast.walk(node)
+            if isinstance(child, ast.Attribute) and child.attr.isupper()
+            and ((isinstance(child.value, ast.Name) and child.value.id == 'app_config')
+                 or (isinstance(child.value, ast.Attribute) and child.value.attr == 'app_config'))}
+
+
+def rewrite_config(config_path, **changes):
+    """Rewrites app-config.json with the given changes and a newer modification time."""
+    with open(config_path) as f:
+        data = json.load(f)
+    data.update(changes)
+    with open(config_path, 'w') as f:
+        json.dump(data, f)
+    modified = time.time() + 10
+    os.utime(config_path, (modified, modified))
+
+
+class TestConfigStoreSnapshots:
+    """Tests for read-only config snapshots."""
+
+    @pytest.mark.unit
+    def test_snapshot_is_read_only(self, mock_complete_config_setup):
+        """Test that snapshots cannot be modified and labels become a tuple."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+
+        # Act & Assert
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            store.snapshot.DETECTION_THRESHOLD = 0.1
+        assert store.snapshot.DETECTION_LABELS == ("ship", "boat", "vessel")
+
+    @pytest.mark.unit
+    def test_nested_settings_are_read_only(self, mock_complete_config_setup):
+        """Test that lists and GeoJSON objects nested inside a setting cannot be modified either."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        polygon = [[-122.5, 37.7], [-122.3, 37.7], [-122.3, 37.9], [-122.5, 37.7]]
+        rewrite_config(config_path, AOI_POLYGONS=[polygon, {"type": "Polygon", "coordinates": [polygon]}])
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+        points, geometry = store.snapshot.AOI_POLYGONS
+
+        # Act & Assert
+        with pytest.raises(TypeError):
+            points[0][0] = 0.0
+        with pytest.raises(TypeError):
+            geometry["type"] = "Point"
+        with pytest.raises(AttributeError):
+            geometry["coordinates"][0].append([0.0, 0.0])
+        assert json.loads(json.dumps(geometry)) == {"type": "Polygon", "coordinates": [polygon]}
+
+    @pytest.mark.unit
+    def test_missing_required_keys_raise_key_error(self, mock_complete_config_setup):
+        """Test that a config without a required key fails schema validation with the key's name."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        with open(config_path) as f:
+            data = json.load(f)
+        del data["DETECTION_THRESHOLD"]
+        with open(config_path, 'w') as f:
+            json.dump(data, f)
+
+        # Act & Assert
+        with pytest.raises(KeyError, match="DETECTION_THRESHOLD"):
+            AppConfig(file_path=str(config_path))
+
+
+class TestConfigStoreReload:
+    """Tests for reloading a changed app-config.json."""
+
+    @pytest.mark.unit
+    def test_reload_publishes_changed_keys(self, mock_complete_config_setup):
+        """Test that a changed file becomes the new snapshot while earlier snapshots stay unchanged."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+        previous = store.snapshot
+        rewrite_config(config_path, DETECTION_THRESHOLD=0.5)
+
+        # Act
+        changed_keys = store.reload()
+
+        # Assert
+        assert changed_keys == ["DETECTION_THRESHOLD"]
+        assert store.snapshot.DETECTION_THRESHOLD == 0.5
+        assert previous.DETECTION_THRESHOLD == 0.75
+
+    @pytest.mark.unit
+    def test_unchanged_file_is_not_reloaded(self, mock_complete_config_setup):
+        """Test that reload does nothing while the file is unchanged."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+        snapshot = store.snapshot
+
+        # Act & Assert
+        assert store.reload() == []
+        assert store.snapshot is snapshot
+
+    @pytest.mark.unit
+    def test_invalid_change_keeps_current_snapshot(self, mock_complete_config_setup):
+        """Test that a change failing validation raises and leaves the current snapshot in place."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+        rewrite_config(config_path, NUM_OF_WORKERS="many")
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            store.reload()
+        assert store.snapshot.NUM_OF_WORKERS == 4
+        assert store.reload() == []
+
+    @pytest.mark.unit
+    def test_out_of_range_change_keeps_current_snapshot(self, mock_complete_config_setup):
+        """Test that a change with a value outside its range is rejected and the current snapshot kept."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+        rewrite_config(config_path, DETECTION_THRESHOLD=75)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            store.reload()
+        assert store.snapshot.DETECTION_THRESHOLD == 0.75
+
+    @pytest.mark.unit
+    def test_watch_reloads_in_background(self, mock_complete_config_setup):
+        """Test that the watcher picks up a change and reports it."""
+        # Arrange
+        config_path, _, _ = mock_complete_config_setup
+        store = ConfigStore(AppConfig(file_path=str(config_path)), file_path=str(config_path))
+        changes = []
+        store.watch(0.01, on_change=lambda snapshot, keys: changes.append(keys))
+
+        # Act
+        rewrite_config(config_path, IMG_CHIPPING_SCALE=3)
+        deadline = time.monotonic() + 5
+        while not changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        store.stop()
+
+        # Assert
+        assert changes == [["IMG_CHIPPING_SCALE"]]
+        assert store.snapshot.IMG_CHIPPING_SCALE == 3
+
+
+class TestConfigStoreRestartRequiredKeys:
+    """Tests for the keys that only take effect after a restart."""
+
+    @pytest.mark.unit
+    def test_restart_required_keys_are_config_keys(self):
+        """Test that every restart-required key is declared on AppConfig, so a mistyped entry is caught."""
+        # Arrange
+        config_keys = {config_field.name for config_field in dataclasses.fields(AppConfig)}
+
+        # Act & Assert
+        assert sorted(set(RESTART_REQUIRED_KEYS) - config_keys) == []
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("module_file, function_path", [
+        ("image_processor.py", ("ImageProcessor", "__init__")),
+        ("main.py", ("main_async",)),
+    ])
+    def test_keys_read_at_startup_require_a_restart(self, module_file, function_path):
+        """Test that every key read while the image processor is built or the app starts is reported as needing a restart."""
+        # Act
+        keys_read = config_keys_read(module_file, *function_path)
+
+        # Assert
+        assert keys_read
+        assert sorted(keys_read - set(RESTART_REQUIRED_KEYS)) == []
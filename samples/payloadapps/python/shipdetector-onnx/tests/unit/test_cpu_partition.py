@@ -0,0 +1,66 @@
+"""
+Unit tests for cpu_partition.py module.
+
+Tests cover splitting CPUs between workers, capping them to the CPU
+quota, and handing slices out to worker threads.
+"""
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.cpu_partition import CpuPartitioner, partition_cpus
+
+
+class TestPartitionCpus:
+    """Tests for splitting CPUs into partitions."""
+
+    @pytest.mark.unit
+    def test_even_split(self):
+        """Test that CPUs are split into contiguous equal slices."""
+        # Act & Assert
+        assert partition_cpus([0, 1, 2, 3], 2) == [[0, 1], [2, 3]]
+
+    @pytest.mark.unit
+    def test_uneven_split(self):
+        """Test that leftover CPUs go to the first slices."""
+        # Act & Assert
+        assert partition_cpus([0, 1, 2, 3, 4], 2) == [[0, 1, 2], [3, 4]]
+
+    @pytest.mark.unit
+    def test_more_partitions_than_cpus(self):
+        """Test that CPUs are shared round-robin when workers outnumber them."""
+        # Act & Assert
+        assert partition_cpus([0, 1], 3) == [[0], [1], [0]]
+
+
+class TestCpuPartitioner:
+    """Tests for handing CPU slices to workers."""
+
+    @pytest.mark.unit
+    def test_cpu_quota_limits_cpus_used(self):
+        """Test that only as many CPUs as the quota allows are partitioned."""
+        # Arrange
+        partitioner = CpuPartitioner(partitions=2, cpus=list(range(8)), cpu_limit=4)
+
+        # Act & Assert
+        assert partitioner.partitions == [[0, 1], [2, 3]]
+        assert partitioner.threads_per_partition == 2
+
+    @pytest.mark.unit
+    def test_acquire_prefers_free_slices(self):
+        """Test that workers get distinct slices and released slices are reused."""
+        # Arrange
+        partitioner = CpuPartitioner(partitions=2, cpus=[0, 1], cpu_limit=2)
+
+        # Act
+        first = partitioner.acquire()
+        second = partitioner.acquire()
+        partitioner.release(first)
+        third = partitioner.acquire()
+
+        # Assert
+        assert first != second
+        assert third == first
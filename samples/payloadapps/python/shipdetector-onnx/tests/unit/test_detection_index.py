@@ -0,0 +1,125 @@
+"""
+Unit tests for detection_index.py module.
+
+Tests cover indexing detections by longitude and latitude, radius and
+recent-pass queries, re-indexing, pruning and reading capture times.
+"""
+from pathlib import Path
+import numpy as np
+import pytest
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.detection_index import DetectionIndex, capture_time, distance_km
+from app.georeference import GeoReference
+from app.ship_detection import ShipDetection
+
+# 0.001 degree pixels, about 111 m, with the image's top left corner at 10E 50N
+GEOREFERENCE = GeoReference(from_origin(10.0, 50.0, 0.001, 0.001), CRS.from_epsg(4326))
+
+
+@pytest.fixture
+def detection_index(temp_dir):
+    """An empty detection index in the temporary directory."""
+    index = DetectionIndex(str(temp_dir / "detection-index.sqlite"))
+    yield index
+    index.close()
+
+
+def ship_at(x, y, probability=0.9):
+    """A 10 x 10 pixel detection whose centre is at the given pixel."""
+    return ShipDetection(probability, x - 5, y - 5, 10, 10)
+
+
+class TestDetectionIndex:
+    """Tests for indexing and querying detections."""
+
+    @pytest.mark.unit
+    def test_near_returns_detections_within_radius_nearest_first(self, detection_index):
+        """Test that a radius query returns the detections inside the circle, nearest first, at their box centres."""
+        # Arrange
+        detection_index.add("scene.tif", [ship_at(500, 500), ship_at(100, 100), ship_at(520, 500)], GEOREFERENCE, tracking_id="pass-1", captured_at=1000.0)
+
+        # Act
+        results = detection_index.near(10.5, 49.5, radius_km=5.0)
+
+        # Assert
+        assert [round(result.longitude, 3) for result in results] == [10.5, 10.52]
+        assert results[0].distance_km == pytest.approx(0.0, abs=0.01)
+        assert results[1].distance_km == pytest.approx(distance_km(10.5, 49.5, 10.52, 49.5))
+        assert results[0].tracking_id == "pass-1"
+        assert results[0].captured_at == 1000.0
+
+    @pytest.mark.unit
+    def test_last_passes_and_since_limit_the_search(self, detection_index):
+        """Test that queries can be limited to the most recent passes or to passes after a time."""
+        # Arrange
+        for captured_at, tracking_id in ((1000.0, "old"), (2000.0, "middle"), (3000.0, "new")):
+            detection_index.add("scene.tif", [ship_at(500, 500)], GEOREFERENCE, tracking_id=tracking_id, captured_at=captured_at)
+
+        # Act
+        last_two = detection_index.near(10.5, 49.5, radius_km=1.0, last_passes=2)
+        since = detection_index.near(10.5, 49.5, radius_km=1.0, since=3000.0)
+
+        # Assert
+        assert sorted(result.tracking_id for result in last_two) == ["middle", "new"]
+        assert [result.tracking_id for result in since] == ["new"]
+
+    @pytest.mark.unit
+    def test_within_returns_detections_in_a_box(self, detection_index):
+        """Test that a box query, e.g. a scene footprint, returns the detections whose boxes overlap it."""
+        # Arrange
+        detection_index.add("scene.tif", [ship_at(500, 500), ship_at(100, 100), ship_at(900, 900)], GEOREFERENCE, tracking_id="pass-1", captured_at=1000.0)
+
+        # Act
+        results = detection_index.within(10.05, 10.6, 49.4, 49.95)
+
+        # Assert
+        assert sorted(round(result.longitude, 3) for result in results) == [10.1, 10.5]
+
+    @pytest.mark.unit
+    def test_indexing_an_image_again_replaces_its_detections(self, detection_index):
+        """Test that a re-delivered image does not count its detections twice."""
+        # Arrange
+        detection_index.add("scene.tif", [ship_at(500, 500), ship_at(510, 500)], GEOREFERENCE, tracking_id="pass-1", captured_at=1000.0)
+
+        # Act
+        detection_index.add("scene.tif", [ship_at(500, 500)], GEOREFERENCE, tracking_id="pass-1", captured_at=1000.0)
+        results = detection_index.near(10.5, 49.5, radius_km=5.0)
+
+        # Assert
+        assert len(results) == 1
+
+    @pytest.mark.unit
+    def test_prune_removes_old_passes(self, detection_index):
+        """Test that passes captured before the cutoff are removed along with their detections."""
+        # Arrange
+        detection_index.add("old.tif", [ship_at(500, 500)], GEOREFERENCE, tracking_id="old", captured_at=1000.0)
+        detection_index.add("new.tif", [ship_at(500, 500)], GEOREFERENCE, tracking_id="new", captured_at=5000.0)
+
+        # Act
+        pruned = detection_index.prune(before=2000.0)
+        results = detection_index.near(10.5, 49.5, radius_km=1.0)
+
+        # Assert
+        assert pruned == 1
+        assert [result.tracking_id for result in results] == ["new"]
+
+    @pytest.mark.unit
+    def test_capture_time_is_read_from_the_geotiff(self, temp_dir, sample_geotiff_file):
+        """Test that TIFFTAG_DATETIME is read as UTC and images without it have no capture time."""
+        # Arrange
+        tagged_path = temp_dir / "tagged.tif"
+        with rasterio.open(tagged_path, 'w', driver='GTiff', width=4, height=4, count=1, dtype='uint8',
+                           crs='EPSG:4326', transform=from_origin(10.0, 50.0, 0.001, 0.001)) as dataset:
+            dataset.write(np.zeros((1, 4, 4), dtype=np.uint8))
+            dataset.update_tags(TIFFTAG_DATETIME="2024:06:01 12:00:00")
+
+        # Act & Assert
+        assert capture_time(str(tagged_path)) == 1717243200.0
+        assert capture_time(str(sample_geotiff_file)) is None
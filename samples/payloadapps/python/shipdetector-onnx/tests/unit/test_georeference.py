@@ -0,0 +1,118 @@
+"""
+Unit tests for georeference.py module.
+
+Tests cover reading georeferencing from GeoTIFFs, pixel/world/lon-lat
+conversions, and ground sample distance.
+"""
+from pathlib import Path
+import numpy as np
+import pytest
+import cv2
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.georeference import GeoReference
+
+
+class TestGeoReferenceLoading:
+    """Tests for reading georeferencing from files."""
+
+    @pytest.mark.unit
+    def test_from_geotiff(self, sample_geotiff_file):
+        """Test that a GeoTIFF's transform and CRS are read."""
+        # Act
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Assert
+        assert georeference is not None
+        assert georeference.crs.to_epsg() == 26910
+        assert georeference.pixel_size == (0.6, 0.6)
+
+    @pytest.mark.unit
+    def test_jpeg_is_not_georeferenced(self, temp_dir, sample_small_image):
+        """Test that images without georeferencing return None."""
+        # Arrange
+        jpeg_path = temp_dir / "image.jpg"
+        cv2.imwrite(str(jpeg_path), sample_small_image)
+
+        # Act & Assert
+        assert GeoReference.from_file(str(jpeg_path)) is None
+
+    @pytest.mark.unit
+    def test_missing_file_is_not_georeferenced(self, temp_dir):
+        """Test that a missing file returns None."""
+        # Act & Assert
+        assert GeoReference.from_file(str(temp_dir / "missing.tif")) is None
+
+
+class TestGeoReferenceConversions:
+    """Tests for coordinate conversions."""
+
+    @pytest.mark.unit
+    def test_pixel_to_world(self, sample_geotiff_file):
+        """Test that pixels map to CRS coordinates through the transform."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Act
+        world_x, world_y = georeference.pixel_to_world(100, 50)
+
+        # Assert
+        assert world_x == pytest.approx(540060.0)
+        assert world_y == pytest.approx(5235970.0)
+
+    @pytest.mark.unit
+    def test_lonlat_round_trip(self, sample_geotiff_file):
+        """Test that pixel -> lon/lat -> pixel returns the original pixel."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Act
+        longitude, latitude = georeference.pixel_to_lonlat(120, 80)
+        x, y = georeference.lonlat_to_pixel(longitude, latitude)
+
+        # Assert
+        assert -123.0 < longitude < -122.0
+        assert 47.0 < latitude < 47.5
+        assert x == pytest.approx(120, abs=1e-3)
+        assert y == pytest.approx(80, abs=1e-3)
+
+    @pytest.mark.unit
+    def test_vectorized_conversion(self, sample_geotiff_file):
+        """Test that arrays of pixels are converted in one call."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+        xs = np.array([0, 100, 200])
+        ys = np.array([0, 50, 100])
+
+        # Act
+        longitudes, latitudes = georeference.pixel_to_lonlat(xs, ys)
+
+        # Assert
+        assert longitudes.shape == (3,)
+        assert np.all(np.diff(longitudes) > 0)
+        assert np.all(np.diff(latitudes) < 0)
+
+    @pytest.mark.unit
+    def test_ground_sample_distance_projected(self, sample_geotiff_file):
+        """Test that a projected CRS reports its pixel size in meters."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Act & Assert
+        assert georeference.ground_sample_distance == pytest.approx(0.6)
+
+    @pytest.mark.unit
+    def test_scaled_maps_reduced_resolution_pixels(self, sample_geotiff_file):
+        """Test that pixels of a half-resolution decode map to the same place as the full-resolution pixels they cover."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Act
+        half = georeference.scaled(0.5, 0.5)
+
+        # Assert
+        assert half.pixel_to_world(50, 25) == pytest.approx(georeference.pixel_to_world(100, 50))
+        assert half.ground_sample_distance == pytest.approx(1.2)
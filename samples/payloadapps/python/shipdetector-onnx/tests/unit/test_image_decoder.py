@@ -0,0 +1,115 @@
+"""
+Unit tests for image_decoder.py module.
+
+Tests cover band-selective GeoTIFF reads, reduced-resolution decoding,
+bit depth conversion and the OpenCV fallback for other formats.
+"""
+from pathlib import Path
+import cv2
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.image_decoder import decode_image
+
+
+def write_geotiff(path, bands):
+    """Writes a (count, height, width) array as a GeoTIFF."""
+    count, height, width = bands.shape
+    with rasterio.open(path, 'w', driver='GTiff', height=height, width=width, count=count, dtype=bands.dtype.name,
+                       crs='EPSG:26910', transform=from_origin(540000.0, 5236000.0, 0.6, 0.6)) as dataset:
+        dataset.write(bands)
+    return path
+
+
+class TestGeoTiffDecoding:
+    """Tests for decoding GeoTIFFs through rasterio."""
+
+    @pytest.mark.unit
+    def test_naip_bands_are_read_as_bgr_without_nir(self, sample_geotiff_file):
+        """Test that the red, green and blue bands of a 4-band GeoTIFF are read in BGR order at full resolution."""
+        # Arrange
+        with rasterio.open(sample_geotiff_file) as dataset:
+            bands = dataset.read()
+
+        # Act
+        decoded = decode_image(str(sample_geotiff_file))
+
+        # Assert
+        assert decoded.pixels.shape == (256, 320, 3)
+        assert decoded.pixels.flags['C_CONTIGUOUS']
+        assert np.array_equal(decoded.pixels, bands[[2, 1, 0]].transpose(1, 2, 0))
+        assert (decoded.scale_x, decoded.scale_y) == (1.0, 1.0)
+
+    @pytest.mark.unit
+    def test_rgb_geotiff_matches_opencv(self, temp_dir):
+        """Test that a 3-band GeoTIFF decodes to the same pixels as cv2.imread."""
+        # Arrange
+        path = write_geotiff(temp_dir / "rgb.tif", np.random.default_rng(0).integers(0, 256, (3, 64, 96), dtype=np.uint8))
+
+        # Act
+        decoded = decode_image(str(path))
+
+        # Assert
+        assert np.array_equal(decoded.pixels, cv2.imread(str(path)))
+
+    @pytest.mark.unit
+    def test_reduced_resolution_read(self, sample_geotiff_file):
+        """Test that a scale below 1 decodes fewer pixels and reports the scale it was decoded at."""
+        # Act
+        decoded = decode_image(str(sample_geotiff_file), scale=0.25)
+
+        # Assert
+        assert decoded.pixels.shape == (64, 80, 3)
+        assert (decoded.full_width, decoded.full_height) == (320, 256)
+        assert (decoded.scale_x, decoded.scale_y) == (0.25, 0.25)
+
+    @pytest.mark.unit
+    def test_sixteen_bit_and_single_band_images(self, temp_dir):
+        """Test that 16-bit pixels keep their high byte and a single band is repeated as gray."""
+        # Arrange
+        path = write_geotiff(temp_dir / "gray16.tif", np.full((1, 8, 8), 0x1234, dtype=np.uint16))
+
+        # Act
+        decoded = decode_image(str(path))
+
+        # Assert
+        assert decoded.pixels.dtype == np.uint8
+        assert decoded.pixels.shape == (8, 8, 3)
+        assert np.all(decoded.pixels == 0x12)
+
+
+class TestOpenCvFallback:
+    """Tests for images that are not GeoTIFFs."""
+
+    @pytest.mark.unit
+    def test_jpeg_is_decoded_and_downsampled(self, temp_dir, sample_small_image):
+        """Test that a JPEG is decoded with OpenCV and resized for a reduced scale."""
+        # Arrange
+        jpeg_path = temp_dir / "image.jpg"
+        cv2.imwrite(str(jpeg_path), sample_small_image)
+        height, width = sample_small_image.shape[:2]
+
+        # Act
+        full = decode_image(str(jpeg_path))
+        half = decode_image(str(jpeg_path), scale=0.5)
+
+        # Assert
+        assert full.pixels.shape == (height, width, 3)
+        assert half.pixels.shape == (round(height / 2), round(width / 2), 3)
+
+    @pytest.mark.unit
+    def test_unreadable_image_raises(self, temp_dir):
+        """Test that a file that is not an image raises a ValueError."""
+        # Arrange
+        path = temp_dir / "not-an-image.tif"
+        path.write_bytes(b"not an image")
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            decode_image(str(path))
@@ -0,0 +1,92 @@
+"""
+Unit tests for image_job.py module.
+
+Tests cover job defaults and how products are grouped by tracking ID.
+"""
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.image_job import ImageJob
+
+
+class TestImageJob:
+    """Tests for the ImageJob work item."""
+
+    @pytest.mark.unit
+    def test_tracking_id_defaults_to_empty(self):
+        """Test that a job queued without a tracking ID has an empty one."""
+        # Act
+        job = ImageJob(image_path="/inbox/scene.tif")
+
+        # Assert
+        assert job.image_path == "/inbox/scene.tif"
+        assert job.tracking_id == ""
+
+    @pytest.mark.unit
+    def test_output_folder_groups_by_tracking_id(self):
+        """Test that products are written under the tracking ID."""
+        # Arrange
+        job = ImageJob(image_path="/inbox/scene.tif", tracking_id="abc-123")
+
+        # Act
+        folder = job.output_folder("/outbox")
+
+        # Assert
+        assert folder == Path("/outbox", "abc-123")
+
+    @pytest.mark.unit
+    def test_output_folder_without_tracking_id_is_outbox(self):
+        """Test that jobs without a tracking ID write straight to the outbox."""
+        # Arrange
+        job = ImageJob(image_path="/inbox/scene.tif")
+
+        # Act
+        folder = job.output_folder("/outbox")
+
+        # Assert
+        assert folder == Path("/outbox")
+
+    @pytest.mark.unit
+    def test_assets_of_one_response_share_a_folder(self):
+        """Test that every asset delivered for a tracking ID shares an output folder."""
+        # Arrange
+        jobs = [ImageJob(image_path=f"/inbox/asset_{i}.tif", tracking_id="abc-123") for i in range(3)]
+
+        # Act
+        folders = {job.output_folder("/outbox") for job in jobs}
+
+        # Assert
+        assert folders == {Path("/outbox", "abc-123")}
+
+    @pytest.mark.unit
+    def test_lifecycle_segments_use_recorded_timestamps(self):
+        """Test that each lifecycle segment runs between its timestamps and the end-to-end latency starts at the SensorData."""
+        # Arrange
+        job = ImageJob(image_path="/inbox/scene.tif", tracking_id="abc-123", queued_at=12.0,
+                       sensor_data_at=10.0, file_ready_at=11.5, dequeued_at=13.0, inference_done_at=16.0, products_written_at=17.5)
+
+        # Act
+        segments = job.lifecycle()
+
+        # Assert
+        assert segments == {"transfer": 1.5, "queue_wait": 1.0, "inference": 3.0, "products": 1.5}
+        assert job.end_to_end() == 7.5
+
+    @pytest.mark.unit
+    def test_end_to_end_of_directly_queued_job_starts_when_queued(self):
+        """Test that a job without SensorData is timed from queueing, and not at all until its products are written."""
+        # Arrange
+        job = ImageJob(image_path="/inbox/scene.tif", queued_at=5.0)
+
+        # Act
+        unfinished = job.end_to_end()
+        job.products_written_at = 9.0
+
+        # Assert
+        assert unfinished is None
+        assert job.end_to_end() == 4.0
+        assert "transfer" not in job.lifecycle()
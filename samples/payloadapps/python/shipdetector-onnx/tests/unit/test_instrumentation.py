@@ -0,0 +1,153 @@
+"""
+Unit tests for instrumentation.py module.
+
+Tests cover histogram percentiles, stage timers, running totals and
+publishing interval statistics as integer telemetry metrics.
+"""
+import time
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.instrumentation import Counters, Histogram, StageTimings, TelemetryPublisher
+
+
+class TestHistogram:
+    """Tests for latency histograms."""
+
+    @pytest.mark.unit
+    def test_percentiles_fall_in_observed_buckets(self):
+        """Test that percentiles are estimated within the buckets holding the observations."""
+        # Arrange
+        histogram = Histogram()
+        for _ in range(90):
+            histogram.observe(0.004)
+        for _ in range(10):
+            histogram.observe(0.2)
+
+        # Act & Assert
+        assert 0.0025 < histogram.percentile(50) <= 0.005
+        assert 0.1 < histogram.percentile(99) <= 0.2
+        assert histogram.mean == pytest.approx(0.0236)
+
+    @pytest.mark.unit
+    def test_minus_returns_interval(self):
+        """Test that subtracting an earlier copy leaves only the later observations."""
+        # Arrange
+        histogram = Histogram()
+        histogram.observe(0.5)
+        earlier = histogram.copy()
+        histogram.observe(0.003)
+
+        # Act
+        interval = histogram.minus(earlier)
+
+        # Assert
+        assert interval.count == 1
+        assert interval.sum == pytest.approx(0.003)
+        assert interval.percentile(50) <= 0.005
+
+    @pytest.mark.unit
+    def test_empty_histogram(self):
+        """Test that an empty histogram reports zeros."""
+        # Act & Assert
+        assert Histogram().percentile(99) == 0.0
+        assert Histogram().mean == 0.0
+
+
+class TestStageTimings:
+    """Tests for stage timers."""
+
+    @pytest.mark.unit
+    def test_time_records_block_duration(self):
+        """Test that timing a block records its duration under the stage name."""
+        # Arrange
+        timings = StageTimings()
+
+        # Act
+        with timings.time("infer"):
+            time.sleep(0.01)
+
+        # Assert
+        histogram = timings.snapshot()["infer"]
+        assert histogram.count == 1
+        assert histogram.sum >= 0.01
+
+    @pytest.mark.unit
+    def test_time_records_when_block_raises(self):
+        """Test that a failing stage is still timed."""
+        # Arrange
+        timings = StageTimings()
+
+        # Act
+        with pytest.raises(RuntimeError):
+            with timings.time("decode"):
+                raise RuntimeError("corrupt image")
+
+        # Assert
+        assert timings.snapshot()["decode"].count == 1
+
+
+class TestCounters:
+    """Tests for running totals."""
+
+    @pytest.mark.unit
+    def test_increments_accumulate_per_name(self):
+        """Test that increments add up per name and snapshots are independent copies."""
+        # Arrange
+        counters = Counters()
+
+        # Act
+        counters.increment("images_processed")
+        counters.increment("detections", 3)
+        counters.increment("detections", 2)
+        snapshot = counters.snapshot()
+        counters.increment("images_processed")
+
+        # Assert
+        assert snapshot == {"images_processed": 1, "detections": 5}
+
+
+class TestTelemetryPublisher:
+    """Tests for publishing stage timings as telemetry."""
+
+    @pytest.mark.unit
+    def test_publish_sends_integer_metrics_per_stage(self):
+        """Test that each observed stage is sent as integer millisecond metrics."""
+        # Arrange
+        timings = StageTimings()
+        timings.record("infer", 0.040)
+        timings.record("infer", 0.060)
+        sent = []
+        publisher = TelemetryPublisher(lambda name, value: sent.append((name, value)), timings=timings)
+
+        # Act
+        count = publisher.publish()
+
+        # Assert
+        metrics = dict(sent)
+        assert count == 5
+        assert metrics["shipdetector.infer.count"] == 2
+        assert metrics["shipdetector.infer.mean_ms"] == 50
+        assert all(isinstance(value, int) for value in metrics.values())
+
+    @pytest.mark.unit
+    def test_publish_only_sends_new_observations(self):
+        """Test that stages without observations since the last publish are skipped."""
+        # Arrange
+        timings = StageTimings()
+        timings.record("decode", 0.1)
+        sent = []
+        publisher = TelemetryPublisher(lambda name, value: sent.append((name, value)), timings=timings)
+        publisher.publish()
+        sent.clear()
+
+        # Act
+        timings.record("infer", 0.02)
+        publisher.publish()
+
+        # Assert
+        assert {name.split(".")[1] for name, _ in sent} == {"infer"}
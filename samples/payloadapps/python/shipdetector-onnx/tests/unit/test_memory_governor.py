@@ -0,0 +1,100 @@
+"""
+Unit tests for memory_governor.py module.
+
+Tests cover footprint estimates read from image headers and admission of
+reservations against the memory budget.
+"""
+from pathlib import Path
+import threading
+import cv2
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.memory_governor import DECODED_BYTES_PER_PIXEL, FRAME_COPIES, MemoryGovernor, estimate_footprint
+
+
+class TestEstimateFootprint:
+    """Tests for estimating an image's memory from its header."""
+
+    @pytest.mark.unit
+    def test_jpeg_footprint_from_header(self, temp_dir, sample_image):
+        """Test that a JPEG's footprint comes from its dimensions."""
+        # Arrange
+        image_path = temp_dir / "scene.jpg"
+        cv2.imwrite(str(image_path), sample_image)
+
+        # Act & Assert
+        assert estimate_footprint(str(image_path)) == 640 * 480 * DECODED_BYTES_PER_PIXEL * FRAME_COPIES
+
+    @pytest.mark.unit
+    def test_geotiff_footprint_from_header(self, sample_geotiff_file):
+        """Test that a 4-band GeoTIFF is estimated as the 3-channel frame cv2 decodes."""
+        # Act & Assert
+        assert estimate_footprint(str(sample_geotiff_file)) == 320 * 256 * DECODED_BYTES_PER_PIXEL * FRAME_COPIES
+
+    @pytest.mark.unit
+    def test_unreadable_image_falls_back_to_file_size(self, sample_geotiff_path):
+        """Test that files without a readable header are estimated from their size."""
+        # Act & Assert
+        assert estimate_footprint(str(sample_geotiff_path)) == len(b"fake_geotiff_data") * FRAME_COPIES
+
+
+class TestMemoryGovernor:
+    """Tests for admitting reservations against the budget."""
+
+    @pytest.mark.unit
+    def test_reservations_within_budget_are_admitted(self):
+        """Test that reservations fitting the budget do not wait."""
+        # Arrange
+        governor = MemoryGovernor(budget=100)
+
+        # Act & Assert
+        assert governor.acquire(60, timeout=0)
+        assert governor.acquire(40, timeout=0)
+        assert governor.in_use == 100
+
+    @pytest.mark.unit
+    def test_reservation_over_budget_waits(self):
+        """Test that a reservation that does not fit times out."""
+        # Arrange
+        governor = MemoryGovernor(budget=100)
+        governor.acquire(60)
+
+        # Act & Assert
+        assert not governor.acquire(50, timeout=0.05)
+        assert governor.in_use == 60
+
+    @pytest.mark.unit
+    def test_release_admits_waiting_reservation(self):
+        """Test that releasing memory wakes a waiting reservation."""
+        # Arrange
+        governor = MemoryGovernor(budget=100)
+        governor.acquire(60)
+        admitted = []
+        waiter = threading.Thread(target=lambda: admitted.append(governor.acquire(50, timeout=5)))
+        waiter.start()
+
+        # Act
+        governor.release(60)
+        waiter.join(timeout=5)
+
+        # Assert
+        assert admitted == [True]
+        assert governor.in_use == 50
+
+    @pytest.mark.unit
+    def test_oversized_reservation_runs_alone(self):
+        """Test that an image larger than the budget is admitted once nothing else is reserved."""
+        # Arrange
+        governor = MemoryGovernor(budget=100)
+
+        # Act
+        with governor.reserve(500):
+            in_use = governor.in_use
+
+        # Assert
+        assert in_use == 500
+        assert governor.in_use == 0
@@ -0,0 +1,94 @@
+"""
+Unit tests for metrics_server.py module.
+
+Tests cover rendering histograms, counters and gauges in the Prometheus
+text format and serving them over HTTP.
+"""
+import urllib.error
+import urllib.request
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.instrumentation import Counters, Histogram, StageTimings
+from app.metrics_server import MetricsServer, format_value, render_histogram
+
+
+@pytest.fixture
+def metrics_server():
+    """A metrics server on a free local port with one stage, one counter and one gauge."""
+    timings = StageTimings()
+    timings.record("decode", 0.004)
+    counters = Counters()
+    counters.increment("images_processed", 2)
+    server = MetricsServer(0, gauges=lambda: {"queue_depth": 3}, host="127.0.0.1", timings=timings, counters=counters)
+    yield server
+    server.stop()
+
+
+class TestRendering:
+    """Tests for the Prometheus text format."""
+
+    @pytest.mark.unit
+    def test_values_use_prometheus_notation(self):
+        """Test that whole numbers drop the decimal point and infinity is +Inf."""
+        # Act & Assert
+        assert format_value(3.0) == "3"
+        assert format_value(0.25) == "0.25"
+        assert format_value(float('inf')) == "+Inf"
+
+    @pytest.mark.unit
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that each bucket counts every observation up to its bound, ending with sum and count."""
+        # Arrange
+        histogram = Histogram(bounds=(0.01, 0.1, float('inf')))
+        for seconds in (0.005, 0.05, 0.05, 2.0):
+            histogram.observe(seconds)
+
+        # Act
+        lines = render_histogram("shipdetector_stage_seconds", "infer", histogram)
+
+        # Assert
+        assert lines == ['shipdetector_stage_seconds_bucket{stage="infer",le="0.01"} 1',
+                         'shipdetector_stage_seconds_bucket{stage="infer",le="0.1"} 3',
+                         'shipdetector_stage_seconds_bucket{stage="infer",le="+Inf"} 4',
+                         'shipdetector_stage_seconds_sum{stage="infer"} 2.105',
+                         'shipdetector_stage_seconds_count{stage="infer"} 4']
+
+    @pytest.mark.unit
+    def test_render_includes_gauges_counters_and_stages(self, metrics_server):
+        """Test that gauges, counters and stage histograms are rendered with their types."""
+        # Act
+        text = metrics_server.render()
+
+        # Assert
+        assert "# TYPE shipdetector_queue_depth gauge\nshipdetector_queue_depth 3\n" in text
+        assert "# TYPE shipdetector_images_processed_total counter\nshipdetector_images_processed_total 2\n" in text
+        assert "# TYPE shipdetector_stage_seconds histogram" in text
+        assert 'shipdetector_stage_seconds_count{stage="decode"} 1' in text
+
+
+class TestServing:
+    """Tests for the HTTP endpoint."""
+
+    @pytest.mark.unit
+    def test_metrics_are_served_over_http(self, metrics_server):
+        """Test that /metrics returns the rendered metrics and other paths are not found."""
+        # Arrange
+        metrics_server.start()
+        base_url = f"http://127.0.0.1:{metrics_server.port}"
+
+        # Act
+        with urllib.request.urlopen(f"{base_url}/metrics", timeout=5) as response:
+            content_type = response.headers["Content-Type"]
+            body = response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base_url}/other", timeout=5)
+
+        # Assert
+        assert content_type.startswith("text/plain; version=0.0.4")
+        assert "shipdetector_queue_depth 3" in body
+        assert error.value.code == 404
@@ -38,6 +38,42 @@ class TestObjectDetectionInitialization:
         assert detector.input_shape == [416, 416]
         assert detector.input_name == "input"
 
+    @pytest.mark.unit
+    @patch('app.object_detection.onnx.load')
+    @patch('app.object_detection.onnxruntime.InferenceSession')
+    def test_init_limits_intra_op_threads(self, mock_session_class, mock_onnx_load, mock_onnx_model, mock_onnx_session):
+        """Test that intra_op_threads sizes the session's thread pool."""
+        # Arrange
+        mock_session_class.return_value = mock_onnx_session
+        mock_onnx_load.return_value = mock_onnx_model
+
+        # Act
+        ObjectDetection("/fake/model.onnx", intra_op_threads=2)
+
+        # Assert
+        session_options = mock_session_class.call_args.kwargs['sess_options']
+        assert session_options.intra_op_num_threads == 2
+        assert session_options.inter_op_num_threads == 1
+
+    @pytest.mark.unit
+    @patch('app.object_detection.onnx.load')
+    @patch('app.object_detection.onnxruntime.InferenceSession')
+    def test_init_enables_profiling(self, mock_session_class, mock_onnx_load, mock_onnx_model, mock_onnx_session):
+        """Test that profile_prefix turns on onnxruntime's profiler and end_profiling returns its file."""
+        # Arrange
+        mock_session_class.return_value = mock_onnx_session
+        mock_onnx_load.return_value = mock_onnx_model
+        mock_onnx_session.end_profiling.return_value = "/fake/profile.json"
+
+        # Act
+        detector = ObjectDetection("/fake/model.onnx", profile_prefix="/fake/profile")
+
+        # Assert
+        session_options = mock_session_class.call_args.kwargs['sess_options']
+        assert session_options.enable_profiling
+        assert session_options.profile_file_prefix == "/fake/profile"
+        assert detector.end_profiling() == "/fake/profile.json"
+
     @pytest.mark.unit
     @patch('app.object_detection.onnx.load')
     @patch('app.object_detection.onnxruntime.InferenceSession')
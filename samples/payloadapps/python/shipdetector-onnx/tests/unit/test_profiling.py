@@ -0,0 +1,155 @@
+"""
+Unit tests for profiling.py module.
+
+Tests cover summarizing onnxruntime profiles, profiling a run of images
+and starting runs from the config or an inbox marker file.
+"""
+import gzip
+import json
+import marshal
+import tracemalloc
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.profiling import PROFILE_MARKER_FILENAME, ProfilingControl, ProfilingRun, summarize_onnxruntime_profile
+
+
+@pytest.fixture(autouse=True)
+def stop_tracemalloc():
+    """Stop tracemalloc left running by a run that did not finish."""
+    yield
+    tracemalloc.stop()
+
+
+def write_onnxruntime_profile(path):
+    """Writes an onnxruntime profile with a warmup run and one Conv and one Relu in a second run."""
+    events = [
+        {"cat": "Session", "name": "model_run", "ts": 0, "dur": 100, "args": {}},
+        {"cat": "Node", "name": "conv0_kernel_time", "ts": 10, "dur": 90000, "args": {"op_name": "Conv"}},
+        {"cat": "Session", "name": "model_run", "ts": 200, "dur": 100, "args": {}},
+        {"cat": "Node", "name": "conv0_kernel_time", "ts": 210, "dur": 3000, "args": {"op_name": "Conv"}},
+        {"cat": "Node", "name": "relu0_kernel_time", "ts": 250, "dur": 1000, "args": {"op_name": "Relu"}},
+    ]
+    path.write_text(json.dumps(events))
+    return path
+
+
+class TestOnnxruntimeProfiles:
+    """Tests for summarizing onnxruntime profiles."""
+
+    @pytest.mark.unit
+    def test_summary_totals_operators_after_the_first_run(self, temp_dir):
+        """Test that kernel times are totalled per operator type, leaving out the warmup run."""
+        # Arrange
+        profile_path = write_onnxruntime_profile(temp_dir / "onnxruntime.json")
+
+        # Act
+        operators = summarize_onnxruntime_profile(str(profile_path))
+
+        # Assert
+        assert operators == {"Conv": {"calls": 1, "total_ms": 3.0}, "Relu": {"calls": 1, "total_ms": 1.0}}
+
+
+class TestProfilingRun:
+    """Tests for profiling a run of images."""
+
+    @pytest.mark.unit
+    def test_run_writes_profiles_after_the_last_image(self, temp_dir):
+        """Test that the summary and cProfile statistics are written once every image has been profiled."""
+        # Arrange
+        written = []
+        run = ProfilingRun(2, temp_dir / "profiles", on_written=written.append)
+
+        # Act
+        for image in ("first.tif", "second.tif"):
+            assert run.claim()
+            with run.profile_image(image):
+                sorted(range(1000), reverse=True)
+            if image == "first.tif":
+                assert not written
+        run_folder = written[0]
+
+        # Assert
+        summary = json.loads((run_folder / "summary.json").read_text())
+        assert [image["image"] for image in summary["images"]] == ["first.tif", "second.tif"]
+        assert any("sorted" in function["function"] for function in summary["functions"])
+        with gzip.open(run_folder / "cprofile.pstats.gz") as f:
+            assert marshal.loads(f.read())
+        assert not tracemalloc.is_tracing()
+
+    @pytest.mark.unit
+    def test_claims_one_image_at_a_time(self, temp_dir):
+        """Test that an image cannot be claimed while another is profiled or once the run is full."""
+        # Arrange
+        run = ProfilingRun(1, temp_dir / "profiles")
+
+        # Act & Assert
+        assert run.claim()
+        assert not run.claim()
+        with run.profile_image("only.tif"):
+            pass
+        assert not run.claim()
+        assert run.done
+
+    @pytest.mark.unit
+    def test_onnxruntime_profiles_are_summarized_and_deleted(self, temp_dir):
+        """Test that onnxruntime profiles are folded into the operator times and the raw file removed."""
+        # Arrange
+        written = []
+        run = ProfilingRun(1, temp_dir / "profiles", on_written=written.append)
+        profile_path = write_onnxruntime_profile(temp_dir / "onnxruntime.json")
+
+        # Act
+        run.claim()
+        with run.profile_image("scene.tif"):
+            run.add_onnxruntime_profile(str(profile_path))
+
+        # Assert
+        summary = json.loads((written[0] / "summary.json").read_text())
+        assert summary["onnxruntime_operators"][0] == {"op_type": "Conv", "calls": 1, "total_ms": 3.0, "share": 0.75}
+        assert not profile_path.exists()
+
+
+class TestProfilingControl:
+    """Tests for starting profiling runs."""
+
+    @pytest.mark.unit
+    def test_marker_file_starts_a_run(self, temp_dir):
+        """Test that the inbox marker starts a run of the number of images it holds and is removed."""
+        # Arrange
+        control = ProfilingControl(str(temp_dir / "profiles"))
+        marker = temp_dir / PROFILE_MARKER_FILENAME
+        marker.write_text("3")
+
+        # Act
+        control.poll(str(temp_dir), configured_images=0)
+        run = control.claim()
+
+        # Assert
+        assert run is not None
+        assert run.images == 3
+        assert not marker.exists()
+
+    @pytest.mark.unit
+    def test_raising_the_setting_starts_a_run_once(self, temp_dir):
+        """Test that PROFILING_IMAGES starts a run when it changes, not on every poll."""
+        # Arrange
+        control = ProfilingControl(str(temp_dir / "profiles"))
+
+        # Act
+        control.poll(str(temp_dir), configured_images=0)
+        no_run = control.claim()
+        control.poll(str(temp_dir), configured_images=1)
+        run = control.claim()
+        with run.profile_image("scene.tif"):
+            pass
+        control.poll(str(temp_dir), configured_images=1)
+
+        # Assert
+        assert no_run is None
+        assert run.images == 1
+        assert control.claim() is None
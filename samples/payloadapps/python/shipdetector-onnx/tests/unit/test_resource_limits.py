@@ -0,0 +1,91 @@
+"""
+Unit tests for resource_limits.py module.
+
+Tests cover reading CPU quotas and memory limits from cgroup v1 and v2
+hierarchies.
+"""
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.resource_limits import available_cpus, cgroup_cpu_limit, cgroup_memory_limit, process_rss
+
+
+class TestCpuLimit:
+    """Tests for reading the container's CPU quota."""
+
+    @pytest.mark.unit
+    def test_cgroup_v2_quota(self, tmp_path):
+        """Test that cpu.max quota and period are converted to CPUs."""
+        # Arrange
+        (tmp_path / "cpu.max").write_text("50000 100000\n")
+
+        # Act & Assert
+        assert cgroup_cpu_limit(str(tmp_path)) == 0.5
+
+    @pytest.mark.unit
+    def test_cgroup_v2_unlimited_uses_available_cpus(self, tmp_path):
+        """Test that an unlimited cpu.max falls back to the schedulable CPUs."""
+        # Arrange
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+
+        # Act & Assert
+        assert cgroup_cpu_limit(str(tmp_path)) == available_cpus()
+
+    @pytest.mark.unit
+    def test_cgroup_v1_quota(self, tmp_path):
+        """Test that the v1 CFS quota and period are converted to CPUs."""
+        # Arrange
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("25000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+        # Act & Assert
+        assert cgroup_cpu_limit(str(tmp_path)) == 0.25
+
+    @pytest.mark.unit
+    def test_missing_cgroup_uses_available_cpus(self, tmp_path):
+        """Test that hosts without cgroup files use the schedulable CPUs."""
+        # Act & Assert
+        assert cgroup_cpu_limit(str(tmp_path)) == available_cpus()
+
+
+class TestMemoryLimit:
+    """Tests for reading the container's memory limit."""
+
+    @pytest.mark.unit
+    def test_cgroup_v2_limit(self, tmp_path):
+        """Test that memory.max is returned in bytes."""
+        # Arrange
+        (tmp_path / "memory.max").write_text("536870912\n")
+
+        # Act & Assert
+        assert cgroup_memory_limit(str(tmp_path)) == 536870912
+
+    @pytest.mark.unit
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        """Test that an unlimited memory.max returns None."""
+        # Arrange
+        (tmp_path / "memory.max").write_text("max\n")
+
+        # Act & Assert
+        assert cgroup_memory_limit(str(tmp_path)) is None
+
+    @pytest.mark.unit
+    def test_cgroup_v1_unlimited(self, tmp_path):
+        """Test that the v1 "no limit" sentinel returns None."""
+        # Arrange
+        (tmp_path / "memory").mkdir()
+        (tmp_path / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+
+        # Act & Assert
+        assert cgroup_memory_limit(str(tmp_path)) is None
+
+    @pytest.mark.unit
+    def test_process_rss_is_positive(self):
+        """Test that the process's resident memory can be read."""
+        # Act & Assert
+        assert process_rss() > 0
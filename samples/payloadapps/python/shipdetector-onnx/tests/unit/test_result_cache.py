@@ -0,0 +1,155 @@
+"""
+Unit tests for result_cache.py module.
+
+Tests cover content hashing, key construction, hits and misses,
+and least recently used eviction by entry count and size.
+"""
+import os
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.result_cache import ResultCache
+
+
+DETECTIONS = [{'probability': 0.9, 'x_coordinate': 10, 'y_coordinate': 20, 'width': 30, 'height': 40}]
+
+
+class TestResultCacheKeys:
+    """Tests for content hashing and cache keys."""
+
+    @pytest.mark.unit
+    def test_hash_file_depends_on_content_only(self, temp_dir):
+        """Test that identical content at different paths hashes the same."""
+        # Arrange
+        first = temp_dir / "scene_a.tif"
+        second = temp_dir / "scene_b.tif"
+        first.write_bytes(b"geotiff" * 1000)
+        second.write_bytes(b"geotiff" * 1000)
+
+        # Act & Assert
+        assert ResultCache.hash_file(str(first)) == ResultCache.hash_file(str(second))
+
+    @pytest.mark.unit
+    def test_hash_file_reads_in_chunks(self, temp_dir):
+        """Test that chunked hashing matches hashing in one read."""
+        # Arrange
+        image = temp_dir / "scene.tif"
+        image.write_bytes(os.urandom(10000))
+
+        # Act & Assert
+        assert ResultCache.hash_file(str(image), chunk_size=333) == ResultCache.hash_file(str(image))
+
+    @pytest.mark.unit
+    def test_key_changes_with_processing_parameters(self):
+        """Test that the model, threshold, chipping and decode resolution all change the key."""
+        # Arrange
+        base = ResultCache.make_key("image", "model", 0.8, 1248, 1248)
+
+        # Act
+        variations = [
+            ResultCache.make_key("other-image", "model", 0.8, 1248, 1248),
+            ResultCache.make_key("image", "other-model", 0.8, 1248, 1248),
+            ResultCache.make_key("image", "model", 0.7, 1248, 1248),
+            ResultCache.make_key("image", "model", 0.8, 832, 1248),
+            ResultCache.make_key("image", "model", 0.8, 1248, 832),
+            ResultCache.make_key("image", "model", 0.8, 1248, 1248, decode_scale=0.5),
+            ResultCache.make_key("image", "model", 0.8, 1248, 1248, aoi="0123456789abcdef"),
+        ]
+
+        # Assert
+        assert base not in variations
+        assert len(set(variations)) == len(variations)
+
+
+class TestResultCacheLookup:
+    """Tests for storing and retrieving entries."""
+
+    @pytest.mark.unit
+    def test_miss_returns_none(self, temp_dir):
+        """Test that an unknown key is a miss."""
+        # Arrange
+        cache = ResultCache(str(temp_dir / "cache"))
+
+        # Act & Assert
+        assert cache.get("unknown") is None
+
+    @pytest.mark.unit
+    def test_put_then_get(self, temp_dir):
+        """Test that stored detections are returned on a hit."""
+        # Arrange
+        cache = ResultCache(str(temp_dir / "cache"))
+
+        # Act
+        cache.put("key", DETECTIONS)
+
+        # Assert
+        assert cache.get("key") == DETECTIONS
+
+    @pytest.mark.unit
+    def test_entries_persist_across_instances(self, temp_dir):
+        """Test that the cache survives a restart."""
+        # Arrange
+        ResultCache(str(temp_dir / "cache")).put("key", DETECTIONS)
+
+        # Act
+        detections = ResultCache(str(temp_dir / "cache")).get("key")
+
+        # Assert
+        assert detections == DETECTIONS
+
+    @pytest.mark.unit
+    def test_empty_result_is_a_hit(self, temp_dir):
+        """Test that a scene with no ships is still cached."""
+        # Arrange
+        cache = ResultCache(str(temp_dir / "cache"))
+
+        # Act
+        cache.put("key", [])
+
+        # Assert
+        assert cache.get("key") == []
+
+
+class TestResultCacheEviction:
+    """Tests for least recently used eviction."""
+
+    @pytest.mark.unit
+    def test_evicts_least_recently_used_by_count(self, temp_dir):
+        """Test that the oldest unused entry is evicted once the entry limit is exceeded."""
+        # Arrange
+        cache = ResultCache(str(temp_dir / "cache"), max_entries=2)
+        cache.put("first", DETECTIONS)
+        cache.put("second", DETECTIONS)
+        os.utime(temp_dir / "cache" / "first.json", (1, 1))
+        os.utime(temp_dir / "cache" / "second.json", (2, 2))
+        cache.get("first")
+
+        # Act
+        cache.put("third", DETECTIONS)
+
+        # Assert
+        assert cache.get("first") == DETECTIONS
+        assert cache.get("second") is None
+        assert cache.get("third") == DETECTIONS
+
+    @pytest.mark.unit
+    def test_evicts_by_total_size(self, temp_dir):
+        """Test that entries are evicted once the size limit is exceeded."""
+        # Arrange
+        large_result = DETECTIONS * 100
+        entry_size = len(str(large_result))
+        cache = ResultCache(str(temp_dir / "cache"), max_bytes=entry_size * 2)
+        cache.put("first", large_result)
+        os.utime(temp_dir / "cache" / "first.json", (1, 1))
+
+        # Act
+        cache.put("second", large_result)
+        cache.put("third", large_result)
+
+        # Assert
+        assert cache.get("first") is None
+        assert len(list((temp_dir / "cache").glob("*.json"))) == 2
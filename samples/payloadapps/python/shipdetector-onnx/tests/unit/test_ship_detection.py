@@ -192,3 +192,31 @@ class TestShipDetectionEdgeCases:
         # Ensure they're independent
         assert detection1.probability != detection2.probability
         assert detection2.width != detection3.width
+
+
+class TestShipDetectionSerialization:
+    """Tests for ShipDetection dictionary round-trips."""
+
+    @pytest.mark.unit
+    def test_to_dict_contains_all_fields(self):
+        """Test that to_dict exposes every field."""
+        # Arrange
+        detection = ShipDetection(probability=0.9, x_coordinate=10, y_coordinate=20, width=30, height=40)
+
+        # Act
+        data = detection.to_dict()
+
+        # Assert
+        assert data == {'probability': 0.9, 'x_coordinate': 10, 'y_coordinate': 20, 'width': 30, 'height': 40}
+
+    @pytest.mark.unit
+    def test_from_dict_round_trip(self):
+        """Test that from_dict rebuilds an equivalent detection."""
+        # Arrange
+        detection = ShipDetection(probability=0.75, x_coordinate=5, y_coordinate=6, width=7, height=8)
+
+        # Act
+        rebuilt = ShipDetection.from_dict(detection.to_dict())
+
+        # Assert
+        assert rebuilt.to_dict() == detection.to_dict()
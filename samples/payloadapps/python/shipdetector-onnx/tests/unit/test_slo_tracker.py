@@ -0,0 +1,134 @@
+"""
+Unit tests for slo_tracker.py module.
+
+Tests cover rolling end-to-end latency statistics, throughput and
+alerting when the latency SLO is breached and recovers.
+"""
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.image_job import ImageJob
+from app.instrumentation import StageTimings
+from app.slo_tracker import MIN_SAMPLES, SloTracker
+
+
+class FakeClock:
+    """A monotonic clock moved by hand."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def processed_job(clock, latency, queue_wait=0.5):
+    """Returns a job delivered by SensorData whose products were written now, latency seconds later."""
+    return ImageJob(image_path="/inbox/scene.tif", tracking_id="abc-123",
+                    sensor_data_at=clock.now - latency, queued_at=clock.now - latency, dequeued_at=clock.now - latency + queue_wait,
+                    products_written_at=clock.now)
+
+
+class TestSloTracker:
+    """Tests for rolling latency statistics and SLO alerts."""
+
+    @pytest.mark.unit
+    def test_snapshot_reports_percentiles_and_throughput(self):
+        """Test that percentiles cover the window's latencies and throughput is per minute."""
+        # Arrange
+        clock = FakeClock()
+        tracker = SloTracker(window=600.0, timings=StageTimings(), clock=clock)
+
+        # Act
+        for latency in range(1, 11):
+            clock.now += 6.0
+            tracker.record(processed_job(clock, float(latency)))
+        clock.now += 6.0
+        snapshot = tracker.snapshot()
+
+        # Assert
+        assert snapshot["count"] == 10
+        assert snapshot["p50"] == 5.0
+        assert snapshot["p95"] == 10.0
+        assert snapshot["images_per_minute"] == pytest.approx(10.0)
+
+    @pytest.mark.unit
+    def test_images_older_than_the_window_are_dropped(self):
+        """Test that latencies leave the statistics once they are older than the window."""
+        # Arrange
+        clock = FakeClock()
+        tracker = SloTracker(window=60.0, timings=StageTimings(), clock=clock)
+        tracker.record(processed_job(clock, 30.0))
+
+        # Act
+        clock.now += 61.0
+        tracker.record(processed_job(clock, 2.0))
+        snapshot = tracker.snapshot()
+
+        # Assert
+        assert snapshot["count"] == 1
+        assert snapshot["p99"] == 2.0
+
+    @pytest.mark.unit
+    def test_record_adds_latencies_to_stage_timings(self):
+        """Test that end-to-end and queue wait latencies are also recorded as pipeline stages."""
+        # Arrange
+        clock = FakeClock()
+        timings = StageTimings()
+        tracker = SloTracker(timings=timings, clock=clock)
+
+        # Act
+        latency = tracker.record(processed_job(clock, 4.0, queue_wait=1.0))
+        unfinished = tracker.record(ImageJob(image_path="/inbox/scene.tif"))
+
+        # Assert
+        assert latency == 4.0
+        assert unfinished is None
+        assert timings.snapshot()["end_to_end"].count == 1
+        assert timings.snapshot()["queue_wait"].sum == 1.0
+
+    @pytest.mark.unit
+    def test_breach_and_recovery_are_reported_once(self):
+        """Test that crossing the SLO alerts once, and meeting it again reports the recovery once."""
+        # Arrange
+        clock = FakeClock()
+        breaches, recoveries = [], []
+        tracker = SloTracker(window=60.0, on_breach=breaches.append, on_recovery=recoveries.append, timings=StageTimings(), clock=clock)
+
+        # Act
+        for _ in range(MIN_SAMPLES):
+            tracker.record(processed_job(clock, 20.0))
+            tracker.check(slo_seconds=10.0, percentile=95.0)
+        clock.now += 61.0
+        for _ in range(MIN_SAMPLES):
+            tracker.record(processed_job(clock, 1.0))
+            tracker.check(slo_seconds=10.0, percentile=95.0)
+
+        # Assert
+        assert len(breaches) == 1
+        assert breaches[0]["p95"] == 20.0
+        assert len(recoveries) == 1
+
+    @pytest.mark.unit
+    def test_no_alert_without_slo_or_enough_images(self):
+        """Test that an SLO of 0, or fewer images than MIN_SAMPLES, never alerts."""
+        # Arrange
+        clock = FakeClock()
+        breaches = []
+        tracker = SloTracker(on_breach=breaches.append, timings=StageTimings(), clock=clock)
+
+        # Act
+        for _ in range(MIN_SAMPLES - 1):
+            tracker.record(processed_job(clock, 20.0))
+        too_few = tracker.check(slo_seconds=10.0)
+        tracker.record(processed_job(clock, 20.0))
+        disabled = tracker.check(slo_seconds=0.0)
+
+        # Assert
+        assert not too_few
+        assert not disabled
+        assert breaches == []
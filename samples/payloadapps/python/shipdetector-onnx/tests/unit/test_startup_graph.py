@@ -0,0 +1,124 @@
+"""
+Unit tests for startup_graph.py module.
+
+Tests cover running independent steps concurrently, passing results
+along dependencies, failure propagation and critical-path timings.
+"""
+import time
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.app_core import AppCore
+from app.startup_graph import StartupGraph
+
+
+class TestStartupGraphExecution:
+    """Tests for running startup steps."""
+
+    @pytest.mark.unit
+    def test_independent_steps_overlap(self):
+        """Test that steps without dependencies run at the same time."""
+        # Arrange
+        core = AppCore()
+
+        async def scenario():
+            graph = StartupGraph(core)
+            graph.add_step("client", lambda: time.sleep(0.2))
+            graph.add_step("model", lambda: time.sleep(0.2))
+            started = time.monotonic()
+            graph.start()
+            await graph.wait()
+            return time.monotonic() - started
+
+        # Act
+        elapsed = core.run(scenario())
+
+        # Assert
+        assert elapsed < 0.35
+
+    @pytest.mark.unit
+    def test_dependencies_receive_results(self):
+        """Test that a step runs after its dependencies and receives their results in order."""
+        # Arrange
+        core = AppCore()
+
+        async def sensors(client, config):
+            return f"sensors via {client} with {config}"
+
+        async def scenario():
+            graph = StartupGraph(core)
+            graph.add_step("client", lambda: "client")
+            graph.add_step("config", lambda: "config")
+            graph.add_step("sensors", sensors, depends_on=["client", "config"])
+            graph.start()
+            return await graph.result("sensors")
+
+        # Act & Assert
+        assert core.run(scenario()) == "sensors via client with config"
+
+    @pytest.mark.unit
+    def test_failure_propagates_to_dependents(self):
+        """Test that a failed step fails the steps depending on it but not independent ones."""
+        # Arrange
+        core = AppCore()
+
+        def build_client():
+            raise ConnectionError("no broker")
+
+        async def scenario():
+            graph = StartupGraph(core)
+            graph.add_step("client", build_client)
+            graph.add_step("sensors", lambda client: "sensors", depends_on=["client"])
+            graph.add_step("model", lambda: "model")
+            graph.start()
+            model = await graph.result("model")
+            with pytest.raises(ConnectionError):
+                await graph.result("sensors")
+            return model
+
+        # Act & Assert
+        assert core.run(scenario()) == "model"
+
+    @pytest.mark.unit
+    def test_undeclared_dependency_raises(self):
+        """Test that depending on a step that was not declared first is rejected."""
+        # Arrange
+        graph = StartupGraph(AppCore())
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            graph.add_step("sensors", lambda client: None, depends_on=["client"])
+
+
+class TestStartupGraphTimings:
+    """Tests for step timings and the critical path."""
+
+    @pytest.mark.unit
+    def test_critical_path_follows_slowest_chain(self):
+        """Test that the critical path is the chain of steps that finished last."""
+        # Arrange
+        core = AppCore()
+
+        async def scenario():
+            graph = StartupGraph(core)
+            graph.add_step("client", lambda: time.sleep(0.05))
+            graph.add_step("image_processor", lambda: time.sleep(0.15))
+            graph.add_step("sensors", lambda client: time.sleep(0.02), depends_on=["client"])
+            graph.add_step("model_warmup", lambda image_processor: time.sleep(0.05), depends_on=["image_processor"])
+            graph.start()
+            await graph.wait()
+            return graph
+
+        # Act
+        graph = core.run(scenario())
+        report = graph.timing_report()
+
+        # Assert
+        assert [step.name for step in graph.critical_path()] == ["image_processor", "model_warmup"]
+        assert len(report) == 5
+        assert report[-1].startswith("Startup critical path")
+        assert "image_processor" in report[-1] and "model_warmup" in report[-1]
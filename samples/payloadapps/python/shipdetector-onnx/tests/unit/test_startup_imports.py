@@ -0,0 +1,89 @@
+"""
+Unit tests for startup import cost.
+
+Tests cover that main.py defers the image processing stack until first
+use, that object_detection works without onnx installed, and print an
+-X importtime style report of the slowest imports (run with -s to see it).
+"""
+from pathlib import Path
+import subprocess
+import importlib.util
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+APP_FOLDER = Path(__file__).parent.parent.parent / "src" / "app"
+
+# Modules only the image processor needs; importing main must not pull them in
+DEFERRED_MODULES = ["cv2", "onnx", "onnxruntime", "PIL", "rasterio", "image_processor", "object_detection"]
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    """Runs code in a fresh interpreter from src/app, the way main.py is started."""
+    return subprocess.run([sys.executable, *options, "-c", code], cwd=APP_FOLDER, capture_output=True, text=True, check=True)
+
+
+def importtime_report(stderr: str, top: int = 10) -> list:
+    """Returns the slowest top-level imports from -X importtime output as (cumulative microseconds, module) pairs."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if not module.startswith("  "):
+            imports.append((int(cumulative), module.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("spacefx") is None, reason="spacefx is not installed")
+class TestMainImports:
+    """Tests for the modules loaded when main.py is imported."""
+
+    @pytest.mark.unit
+    def test_main_defers_processing_stack(self):
+        """Test that importing main does not import OpenCV, onnx, onnxruntime, Pillow or rasterio."""
+        # Act
+        result = run_python(f"import sys, main; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+
+        # Assert
+        assert result.stdout.strip() == ""
+
+    @pytest.mark.unit
+    def test_main_importtime_report(self):
+        """Test that the import-time report can be built, and print it."""
+        # Act
+        result = run_python("import main", "-X", "importtime")
+        report = importtime_report(result.stderr)
+
+        # Assert
+        print("\nSlowest imports of main.py (cumulative):")
+        for cumulative, module in report:
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+        assert report
+
+
+class TestOptionalOnnx:
+    """Tests for running object detection without onnx installed."""
+
+    @pytest.mark.unit
+    def test_metadata_read_without_onnx(self, temp_dir):
+        """Test that model metadata comes from onnxruntime when onnx cannot be imported."""
+        # Arrange
+        from onnx import TensorProto, helper, save
+        graph = helper.make_graph([helper.make_node("Identity", ["image"], ["detected_scores"])], "identity",
+                                  [helper.make_tensor_value_info("image", TensorProto.FLOAT, [1, 3, 8, 8])],
+                                  [helper.make_tensor_value_info("detected_scores", TensorProto.FLOAT, [1, 3, 8, 8])])
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        model.ir_version = 8
+        helper.set_model_props(model, {"Image.BitmapPixelFormat": "Bgr8"})
+        model_path = temp_dir / "identity.onnx"
+        save(model, str(model_path))
+
+        # Act
+        result = run_python(f"import sys; sys.modules['onnx'] = None; from object_detection import ObjectDetection; "
+                            f"detector = ObjectDetection({str(model_path)!r}); print(detector.is_bgr, detector.is_range255)")
+
+        # Assert
+        assert result.stdout.strip() == "True False"
@@ -0,0 +1,146 @@
+"""
+Unit tests for structured_logging.py module.
+
+Tests cover structured log messages, rate limiting per call site and
+batching records before they reach the logging service's handlers.
+"""
+import logging
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.structured_logging import BatchingHandler, LogEvent, RateLimitFilter, install_batching
+
+
+class ListHandler(logging.Handler):
+    """Collects the messages it is given."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def test_logger(request):
+    """A logger of its own for each test, with a handler collecting its messages."""
+    logger = logging.getLogger(f"test_structured_logging.{request.node.name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    target = ListHandler()
+    logger.addHandler(target)
+    yield logger, target
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.filters.clear()
+
+
+class TestLogEvent:
+    """Tests for structured log messages."""
+
+    @pytest.mark.unit
+    def test_fields_are_formatted_as_key_value_pairs(self):
+        """Test that floats are rounded and values with spaces or quotes are quoted."""
+        # Arrange
+        event = LogEvent("image_processed", detections=3, seconds=1.23456, image='a "b".tif', top="")
+
+        # Act
+        message = str(event)
+
+        # Assert
+        assert message == 'image_processed detections=3 seconds=1.235 image="a \\"b\\".tif" top=""'
+
+
+class TestRateLimitFilter:
+    """Tests for rate limiting per call site."""
+
+    @pytest.mark.unit
+    def test_drops_records_over_the_limit_and_reports_them(self, test_logger):
+        """Test that records over the limit are dropped and counted on the next record let through."""
+        # Arrange
+        logger, target = test_logger
+        rate_limit = RateLimitFilter(max_records=2, interval=60.0)
+        logger.addFilter(rate_limit)
+
+        # Act
+        for index in range(6):
+            if index == 5:
+                # Move the call site's window back a minute, so the last record starts a new one
+                rate_limit._windows = {key: [window[0] - 60.0, window[1], window[2]] for key, window in rate_limit._windows.items()}
+            logger.info("Record %d", index)
+
+        # Assert
+        assert target.messages == ["Record 0", "Record 1", "Record 5 (3 similar messages suppressed)"]
+
+
+class TestBatchingHandler:
+    """Tests for batching records."""
+
+    @pytest.mark.unit
+    def test_consecutive_records_are_joined_into_one(self, test_logger):
+        """Test that buffered records of the same level are sent as one multi-line record."""
+        # Arrange
+        logger, target = test_logger
+        install_batching(logger, capacity=10, flush_interval=60.0)
+
+        # Act
+        logger.info("first")
+        logger.info("second")
+        buffered = list(target.messages)
+        logger.handlers[0].flush()
+
+        # Assert
+        assert buffered == []
+        assert target.messages == ["first\nsecond"]
+
+    @pytest.mark.unit
+    def test_warnings_are_sent_straight_away(self, test_logger):
+        """Test that a warning flushes the buffer ahead of it and itself."""
+        # Arrange
+        logger, target = test_logger
+        install_batching(logger, capacity=10, flush_interval=60.0)
+
+        # Act
+        logger.info("routine")
+        logger.warning("problem")
+
+        # Assert
+        assert target.messages == ["routine", "problem"]
+
+    @pytest.mark.unit
+    def test_installing_again_replaces_the_handler(self, test_logger):
+        """Test that installing twice wraps the original handlers once and keeps a single rate limit."""
+        # Arrange
+        logger, target = test_logger
+
+        # Act
+        install_batching(logger, capacity=10, flush_interval=60.0, max_records_per_minute=5)
+        handler = install_batching(logger, capacity=20, flush_interval=60.0, max_records_per_minute=5)
+
+        # Assert
+        assert logger.handlers == [handler]
+        assert isinstance(handler, BatchingHandler)
+        assert handler.targets == [target]
+        assert len([f for f in logger.filters if isinstance(f, RateLimitFilter)]) == 1
+
+    @pytest.mark.unit
+    def test_zero_capacity_restores_the_original_handlers(self, test_logger):
+        """Test that a batch size of 0 sends records straight to the original handlers again."""
+        # Arrange
+        logger, target = test_logger
+        install_batching(logger, capacity=10, flush_interval=60.0)
+
+        # Act
+        handler = install_batching(logger, capacity=0, flush_interval=60.0)
+        logger.info("unbatched")
+
+        # Assert
+        assert handler is None
+        assert logger.handlers == [target]
+        assert target.messages == ["unbatched"]
@@ -0,0 +1,267 @@
+"""
+Unit tests for tasking_scheduler.py module.
+
+Tests cover target expansion, pre-checking, the in-flight limit,
+queue-depth backpressure, request timeouts, failed sensor calls, and sensor data that arrives
+before its request is recorded.
+"""
+import asyncio
+import itertools
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.tasking_scheduler import TaskingScheduler, expand_targets
+
+
+TARGETS = [(47.2753, -122.4302), (37.7749, -122.4194), (21.3069, -157.8583)]
+
+
+class FakeSensor:
+    """Records tasking calls and hands out tracking IDs."""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.pre_checked = []
+        self.tasked = []
+        self.max_in_flight_seen = 0
+        self.scheduler = None
+
+    async def pre_check(self, target):
+        self.pre_checked.append(target)
+        return target not in self.reject
+
+    async def task(self, target):
+        self.tasked.append(target)
+        if self.scheduler is not None:
+            self.max_in_flight_seen = max(self.max_in_flight_seen, self.scheduler.in_flight + 1)
+        return f"tracking-{len(self.tasked)}"
+
+
+class TestExpandTargets:
+    """Tests for repeating target lists."""
+
+    @pytest.mark.unit
+    def test_single_pass(self):
+        """Test that one pass yields each target once."""
+        # Act & Assert
+        assert list(expand_targets(TARGETS, 1)) == TARGETS
+
+    @pytest.mark.unit
+    def test_multiple_passes(self):
+        """Test that targets repeat in order for each pass."""
+        # Act & Assert
+        assert list(expand_targets(TARGETS[:2], 3)) == TARGETS[:2] * 3
+
+    @pytest.mark.unit
+    def test_zero_passes_is_continuous(self):
+        """Test that zero passes keeps yielding targets."""
+        # Act
+        targets = list(itertools.islice(expand_targets(TARGETS, 0), 10))
+
+        # Assert
+        assert len(targets) == 10
+        assert targets[3] == TARGETS[0]
+
+
+class TestTaskingSchedulerPipelining:
+    """Tests for keeping tasking requests in flight."""
+
+    @pytest.mark.unit
+    async def test_tasks_every_target(self):
+        """Test that every pre-checked target is tasked."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=len(TARGETS))
+
+        # Act
+        accepted = await scheduler.run(TARGETS)
+
+        # Assert
+        assert accepted == 3
+        assert sensor.tasked == TARGETS
+        assert scheduler.in_flight == 3
+
+    @pytest.mark.unit
+    async def test_rejected_pre_check_is_not_tasked(self):
+        """Test that targets failing the pre-check are skipped."""
+        # Arrange
+        sensor = FakeSensor(reject=[TARGETS[1]])
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=3)
+
+        # Act
+        accepted = await scheduler.run(TARGETS)
+
+        # Assert
+        assert accepted == 2
+        assert scheduler.rejected == 1
+        assert TARGETS[1] not in sensor.tasked
+
+    @pytest.mark.unit
+    async def test_in_flight_limit_waits_for_completion(self):
+        """Test that no more than max_in_flight requests wait on sensor data."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=2)
+        sensor.scheduler = scheduler
+
+        async def deliver_sensor_data():
+            delivered = 0
+            while delivered < len(TARGETS):
+                await asyncio.sleep(0.01)
+                if len(sensor.tasked) > delivered:
+                    delivered += 1
+                    scheduler.complete(f"tracking-{delivered}")
+
+        # Act
+        delivery = asyncio.ensure_future(deliver_sensor_data())
+        await scheduler.run(TARGETS)
+        await delivery
+
+        # Assert
+        assert sensor.tasked == TARGETS
+        assert sensor.max_in_flight_seen == 2
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.unit
+    async def test_pre_check_runs_ahead_of_tasking(self):
+        """Test that the next target is pre-checked while the current request is in flight."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=1)
+
+        # Act
+        run = asyncio.ensure_future(scheduler.run(TARGETS))
+        await asyncio.sleep(0.05)
+
+        # Assert
+        assert len(sensor.tasked) == 1
+        assert len(sensor.pre_checked) >= 2
+
+        scheduler.complete("tracking-1")
+        await asyncio.sleep(0.05)
+        scheduler.complete("tracking-2")
+        await asyncio.wait_for(run, timeout=1)
+
+    @pytest.mark.unit
+    async def test_queue_depth_holds_back_tasking(self):
+        """Test that tasking waits while the processing queue is too deep."""
+        # Arrange
+        sensor = FakeSensor()
+        depth = {'value': 10}
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: depth['value'],
+                                     max_in_flight=3, max_queue_depth=5, poll_interval=0.01)
+
+        # Act
+        run = asyncio.ensure_future(scheduler.run(TARGETS))
+        await asyncio.sleep(0.05)
+        tasked_while_deep = len(sensor.tasked)
+        depth['value'] = 0
+        await asyncio.wait_for(run, timeout=1)
+
+        # Assert
+        assert tasked_while_deep == 0
+        assert sensor.tasked == TARGETS
+
+    @pytest.mark.unit
+    async def test_timed_out_request_frees_its_slot(self):
+        """Test that a request that never delivers data stops blocking new tasking."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=1, request_timeout=0.02)
+
+        # Act
+        accepted = await asyncio.wait_for(scheduler.run(TARGETS), timeout=1)
+
+        # Assert
+        assert accepted == 3
+
+    @pytest.mark.unit
+    async def test_complete_ignores_unknown_tracking_ids(self):
+        """Test that sensor data for unscheduled requests does not free a slot."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=1)
+        await scheduler.run(TARGETS[:1])
+
+        # Act
+        scheduler.complete("unknown")
+
+        # Assert
+        assert scheduler.in_flight == 1
+
+    @pytest.mark.unit
+    async def test_sensor_data_before_the_request_is_recorded_frees_its_slot(self):
+        """Test that a request whose sensor data arrived before it was recorded does not hold its slot until the timeout."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=1, request_timeout=600)
+
+        async def task_and_deliver(target):
+            tracking_id = await sensor.task(target)
+            scheduler.complete(tracking_id)
+            return tracking_id
+
+        scheduler.task = task_and_deliver
+
+        # Act
+        accepted = await asyncio.wait_for(scheduler.run(TARGETS), timeout=1)
+
+        # Assert
+        assert accepted == 3
+        assert scheduler.in_flight == 0
+
+
+class TestTaskingSchedulerErrors:
+    """Tests for tasking and pre-check calls that raise."""
+
+    @pytest.mark.unit
+    async def test_failed_task_call_is_rejected_and_frees_its_slot(self):
+        """Test that a tasking call that raises counts as rejected, frees its slot and the remaining targets are still tasked."""
+        # Arrange
+        sensor = FakeSensor()
+        errors = []
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=2,
+                                     on_error=lambda target, error: errors.append((target, str(error))))
+
+        async def task_or_fail(target):
+            if target == TARGETS[0]:
+                raise ConnectionError("sensor service unavailable")
+            return await sensor.task(target)
+
+        scheduler.task = task_or_fail
+
+        # Act - With two slots, a slot leaked by the failed call would hold back the last target until the timeout
+        accepted = await asyncio.wait_for(scheduler.run(TARGETS), timeout=1)
+
+        # Assert
+        assert accepted == 2
+        assert scheduler.rejected == 1
+        assert sensor.tasked == TARGETS[1:]
+        assert scheduler.in_flight == 2
+        assert errors == [(TARGETS[0], "sensor service unavailable")]
+
+    @pytest.mark.unit
+    async def test_failed_pre_check_call_is_rejected(self):
+        """Test that a pre-check call that raises counts as rejected and the remaining targets are still tasked."""
+        # Arrange
+        sensor = FakeSensor()
+        scheduler = TaskingScheduler(sensor.pre_check, sensor.task, queue_depth=lambda: 0, max_in_flight=len(TARGETS))
+
+        async def pre_check_or_fail(target):
+            if target == TARGETS[1]:
+                raise ConnectionError("sensor service unavailable")
+            return await sensor.pre_check(target)
+
+        scheduler.pre_check = pre_check_or_fail
+
+        # Act
+        accepted = await asyncio.wait_for(scheduler.run(TARGETS), timeout=1)
+
+        # Assert
+        assert accepted == 2
+        assert scheduler.rejected == 1
+        assert sensor.tasked == [TARGETS[0], TARGETS[2]]
@@ -0,0 +1,105 @@
+"""
+Unit tests for tile_scheduler.py module.
+
+Tests cover estimating water per chip, ordering chips by their
+likelihood of holding ships and reporting time budget coverage.
+"""
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.tile_scheduler import TileCoverage, count_in_grid, ordered_tiles, tile_priorities, water_fractions
+
+WATER_BGR = (60, 40, 20)
+LAND_BGR = (120, 160, 170)
+
+
+def scene(width, height, water_columns):
+    """A land scene whose leftmost water_columns pixel columns are water."""
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:, :] = LAND_BGR
+    image[:, :water_columns] = WATER_BGR
+    return image
+
+
+class TestPriorities:
+    """Tests for scoring the chips of a scene."""
+
+    @pytest.mark.unit
+    def test_water_fraction_of_each_chip(self):
+        """Test that dark, blue-leaning pixels count as water and bright ones as land."""
+        # Arrange
+        image = scene(300, 100, water_columns=150)
+
+        # Act
+        fractions = water_fractions(image, 100, 100)
+
+        # Assert
+        assert fractions.shape == (1, 3)
+        assert fractions[0, 0] == 1.0
+        assert fractions[0, 1] == pytest.approx(0.5, abs=0.05)
+        assert fractions[0, 2] == 0.0
+
+    @pytest.mark.unit
+    def test_previous_detections_and_areas_of_interest_raise_priority(self):
+        """Test that earlier detections add to a chip's score and area of interest priorities multiply it."""
+        # Arrange
+        image = scene(300, 100, water_columns=300)
+        previous_detections = np.array([[0.0, 4.0, 0.0]])
+        aoi_priorities = np.array([[1.0, 1.0, 2.0]])
+
+        # Act
+        priorities = tile_priorities(image, 100, 100, aoi_priorities, previous_detections)
+
+        # Assert
+        assert priorities[0].tolist() == pytest.approx([1.0, 1.0 + np.log1p(4.0), 2.0])
+
+    @pytest.mark.unit
+    def test_chips_are_ordered_by_priority_leaving_out_masked_chips(self):
+        """Test that chips come highest priority first, raster order among equals, without those outside the mask."""
+        # Arrange
+        priorities = np.array([[0.5, 0.5, 2.0], [1.0, 0.0, 0.5]])
+        tile_mask = np.array([[True, True, True], [True, False, False]])
+
+        # Act
+        tiles = ordered_tiles(priorities, 100, 200, tile_mask)
+
+        # Assert
+        assert tiles == [(0, 400), (100, 0), (0, 0), (0, 200)]
+
+    @pytest.mark.unit
+    def test_count_in_grid_ignores_points_outside_the_image(self):
+        """Test that points are counted in the chip they fall in, and points off the image are dropped."""
+        # Arrange
+        xs = np.array([10.0, 20.0, 250.0, -5.0, 400.0])
+        ys = np.array([10.0, 30.0, 150.0, 10.0, 10.0])
+
+        # Act
+        counts = count_in_grid(xs, ys, 300, 200, 100, 100)
+
+        # Assert
+        assert counts.tolist() == [[2.0, 0.0, 0.0], [0.0, 0.0, 1.0]]
+
+
+class TestTileCoverage:
+    """Tests for reporting how much of a scene a time budget covered."""
+
+    @pytest.mark.unit
+    def test_coverage_report(self):
+        """Test that coverage reports the share of chips processed and the chips left unprocessed."""
+        # Arrange
+        coverage = TileCoverage(tiles_total=4, completed_tiles={"0_0": [], "0_100": []}, unprocessed=[(0, 100, 100, 100), (100, 100, 100, 50)])
+
+        # Act
+        report = coverage.to_dict()
+
+        # Assert
+        assert coverage.budget_exhausted is True
+        assert report['coverage'] == 0.5
+        assert report['complete'] is False
+        assert report['unprocessed'] == [[0, 100, 100, 100], [100, 100, 100, 50]]
+        assert TileCoverage().fraction == 1.0
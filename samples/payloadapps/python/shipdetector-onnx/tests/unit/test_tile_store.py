@@ -0,0 +1,198 @@
+"""
+Unit tests for tile_store.py module.
+
+Tests cover geographic tile IDs, fingerprint comparison, reuse of
+detections for unchanged tiles in the same context, and persistence.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.georeference import GeoReference
+from app.tile_store import TileStore
+
+
+DETECTIONS = [{'probability': 0.9, 'x_coordinate': 10, 'y_coordinate': 20, 'width': 30, 'height': 40}]
+
+
+class TestTileStoreIds:
+    """Tests for geographic tile IDs."""
+
+    @pytest.mark.unit
+    def test_same_geography_gives_same_id(self, sample_geotiff_file):
+        """Test that tile IDs depend on location, not on the capture."""
+        # Arrange
+        first_capture = GeoReference.from_file(str(sample_geotiff_file))
+        second_capture = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Act & Assert
+        assert TileStore.tile_id(first_capture, 0, 0, 128, 128) == TileStore.tile_id(second_capture, 0, 0, 128, 128)
+
+    @pytest.mark.unit
+    def test_different_tiles_have_different_ids(self, sample_geotiff_file):
+        """Test that neighbouring tiles have distinct IDs."""
+        # Arrange
+        georeference = GeoReference.from_file(str(sample_geotiff_file))
+
+        # Act
+        ids = {TileStore.tile_id(georeference, x, y, x + 128, y + 128) for x in (0, 128) for y in (0, 128)}
+
+        # Assert
+        assert len(ids) == 4
+
+
+class TestTileStoreChangeDetection:
+    """Tests for reusing detections of unchanged tiles."""
+
+    @pytest.mark.unit
+    def test_unknown_tile_is_changed(self, temp_dir, sample_small_image):
+        """Test that a tile never seen before must be inferred."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"))
+
+        # Act & Assert
+        assert store.lookup("tile", store.fingerprint(sample_small_image)) is None
+
+    @pytest.mark.unit
+    def test_unchanged_tile_reuses_detections(self, temp_dir, sample_small_image):
+        """Test that an identical tile returns the stored detections."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"))
+        store.update("tile", store.fingerprint(sample_small_image), DETECTIONS)
+
+        # Act
+        detections = store.lookup("tile", store.fingerprint(sample_small_image.copy()))
+
+        # Assert
+        assert detections == DETECTIONS
+
+    @pytest.mark.unit
+    def test_small_noise_is_unchanged(self, temp_dir, sample_small_image):
+        """Test that sensor noise under the threshold does not trigger re-inference."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"), difference_threshold=4.0)
+        store.update("tile", store.fingerprint(sample_small_image), DETECTIONS)
+        noisy = np.clip(sample_small_image.astype(np.int16) + 2, 0, 255).astype(np.uint8)
+
+        # Act & Assert
+        assert store.lookup("tile", store.fingerprint(noisy)) == DETECTIONS
+
+    @pytest.mark.unit
+    def test_changed_tile_is_reinferred(self, temp_dir, sample_small_image):
+        """Test that a tile whose content changed is not reused."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"), difference_threshold=4.0)
+        store.update("tile", store.fingerprint(sample_small_image), DETECTIONS)
+        changed = sample_small_image.copy()
+        changed[:, :208] = 255
+
+        # Act & Assert
+        assert store.lookup("tile", store.fingerprint(changed)) is None
+
+    @pytest.mark.unit
+    def test_small_new_object_is_reinferred(self, temp_dir):
+        """Test that one small bright object appearing on an otherwise uniform tile counts as a change."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"), difference_threshold=4.0)
+        water = np.full((1248, 1248, 3), 40, dtype=np.uint8)
+        store.update("tile", store.fingerprint(water), [])
+        with_ship = water.copy()
+        with_ship[500:540, 600:720] = 220
+
+        # Act & Assert
+        assert store.lookup("tile", store.fingerprint(with_ship)) is None
+
+    @pytest.mark.unit
+    def test_detections_are_not_reused_in_another_context(self, temp_dir, sample_small_image):
+        """Test that detections found with another model, threshold or labels are not reused."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"))
+        fingerprint = store.fingerprint(sample_small_image)
+        context = TileStore.make_context("model", 0.5, ["ship"])
+        store.update("tile", fingerprint, DETECTIONS, context)
+
+        # Act & Assert
+        assert store.lookup("tile", fingerprint, context) == DETECTIONS
+        assert store.lookup("tile", fingerprint, TileStore.make_context("model", 0.7, ["ship"])) is None
+        assert store.lookup("tile", fingerprint, TileStore.make_context("other model", 0.5, ["ship"])) is None
+
+    @pytest.mark.unit
+    def test_store_is_bounded(self, temp_dir, sample_small_image):
+        """Test that the least recently updated tiles are dropped past max_tiles."""
+        # Arrange
+        store = TileStore(str(temp_dir / "tile-store.json"), max_tiles=2)
+        fingerprint = store.fingerprint(sample_small_image)
+
+        # Act
+        for tile_id in ("first", "second", "third"):
+            store.update(tile_id, fingerprint, [])
+
+        # Assert
+        assert store.lookup("first", fingerprint) is None
+        assert store.lookup("third", fingerprint) == []
+
+
+class TestTileStorePersistence:
+    """Tests for saving and reloading the store."""
+
+    @pytest.mark.unit
+    def test_save_and_reload(self, temp_dir, sample_small_image):
+        """Test that stored tiles survive a restart."""
+        # Arrange
+        store_path = temp_dir / "state" / "tile-store.json"
+        store = TileStore(str(store_path))
+        store.update("tile", store.fingerprint(sample_small_image), DETECTIONS)
+        store.save()
+
+        # Act
+        reloaded = TileStore(str(store_path))
+
+        # Assert
+        assert reloaded.lookup("tile", reloaded.fingerprint(sample_small_image)) == DETECTIONS
+
+    @pytest.mark.unit
+    def test_concurrent_saves_leave_a_valid_file(self, temp_dir, sample_small_image):
+        """Test that workers saving at the same time neither fail nor leave a half-written or temporary file."""
+        # Arrange
+        store_path = temp_dir / "tile-store.json"
+        store = TileStore(str(store_path), save_interval=0)
+        fingerprint = store.fingerprint(sample_small_image)
+
+        def update_and_save(worker):
+            for tile in range(20):
+                store.update(f"{worker}_{tile}", fingerprint, DETECTIONS)
+                store.save()
+
+        # Act
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(update_and_save, range(4)))
+
+        # Assert
+        assert len(json.loads(store_path.read_text())) == 4 * 20
+        assert [path.name for path in temp_dir.iterdir()] == ["tile-store.json"]
+
+    @pytest.mark.unit
+    def test_saves_are_rate_limited(self, temp_dir, sample_small_image):
+        """Test that the store is written at most once per save interval unless forced."""
+        # Arrange
+        store_path = temp_dir / "tile-store.json"
+        store = TileStore(str(store_path), save_interval=3600)
+        fingerprint = store.fingerprint(sample_small_image)
+        store.update("first", fingerprint, [])
+        store.save()
+
+        # Act
+        store.update("second", fingerprint, [])
+        store.save()
+        saved_within_interval = json.loads(store_path.read_text())
+        store.save(force=True)
+
+        # Assert
+        assert list(saved_within_interval) == ["first"]
+        assert list(json.loads(store_path.read_text())) == ["first", "second"]
@@ -0,0 +1,184 @@
+"""
+Unit tests for vessel_tracker.py module.
+
+Tests cover starting, continuing and losing vessel tracks across
+captures, gating, scene footprints and persisting the tracks.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import numpy as np
+import pytest
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.georeference import GeoReference
+from app.vessel_tracker import METERS_PER_DEGREE, VesselTracker, scene_footprint
+
+# A scene of 10E to 10.1E and 49.9N to 50N
+FOOTPRINT = (10.0, 10.1, 49.9, 50.0)
+
+
+def east_of(longitude, latitude, meters):
+    """The longitude the given number of meters east of a point."""
+    return longitude + meters / (METERS_PER_DEGREE * np.cos(np.radians(latitude)))
+
+
+def events_by_type(events):
+    """The events' types, in order."""
+    return [event.event for event in events]
+
+
+@pytest.fixture
+def tracker(temp_dir):
+    """A tracker with a 300 m gate, 50 m movement threshold and tracks lost after two misses."""
+    return VesselTracker(str(temp_dir / "vessel-tracks.json"), gate_meters=300.0, moved_meters=50.0, max_misses=2)
+
+
+class TestVesselTracker:
+    """Tests for associating detections with tracks."""
+
+    @pytest.mark.unit
+    def test_first_capture_starts_new_tracks(self, tracker):
+        """Test that detections with no track nearby start new tracks."""
+        # Act
+        events = tracker.update([10.02, 10.05], [49.95, 49.95], FOOTPRINT, captured_at=1000.0)
+
+        # Assert
+        assert events_by_type(events) == ["new", "new"]
+        assert [event.detection for event in events] == [0, 1]
+        assert tracker.track_count == 2
+
+    @pytest.mark.unit
+    def test_repeat_capture_continues_tracks(self, tracker):
+        """Test that a vessel in the same place is stationary and one that moved within the gate keeps its track."""
+        # Arrange
+        first = tracker.update([10.02, 10.05], [49.95, 49.95], FOOTPRINT, captured_at=1000.0)
+
+        # Act
+        events = tracker.update([10.02, east_of(10.05, 49.95, 200.0)], [49.95, 49.95], FOOTPRINT, captured_at=2000.0)
+
+        # Assert
+        assert events_by_type(events) == ["stationary", "moved"]
+        assert [event.track_id for event in events] == [event.track_id for event in first]
+        assert events[1].moved_meters == pytest.approx(200.0, abs=1.0)
+
+    @pytest.mark.unit
+    def test_detection_outside_the_gate_starts_a_new_track(self, tracker):
+        """Test that a detection beyond the gate is not associated with the track."""
+        # Arrange
+        tracker.update([10.05], [49.95], FOOTPRINT, captured_at=1000.0)
+
+        # Act
+        events = tracker.update([east_of(10.05, 49.95, 500.0)], [49.95], FOOTPRINT, captured_at=2000.0)
+
+        # Assert
+        assert events_by_type(events) == ["new"]
+
+    @pytest.mark.unit
+    def test_gate_widens_with_max_speed(self, temp_dir):
+        """Test that max_speed lets a vessel move further the longer it was unseen."""
+        # Arrange
+        tracker = VesselTracker(str(temp_dir / "vessel-tracks.json"), gate_meters=300.0, max_speed=1.0)
+        tracker.update([10.05], [49.95], FOOTPRINT, captured_at=1000.0)
+
+        # Act
+        events = tracker.update([east_of(10.05, 49.95, 800.0)], [49.95], FOOTPRINT, captured_at=1600.0)
+
+        # Assert
+        assert events_by_type(events) == ["moved"]
+
+    @pytest.mark.unit
+    def test_gate_stops_widening_at_max_gate(self, temp_dir):
+        """Test that a track unseen for hours only gates detections out to max_gate_meters, not as far as max_speed would take it."""
+        # Arrange
+        tracker = VesselTracker(str(temp_dir / "vessel-tracks.json"), gate_meters=300.0, max_speed=1.0, max_gate_meters=1000.0)
+        tracker.update([10.05], [49.95], FOOTPRINT, captured_at=1000.0)
+
+        # Act
+        events = tracker.update([east_of(10.05, 49.95, 2000.0)], [49.95], FOOTPRINT, captured_at=1000.0 + 10 * 3600)
+
+        # Assert
+        assert events_by_type(events) == ["new"]
+
+    @pytest.mark.unit
+    def test_tracks_missed_inside_the_scene_are_lost(self, tracker):
+        """Test that tracks inside the footprint are lost after max_misses, and tracks outside it are kept."""
+        # Arrange
+        tracker.update([10.05, 10.5], [49.95, 49.95], (10.0, 10.6, 49.9, 50.0), captured_at=1000.0)
+
+        # Act
+        first_miss = tracker.update([], [], FOOTPRINT, captured_at=2000.0)
+        second_miss = tracker.update([], [], FOOTPRINT, captured_at=3000.0)
+
+        # Assert
+        assert first_miss == []
+        assert events_by_type(second_miss) == ["lost"]
+        assert second_miss[0].longitude == pytest.approx(10.05)
+        assert tracker.track_count == 1
+
+    @pytest.mark.unit
+    def test_tracks_outside_the_searched_area_are_not_missed(self, tracker):
+        """Test that tracks in parts of the scene that were not searched are kept, and those in searched parts are lost."""
+        # Arrange
+        tracker.update([10.02, 10.08], [49.95, 49.95], FOOTPRINT, captured_at=1000.0)
+        western_half = lambda longitudes, latitudes: np.asarray(longitudes) < 10.05
+
+        # Act
+        first_miss = tracker.update([], [], FOOTPRINT, captured_at=2000.0, observed=western_half)
+        second_miss = tracker.update([], [], FOOTPRINT, captured_at=3000.0, observed=western_half)
+
+        # Assert
+        assert first_miss == []
+        assert events_by_type(second_miss) == ["lost"]
+        assert second_miss[0].longitude == pytest.approx(10.02)
+        assert tracker.track_count == 1
+
+    @pytest.mark.unit
+    def test_concurrent_saves_leave_a_valid_file(self, temp_dir, tracker):
+        """Test that workers saving at the same time neither fail nor leave a half-written or temporary file."""
+        # Arrange
+        def update_and_save(worker):
+            for capture in range(10):
+                tracker.update([10.01 + worker * 0.02], [49.95], FOOTPRINT, captured_at=1000.0 + capture)
+                tracker.save()
+
+        # Act
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(update_and_save, range(4)))
+
+        # Assert
+        assert len(json.loads((temp_dir / "vessel-tracks.json").read_text())['tracks']) == tracker.track_count
+        assert [path.name for path in temp_dir.iterdir()] == ["vessel-tracks.json"]
+
+    @pytest.mark.unit
+    def test_tracks_are_persisted(self, temp_dir, tracker):
+        """Test that a new tracker continues the tracks saved by an earlier one."""
+        # Arrange
+        first = tracker.update([10.05], [49.95], FOOTPRINT, captured_at=1000.0)
+        tracker.save()
+
+        # Act
+        reloaded = VesselTracker(str(temp_dir / "vessel-tracks.json"))
+        events = reloaded.update([10.05, 10.02], [49.95, 49.95], FOOTPRINT, captured_at=2000.0)
+
+        # Assert
+        assert events[0].track_id == first[0].track_id
+        assert events_by_type(events) == ["stationary", "new"]
+        assert events[1].track_id > first[0].track_id
+
+    @pytest.mark.unit
+    def test_scene_footprint_bounds_the_image_corners(self):
+        """Test that the footprint spans the longitude and latitude of the image's corners."""
+        # Arrange
+        georeference = GeoReference(from_origin(10.0, 50.0, 0.001, 0.001), CRS.from_epsg(4326))
+
+        # Act
+        footprint = scene_footprint(georeference, 100, 50)
+
+        # Assert
+        assert footprint == pytest.approx((10.0, 10.1, 49.95, 50.0))
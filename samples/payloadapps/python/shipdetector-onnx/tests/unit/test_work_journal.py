@@ -0,0 +1,220 @@
+"""
+Unit tests for work_journal.py module.
+
+Tests cover recording queued images and completed tiles, resuming after
+a restart, tolerating torn writes, compaction, and fsync batching.
+"""
+import json
+import time
+from pathlib import Path
+from unittest.mock import patch
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.image_job import ImageJob
+from app.work_journal import WorkJournal
+
+
+class TestWorkJournalResume:
+    """Tests for reloading pending work after a restart."""
+
+    @pytest.mark.unit
+    def test_queued_image_is_pending_after_restart(self, temp_dir):
+        """Test that an image queued before a restart is reloaded."""
+        # Arrange
+        journal_path = temp_dir / "state" / "work-journal.jsonl"
+        journal = WorkJournal(str(journal_path))
+        journal.record_queued(ImageJob(image_path="/inbox/scene.tif", tracking_id="abc-123"))
+        journal.close()
+
+        # Act
+        pending = WorkJournal(str(journal_path)).pending_jobs()
+
+        # Assert
+        assert len(pending) == 1
+        assert pending[0].image_path == "/inbox/scene.tif"
+        assert pending[0].tracking_id == "abc-123"
+
+    @pytest.mark.unit
+    def test_done_image_is_not_pending(self, temp_dir):
+        """Test that finished images are not resumed."""
+        # Arrange
+        journal_path = temp_dir / "work-journal.jsonl"
+        journal = WorkJournal(str(journal_path))
+        journal.record_queued(ImageJob(image_path="/inbox/done.tif"))
+        journal.record_queued(ImageJob(image_path="/inbox/pending.tif"))
+        journal.record_done("/inbox/done.tif")
+        journal.close()
+
+        # Act
+        pending = WorkJournal(str(journal_path)).pending_jobs()
+
+        # Assert
+        assert [job.image_path for job in pending] == ["/inbox/pending.tif"]
+
+    @pytest.mark.unit
+    def test_failed_image_is_not_pending(self, temp_dir):
+        """Test that images recorded as failed are not resumed."""
+        # Arrange
+        journal_path = temp_dir / "work-journal.jsonl"
+        journal = WorkJournal(str(journal_path))
+        journal.record_queued(ImageJob(image_path="/inbox/corrupt.tif"))
+        journal.record_failed("/inbox/corrupt.tif", "Unable to decode image")
+        journal.close()
+
+        # Act
+        pending = WorkJournal(str(journal_path)).pending_jobs()
+
+        # Assert
+        assert pending == []
+
+    @pytest.mark.unit
+    def test_completed_tiles_survive_restart(self, temp_dir):
+        """Test that completed tile detections are reloaded for pending images."""
+        # Arrange
+        journal_path = temp_dir / "work-journal.jsonl"
+        detection = {'probability': 0.9, 'x_coordinate': 840, 'y_coordinate': 12, 'width': 30, 'height': 40}
+        journal = WorkJournal(str(journal_path))
+        journal.record_queued(ImageJob(image_path="/inbox/scene.tif"))
+        journal.record_tile("/inbox/scene.tif", "0_0", [])
+        journal.record_tile("/inbox/scene.tif", "0_832", [detection])
+        journal.close()
+
+        # Act
+        completed = WorkJournal(str(journal_path)).completed_tiles("/inbox/scene.tif")
+
+        # Assert
+        assert completed == {"0_0": [], "0_832": [detection]}
+
+    @pytest.mark.unit
+    def test_torn_final_record_is_ignored(self, temp_dir):
+        """Test that a partially written record from a crash does not prevent loading."""
+        # Arrange
+        journal_path = temp_dir / "work-journal.jsonl"
+        journal_path.write_text(json.dumps({'op': 'queued', 'image': '/inbox/scene.tif', 'tracking_id': ''}) + '\n{"op": "til')
+
+        # Act
+        journal = WorkJournal(str(journal_path))
+
+        # Assert
+        assert [job.image_path for job in journal.pending_jobs()] == ["/inbox/scene.tif"]
+        assert journal.completed_tiles("/inbox/scene.tif") == {}
+
+
+class TestWorkJournalCompaction:
+    """Tests for keeping the journal bounded."""
+
+    @pytest.mark.unit
+    def test_reopening_drops_finished_images(self, temp_dir):
+        """Test that finished images are removed from the file when the journal is reopened."""
+        # Arrange
+        journal_path = temp_dir / "work-journal.jsonl"
+        journal = WorkJournal(str(journal_path))
+        for i in range(10):
+            journal.record_queued(ImageJob(image_path=f"/inbox/scene_{i}.tif"))
+            journal.record_tile(f"/inbox/scene_{i}.tif", "0_0", [])
+            journal.record_done(f"/inbox/scene_{i}.tif")
+        journal.close()
+
+        # Act
+        WorkJournal(str(journal_path)).close()
+
+        # Assert
+        assert journal_path.read_text() == ""
+
+    @pytest.mark.unit
+    def test_journal_is_compacted_while_running(self, temp_dir):
+        """Test that a journal grown past compact_size is compacted when an image finishes, without a restart."""
+        # Arrange
+        journal_path = temp_dir / "work-journal.jsonl"
+        journal = WorkJournal(str(journal_path), compact_size=4096)
+        journal.record_queued(ImageJob(image_path="/inbox/pending.tif"))
+
+        # Act
+        for i in range(100):
+            journal.record_queued(ImageJob(image_path=f"/inbox/scene_{i}.tif"))
+            journal.record_tile(f"/inbox/scene_{i}.tif", "0_0", [])
+            journal.record_done(f"/inbox/scene_{i}.tif")
+        journal.record_tile("/inbox/pending.tif", "0_0", [])
+        journal.close()
+
+        # Assert
+        assert journal_path.stat().st_size <= 4096
+        assert [job.image_path for job in WorkJournal(str(journal_path)).pending_jobs()] == ["/inbox/pending.tif"]
+        assert WorkJournal(str(journal_path)).completed_tiles("/inbox/pending.tif") == {"0_0": []}
+
+    @pytest.mark.unit
+    def test_tiles_for_unknown_images_are_ignored(self, temp_dir):
+        """Test that tile records are only kept for queued images."""
+        # Arrange
+        journal = WorkJournal(str(temp_dir / "work-journal.jsonl"))
+
+        # Act
+        journal.record_tile("/inbox/unknown.tif", "0_0", [])
+
+        # Assert
+        assert journal.completed_tiles("/inbox/unknown.tif") == {}
+        assert journal.is_pending("/inbox/unknown.tif") is False
+
+    @pytest.mark.unit
+    def test_tile_keys_differ_between_chip_grids(self):
+        """Test that the same tile origin gets another key with another chip size or decode resolution."""
+        # Arrange & Act
+        keys = {WorkJournal.tile_key(0, 832, 832, 832), WorkJournal.tile_key(0, 832, 416, 416),
+                WorkJournal.tile_key(0, 832, 832, 832, decode_scale=0.5)}
+
+        # Assert
+        assert len(keys) == 3
+        assert WorkJournal.tile_key(0, 832, 832, 832) == WorkJournal.tile_key(0, 832, 832, 832, decode_scale=1.0)
+
+
+class TestWorkJournalFsyncBatching:
+    """Tests for fsync batching."""
+
+    @pytest.mark.unit
+    def test_tile_records_are_synced_in_batches(self, temp_dir):
+        """Test that tile records only fsync once per batch."""
+        # Arrange
+        journal = WorkJournal(str(temp_dir / "work-journal.jsonl"), fsync_batch_size=4, fsync_interval=3600)
+        journal.record_queued(ImageJob(image_path="/inbox/scene.tif"))
+
+        # Act
+        with patch('app.work_journal.os.fsync') as mock_fsync:
+            for i in range(8):
+                journal.record_tile("/inbox/scene.tif", f"0_{i}", [])
+
+        # Assert
+        assert mock_fsync.call_count == 2
+
+    @pytest.mark.unit
+    def test_queued_and_done_records_sync_immediately(self, temp_dir):
+        """Test that queued and finished records are fsync'd right away."""
+        # Arrange
+        journal = WorkJournal(str(temp_dir / "work-journal.jsonl"), fsync_batch_size=100, fsync_interval=3600)
+
+        # Act
+        with patch('app.work_journal.os.fsync') as mock_fsync:
+            journal.record_queued(ImageJob(image_path="/inbox/scene.tif"))
+            journal.record_done("/inbox/scene.tif")
+
+        # Assert
+        assert mock_fsync.call_count == 2
+
+    @pytest.mark.unit
+    def test_last_tiles_of_a_burst_are_synced_within_the_interval(self, temp_dir):
+        """Test that tile records are fsync'd within fsync_interval even when no further records follow."""
+        # Arrange
+        journal = WorkJournal(str(temp_dir / "work-journal.jsonl"), fsync_batch_size=100, fsync_interval=0.05)
+        journal.record_queued(ImageJob(image_path="/inbox/scene.tif"))
+
+        # Act
+        with patch('app.work_journal.os.fsync') as mock_fsync:
+            journal.record_tile("/inbox/scene.tif", "0_0", [])
+            time.sleep(0.5)
+        journal.close()
+
+        # Assert
+        assert mock_fsync.call_count == 1
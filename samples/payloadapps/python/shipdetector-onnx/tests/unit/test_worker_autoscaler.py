@@ -0,0 +1,112 @@
+"""
+Unit tests for worker_autoscaler.py module.
+
+Tests cover scaling decisions from queue depth, wait time, busy workers
+and the scale-down cooldown, and the ceilings imposed by the CPU quota and
+measured memory per worker.
+"""
+from pathlib import Path
+import pytest
+
+# Add src to path for imports
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from app.worker_autoscaler import WorkerAutoscaler
+
+MB = 1024 * 1024
+
+
+class TestWorkerAutoscalerDecisions:
+    """Tests for queue-driven scaling decisions."""
+
+    @pytest.mark.unit
+    def test_scales_up_when_images_wait_too_long(self):
+        """Test that a worker is added when the oldest image has waited past the target."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=4, cpu_limit=4, memory_limit=None, target_wait=10)
+
+        # Act & Assert
+        assert autoscaler.desired_workers(current_workers=2, queue_depth=5, oldest_wait=12, busy_workers=2) == 3
+
+    @pytest.mark.unit
+    def test_holds_while_wait_is_under_target(self):
+        """Test that a short queue within the target wait keeps the current workers."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=4, cpu_limit=4, memory_limit=None, target_wait=10)
+
+        # Act & Assert
+        assert autoscaler.desired_workers(current_workers=2, queue_depth=1, oldest_wait=3, busy_workers=2) == 2
+
+    @pytest.mark.unit
+    def test_scales_down_to_minimum_when_idle(self):
+        """Test that workers are retired one at a time while the queue is empty, down to the minimum."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=2, max_workers=4, cpu_limit=4, memory_limit=None, scale_down_cooldown=0)
+
+        # Act & Assert
+        assert autoscaler.desired_workers(current_workers=4, queue_depth=0, oldest_wait=0, busy_workers=0) == 3
+        assert autoscaler.desired_workers(current_workers=2, queue_depth=0, oldest_wait=0, busy_workers=0) == 2
+
+    @pytest.mark.unit
+    def test_holds_while_every_worker_is_busy(self):
+        """Test that an empty queue does not retire a worker while every worker is still processing an image."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=4, cpu_limit=4, memory_limit=None, scale_down_cooldown=0)
+
+        # Act & Assert
+        assert autoscaler.desired_workers(current_workers=3, queue_depth=0, oldest_wait=0, busy_workers=3) == 3
+
+    @pytest.mark.unit
+    def test_scales_down_only_after_the_cooldown(self):
+        """Test that a worker is retired once the queue has stayed empty with a worker idle for the cooldown, and not before."""
+        # Arrange
+        now = [0.0]
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=4, cpu_limit=4, memory_limit=None, scale_down_cooldown=30,
+                                      clock=lambda: now[0])
+
+        # Act & Assert - An image arriving in between restarts the cooldown
+        assert autoscaler.desired_workers(current_workers=3, queue_depth=0, oldest_wait=0, busy_workers=1) == 3
+        now[0] = 20.0
+        assert autoscaler.desired_workers(current_workers=3, queue_depth=1, oldest_wait=0, busy_workers=1) == 3
+        now[0] = 40.0
+        assert autoscaler.desired_workers(current_workers=3, queue_depth=0, oldest_wait=0, busy_workers=1) == 3
+        now[0] = 70.0
+        assert autoscaler.desired_workers(current_workers=3, queue_depth=0, oldest_wait=0, busy_workers=1) == 2
+        now[0] = 80.0
+        assert autoscaler.desired_workers(current_workers=2, queue_depth=0, oldest_wait=0, busy_workers=1) == 2
+
+
+class TestWorkerAutoscalerLimits:
+    """Tests for the CPU and memory ceilings."""
+
+    @pytest.mark.unit
+    def test_max_workers_defaults_to_cpu_quota(self):
+        """Test that max_workers of 0 uses the container's CPU quota."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=0, cpu_limit=3, memory_limit=None)
+
+        # Act & Assert
+        assert autoscaler.desired_workers(current_workers=3, queue_depth=50, oldest_wait=60, busy_workers=3) == 3
+
+    @pytest.mark.unit
+    def test_memory_limit_caps_workers(self):
+        """Test that measured memory per worker limits how many workers fit in the container."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=8, cpu_limit=8, memory_limit=1000 * MB,
+                                      base_memory=100 * MB, memory_headroom=0.9)
+        autoscaler.record_memory(process_memory=500 * MB, busy_workers=2)
+
+        # Act & Assert
+        assert autoscaler.memory_per_worker == 200 * MB
+        assert autoscaler.worker_ceiling() == 4
+
+    @pytest.mark.unit
+    def test_scales_down_when_over_memory_ceiling(self):
+        """Test that workers beyond the memory ceiling are retired even while the queue is busy."""
+        # Arrange
+        autoscaler = WorkerAutoscaler(min_workers=1, max_workers=8, cpu_limit=8, memory_limit=1000 * MB, memory_headroom=1.0)
+        autoscaler.record_memory(process_memory=900 * MB, busy_workers=3)
+
+        # Act & Assert
+        assert autoscaler.desired_workers(current_workers=6, queue_depth=20, oldest_wait=60, busy_workers=6) == 3